@@ -51,7 +51,10 @@ INSTALLED_APPS = [
     'instagram_apps.interactions',
     'instagram_apps.posts',
     'instagram_apps.stories',
-    'instagram_apps.users'
+    'instagram_apps.users',
+    'instagram_apps.uploads',
+    'instagram_apps.search',
+    'instagram_apps.tags',
 ]
 
 
@@ -62,11 +65,22 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',  
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'instagram_space.utils.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'instagram_space.utils.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 
 AUTH_USER_MODEL = 'users.CustomUser'
 
+TEST_RUNNER = 'instagram_space.utils.testing.TestRunner'
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -153,9 +167,141 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+#Cache
+# Follow-graph, timeline and detail caches are invalidated on write; with more than one
+# worker process they need a shared backend, e.g. CACHE_URL=redis://localhost:6379/0
+if os.getenv('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_URL'),
+        }
+    }
+
+
 #Media
 import os
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+
+#Timeline
+TIMELINE_CELEBRITY_FOLLOWER_THRESHOLD = 10000
+TIMELINE_BACKFILL_LIMIT = 50
+TIMELINE_FANOUT_BATCH_SIZE = 1000
+TIMELINE_CELEBRITY_CACHE_TIMEOUT = 300
+
+
+#Counters
+LIKE_COUNTER_FLUSH_THRESHOLD = 100
+LIKE_COUNTER_FLUSH_INTERVAL = 5
+VIEW_COUNTER_FLUSH_THRESHOLD = 500
+VIEW_COUNTER_FLUSH_INTERVAL = 10
+VIEW_DEDUPE_WINDOW = 60 * 60
+# Due buffers are flushed by a per-process thread instead of the request that filled them
+COUNTER_BACKGROUND_FLUSH = True
+
+
+#Follow graph
+FOLLOW_GRAPH_CACHE_TIMEOUT = 300
+FOLLOW_OVERLAP_CACHE_TIMEOUT = 60
+# Following sets larger than this are filtered with a subquery instead of an IN list
+FOLLOW_GRAPH_INLINE_LIMIT = 500
+
+
+#Follow suggestions
+SUGGESTION_LIMIT = 100
+SUGGESTION_FOLLOWER_SAMPLE = 1000
+SUGGESTION_DIRTY_FOLLOWER_SAMPLE = 1000
+SUGGESTION_MUTUAL_WEIGHT = 1.0
+SUGGESTION_SHARED_FOLLOWER_WEIGHT = 0.5
+
+
+#Explore
+EXPLORE_MAX_AGE = 60 * 60 * 24 * 7
+EXPLORE_BATCH_SIZE = 500
+EXPLORE_LIKE_WEIGHT = 1.0
+EXPLORE_COMMENT_WEIGHT = 2.0
+EXPLORE_VIEW_WEIGHT = 0.1
+EXPLORE_GRAVITY = 1.5
+
+
+#Bulk create
+BULK_CREATE_BATCH_SIZE = 100
+
+
+#Stories
+STORY_PURGE_INTERVAL = None
+STORY_PURGE_ARCHIVE = False
+STORY_TRAY_CACHE_TIMEOUT = 30
+STORY_TRAY_LIMIT = 100
+
+
+#Media processing
+MEDIA_RENDITION_WIDTHS = (320, 640, 1080)
+MEDIA_DEFAULT_RENDITION_WIDTH = 1080
+MEDIA_WEBP_QUALITY = 80
+MEDIA_PROCESSING_WORKERS = 2
+MEDIA_PROCESSING_IN_PROCESS = False
+MEDIA_JOB_MAX_ATTEMPTS = 3
+MEDIA_JOB_LEASE_TIMEOUT = 15 * 60
+
+
+#Chunked uploads
+UPLOAD_MAX_SIZE = 2 * 1024 ** 3
+UPLOAD_MAX_CHUNK_SIZE = 16 * 1024 ** 2
+UPLOAD_VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v', '.webm')
+UPLOAD_SESSION_TTL = 60 * 60 * 24
+
+
+#Media serving
+MEDIA_SERVE = True
+MEDIA_CACHE_MAX_AGE = 60 * 60
+MEDIA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+MEDIA_IMMUTABLE_PREFIXES = ('renditions/',)
+MEDIA_PRIVATE_PREFIXES = ('uploads/',)
+# None, 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache/lighttpd)
+MEDIA_ACCEL_REDIRECT = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+
+#Content-addressed storage
+STORAGES = {
+    'default': {
+        'BACKEND': 'instagram_apps.uploads.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+MEDIA_CAS_EXCLUDED_PREFIXES = ('renditions/', 'uploads/')
+BLOB_ORPHAN_GRACE = 60 * 60
+
+
+#Detail cache
+DETAIL_CACHE_TIMEOUT = 60
+DETAIL_CACHE_LOCK_TIMEOUT = 5
+DETAIL_CACHE_LOCK_WAIT = 0.5
+
+
+#Likes
+LIKE_LOOKUP_MAX_IDS = 100
+
+
+#Search
+# None picks the backend for the database vendor (FTS5 on SQLite, tsvector on Postgres)
+SEARCH_BACKEND = None
+SEARCH_MAX_QUERY_TERMS = 8
+SEARCH_INDEX_BATCH_SIZE = 500
+SEARCH_ADMIN_MAX_RESULTS = 1000
+SEARCH_MAX_SCAN_BATCHES = 5
+
+
+#Tags
+TAG_BATCH_SIZE = 500
+TAG_TREND_BUCKET_SECONDS = 60 * 60
+TAG_TREND_RETENTION = 60 * 60 * 24 * 7
+TAG_TRENDING_WINDOW = 60 * 60 * 24
+TAG_TRENDING_LIMIT = 20
+TAG_TRENDING_CACHE_TIMEOUT = 60
@@ -1,17 +1,27 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
-from django.conf.urls.static import static
+from django.urls import path, re_path, include
 from django.conf import settings
 
+from instagram_apps.uploads.views import serve_media
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
 
-    # path('api/v1/', include('apis.follower_apis.urls')),
-    # path('api/v1/', include('apis.interaction_apis.urls')),
+    path('api/v1/', include('instagram_space.fallower_apis.urls')),
+    path('api/v1/', include('instagram_space.interaction_apis.urls')),
     path('api/v1/', include('instagram_space.post_apis.urls')),
+    path('api/v1/', include('instagram_space.profile_apis.urls')),
+    path('api/v1/', include('instagram_space.search_apis.urls')),
     path('api/v1/', include('instagram_space.story_apis.urls')),
+    path('api/v1/', include('instagram_space.tag_apis.urls')),
+    path('api/v1/', include('instagram_space.upload_apis.urls')),
     # path('api/v1/',include('apis.user_apis.urls') ),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+if getattr(settings, 'MEDIA_SERVE', True):
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+    ]
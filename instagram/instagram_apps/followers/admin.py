@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Follow
+from .models import Follow, FollowSuggestion
 
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('follower', 'following', 'created_at')
@@ -8,3 +8,12 @@ class FollowAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
 admin.site.register(Follow, FollowAdmin)
+
+
+class FollowSuggestionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'candidate', 'score', 'mutual_count', 'shared_followers_count')
+    search_fields = ('user__username', 'candidate__username')
+    raw_id_fields = ('user', 'candidate')
+    ordering = ('user', '-score')
+
+admin.site.register(FollowSuggestion, FollowSuggestionAdmin)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FallowersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'instagram_apps.followers'
+
+    def ready(self):
+        from . import signals
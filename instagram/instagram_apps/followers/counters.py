@@ -0,0 +1,56 @@
+from django.db import models
+from django.db.models.functions import Coalesce, Greatest
+
+from instagram_apps.users.models import CustomUser
+from .models import Follow
+
+
+def _shift(user_id, field, delta):
+    CustomUser.objects.filter(pk=user_id).update(
+        **{field: Greatest(models.F(field) + delta, 0)}
+    )
+
+
+def record_follow(follower_id, following_id):
+    _shift(following_id, 'followers_count', 1)
+    _shift(follower_id, 'followings_count', 1)
+
+
+def record_unfollow(follower_id, following_id):
+    _shift(following_id, 'followers_count', -1)
+    _shift(follower_id, 'followings_count', -1)
+
+
+def _count_of(field):
+    return Coalesce(models.Subquery(
+        Follow.objects.filter(**{field: models.OuterRef('pk')}).order_by().values(field)
+        .annotate(total=models.Count('id')).values('total')
+    ), 0)
+
+
+def drifted_users():
+    return CustomUser.objects.annotate(
+        actual_followers=_count_of('following'),
+        actual_followings=_count_of('follower'),
+    ).exclude(
+        followers_count=models.F('actual_followers'),
+        followings_count=models.F('actual_followings'),
+    )
+
+
+def reconcile_follow_counts(batch_size=1000, dry_run=False):
+    fixed = []
+    total = 0
+    rows = drifted_users().values_list('pk', 'actual_followers', 'actual_followings')
+    for pk, followers, followings in rows.iterator(chunk_size=batch_size):
+        fixed.append(CustomUser(pk=pk, followers_count=followers, followings_count=followings))
+        if len(fixed) >= batch_size:
+            total += _flush(fixed, dry_run)
+            fixed = []
+    return total + _flush(fixed, dry_run)
+
+
+def _flush(users, dry_run):
+    if users and not dry_run:
+        CustomUser.objects.bulk_update(users, ['followers_count', 'followings_count'])
+    return len(users)
@@ -0,0 +1,146 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+
+from instagram_apps.users.models import CustomUser
+from .models import Follow
+
+
+# Following sets are cached under a per-user version that is bumped on every follow and
+# unfollow, so with a shared cache backend every worker drops the old set at once, and a
+# reader that loaded the set before the change can only write it under the old version.
+
+def _version_key(user_id):
+    return f'follow-graph:version:{user_id}'
+
+
+def _following_version(user_id):
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(_version_key(user_id), version, timeout=None):
+            version = cache.get(_version_key(user_id), version)
+    return version
+
+
+def _following_key(user_id):
+    return f'follow-graph:following:{user_id}:{_following_version(user_id)}'
+
+
+def get_inline_limit():
+    return getattr(settings, 'FOLLOW_GRAPH_INLINE_LIMIT', 500)
+
+
+def load_following_ids(user_id):
+    key = _following_key(user_id)
+    following_ids = cache.get(key)
+    if following_ids is None:
+        following_ids = frozenset(
+            Follow.objects.filter(follower_id=user_id).values_list('following_id', flat=True)
+        )
+        cache.set(key, following_ids, timeout=getattr(settings, 'FOLLOW_GRAPH_CACHE_TIMEOUT', 300))
+    return following_ids
+
+
+def invalidate_following(user_id):
+    cache.set(_version_key(user_id), time.time_ns(), timeout=None)
+
+
+class FollowGraph:
+    def __init__(self, user):
+        self.user = user
+        self._following_ids = None
+
+    @property
+    def following_ids(self):
+        if self._following_ids is None:
+            if self.user.is_authenticated:
+                self._following_ids = load_following_ids(self.user.pk)
+            else:
+                self._following_ids = frozenset()
+        return self._following_ids
+
+    def is_following(self, user_id):
+        # Answered from the versioned following set, so checks over a page of owners cost
+        # one lookup at most; follow writes bump the version on every worker.
+        return user_id in self.following_ids
+
+    def can_view(self, owner):
+        if owner.pk == self.user.pk:
+            return True
+        if owner.profile_status == owner.OPEN_PROFILE:
+            return True
+        return self.is_following(owner.pk)
+
+    def following_filter(self, field='user'):
+        # Small following sets are inlined from the cached set; large ones stay a subquery
+        # on the follower index instead of an unbounded IN list.
+        if not self.user.is_authenticated:
+            return models.Q(**{f'{field}__in': []})
+        if self.user.followings_count > get_inline_limit():
+            return models.Q(**{f'{field}__in': Follow.objects.filter(follower_id=self.user.pk).values('following_id')})
+        return models.Q(**{f'{field}__in': self.following_ids})
+
+    def visible_owner_filter(self, prefix='user__'):
+        # Queryset counterpart of can_view() for the owner reached through `prefix`.
+        return (models.Q(**{f'{prefix}profile_status': CustomUser.OPEN_PROFILE})
+                | self.following_filter(f'{prefix}id')
+                | models.Q(**{f'{prefix}id': self.user.pk}))
+
+
+def get_follow_graph(request):
+    # One graph per request, so list endpoints resolve every object from the same set.
+    graph = getattr(request, '_follow_graph', None)
+    if graph is None or graph.user != request.user:
+        graph = FollowGraph(request.user)
+        request._follow_graph = graph
+    return graph
+
+
+# Relationship queries. Following sets are bounded and cached, so they are intersected
+# in memory. Follower sets can be huge, so they are never loaded: the SQL walks the
+# user's followings and probes the (follower, following) unique index once for each.
+
+def get_overlap_timeout():
+    return getattr(settings, 'FOLLOW_OVERLAP_CACHE_TIMEOUT', 60)
+
+
+def common_following_ids(user_id, other_id):
+    return load_following_ids(user_id) & load_following_ids(other_id)
+
+
+def followed_by_following(viewer_id, target_id, limit=3):
+    # Accounts the viewer follows that follow target: "followed by X, Y and N others".
+    # Keyed by the viewer's following version, so the viewer's unfollows retire it at once.
+    key = f'follow-graph:overlap:{viewer_id}:{_following_version(viewer_id)}:{target_id}:{limit}'
+    overlap = cache.get(key)
+    if overlap is None:
+        followers = Follow.objects.filter(
+            following_id=target_id,
+            follower_id__in=Follow.objects.filter(follower_id=viewer_id).values('following_id'),
+        )
+        sample = list(
+            CustomUser.objects.filter(pk__in=followers.values('follower_id'))
+            .order_by('-followers_count', 'pk').values('id', 'username')[:limit]
+        )
+        count = len(sample) if len(sample) < limit else followers.count()
+        overlap = {'count': count, 'users': sample}
+        cache.set(key, overlap, timeout=get_overlap_timeout())
+    return overlap
+
+
+def relationship(viewer_id, target_id):
+    if viewer_id == target_id:
+        return {'is_self': True}
+    following = target_id in load_following_ids(viewer_id)
+    followed_by = viewer_id in load_following_ids(target_id)
+    return {
+        'is_self': False,
+        'following': following,
+        'followed_by': followed_by,
+        'mutual': following and followed_by,
+        'common_followings_count': len(common_following_ids(viewer_id, target_id)),
+        'followed_by_following': followed_by_following(viewer_id, target_id),
+    }
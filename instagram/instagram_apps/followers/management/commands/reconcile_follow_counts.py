@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from instagram_apps.followers.counters import reconcile_follow_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute follower/following counters that drifted from the Follow table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many users drifted')
+
+    def handle(self, *args, **options):
+        total = reconcile_follow_counts(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        action = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{action} {total} users with drifted follow counters'))
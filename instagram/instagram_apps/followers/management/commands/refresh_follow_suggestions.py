@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from instagram_apps.followers.suggestions import refresh_all, refresh_dirty
+
+
+class Command(BaseCommand):
+    help = 'Precompute follow suggestions from friends-of-friends and shared followers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every user instead of only those queued by follow changes')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-batches', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['all']:
+            refreshed = refresh_all(batch_size=options['batch_size'])
+        else:
+            refreshed = refresh_dirty(batch_size=options['batch_size'], max_batches=options['max_batches'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed follow suggestions for {refreshed} users'))
@@ -10,6 +10,10 @@ class Follow(models.Model):
 
     class Meta:
         unique_together = ['follower', 'following']
+        indexes = [
+            models.Index(fields=['following', 'created_at'], name='follow_following_created_idx'),
+            models.Index(fields=['follower', 'created_at'], name='follow_follower_created_idx'),
+        ]
     
     def clean(self):
         if self.follower == self.following:
@@ -23,3 +27,28 @@ class Follow(models.Model):
         return f'{self.follower.username} follows {self.following.username}'
     
 
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(CustomUser, related_name='follow_suggestions', on_delete=models.CASCADE)
+    candidate = models.ForeignKey(CustomUser, related_name='+', on_delete=models.CASCADE)
+    score = models.FloatField()
+    mutual_count = models.PositiveIntegerField(default=0)
+    shared_followers_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'candidate'], name='unique_user_suggestion'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-score', '-id'], name='suggestion_user_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.candidate.username} suggested to {self.user.username} ({self.score})'
+
+
+class SuggestionRefresh(models.Model):
+    # Users whose suggestions are stale since a follow change; drained by refresh_follow_suggestions.
+    user = models.OneToOneField(CustomUser, related_name='+', on_delete=models.CASCADE)
+    queued_at = models.DateTimeField(auto_now_add=True)
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
-from .models import Follow
+from .models import Follow, FollowSuggestion
+from instagram_apps.users.serializers import UserSummarySerializer, UserProfileSerializer
+from instagram_space.utils.fieldsets import SparseFieldsetMixin
 
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -12,3 +14,30 @@ class FollowSerializer(serializers.ModelSerializer):
         if data['follower'] == data['following']:
             raise serializers.ValidationError('You cannot fallow yourself')
         return data
+
+
+class FollowerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    user = UserSummarySerializer(source='follower', read_only=True)
+
+    class Meta:
+        model = Follow
+        fields = ('id', 'user', 'created_at')
+        expandable_fields = {'user': UserProfileSerializer}
+
+
+class FollowingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    user = UserSummarySerializer(source='following', read_only=True)
+
+    class Meta:
+        model = Follow
+        fields = ('id', 'user', 'created_at')
+        expandable_fields = {'user': UserProfileSerializer}
+
+
+class FollowSuggestionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    user = UserSummarySerializer(source='candidate', read_only=True)
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ('id', 'user', 'score', 'mutual_count', 'shared_followers_count')
+        expandable_fields = {'user': UserProfileSerializer}
@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Follow, FollowSuggestion
+from . import counters, suggestions
+from .graph import invalidate_following
+from instagram_apps.posts import timeline
+
+
+@receiver(post_save, sender=Follow)
+def update_counters_on_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.record_follow(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def update_counters_on_unfollow(sender, instance, **kwargs):
+    counters.record_unfollow(instance.follower_id, instance.following_id)
+
+
+@receiver(post_save, sender=Follow)
+def invalidate_caches_on_follow(sender, instance, created, **kwargs):
+    transaction.on_commit(lambda: invalidate_following(instance.follower_id))
+    transaction.on_commit(lambda: timeline.invalidate_celebrities(instance.follower_id))
+
+
+@receiver(post_delete, sender=Follow)
+def invalidate_caches_on_unfollow(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_following(instance.follower_id))
+    transaction.on_commit(lambda: timeline.invalidate_celebrities(instance.follower_id))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline_on_follow(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: timeline.backfill_follow(instance.follower_id, instance.following_id))
+
+
+@receiver(post_delete, sender=Follow)
+def clean_timeline_on_unfollow(sender, instance, **kwargs):
+    transaction.on_commit(lambda: timeline.remove_follow(instance.follower_id, instance.following_id))
+
+
+@receiver(post_save, sender=Follow)
+def queue_suggestions_on_follow(sender, instance, created, **kwargs):
+    if created:
+        # Someone just followed is never a useful suggestion, even before the next refresh.
+        FollowSuggestion.objects.filter(user_id=instance.follower_id, candidate_id=instance.following_id).delete()
+        suggestions.mark_follow_dirty(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def queue_suggestions_on_unfollow(sender, instance, **kwargs):
+    suggestions.mark_follow_dirty(instance.follower_id, instance.following_id)
@@ -0,0 +1,107 @@
+import heapq
+
+from django.conf import settings
+from django.db import models, transaction
+
+from instagram_apps.users.models import CustomUser
+from .models import Follow, FollowSuggestion, SuggestionRefresh
+
+
+# "People you may know", precomputed per user. A candidate scores for every account
+# the user follows that follows it (friends of friends) and for every recent follower
+# of the user that also follows it (shared followers). Only the top candidates are kept.
+
+
+def get_suggestion_limit():
+    return getattr(settings, 'SUGGESTION_LIMIT', 100)
+
+
+def get_follower_sample_size():
+    return getattr(settings, 'SUGGESTION_FOLLOWER_SAMPLE', 1000)
+
+
+def get_dirty_follower_sample_size():
+    return getattr(settings, 'SUGGESTION_DIRTY_FOLLOWER_SAMPLE', 1000)
+
+
+def get_weights():
+    return (getattr(settings, 'SUGGESTION_MUTUAL_WEIGHT', 1.0),
+            getattr(settings, 'SUGGESTION_SHARED_FOLLOWER_WEIGHT', 0.5))
+
+
+def _following_counts(follower_ids):
+    return dict(
+        Follow.objects.filter(follower_id__in=follower_ids).order_by().values('following_id')
+        .annotate(total=models.Count('id')).values_list('following_id', 'total')
+    )
+
+
+def score_candidates(user_id):
+    followings = Follow.objects.filter(follower_id=user_id).values('following_id')
+    mutual = _following_counts(followings)
+    # Follower sets of big accounts are unbounded, so only the most recent followers are sampled.
+    recent_followers = list(
+        Follow.objects.filter(following_id=user_id).order_by('-created_at')
+        .values_list('follower_id', flat=True)[:get_follower_sample_size()]
+    )
+    shared = _following_counts(recent_followers) if recent_followers else {}
+
+    excluded = set(followings.values_list('following_id', flat=True))
+    excluded.add(user_id)
+    mutual_weight, shared_weight = get_weights()
+    scored = (
+        (mutual.get(candidate, 0) * mutual_weight + shared.get(candidate, 0) * shared_weight,
+         candidate, mutual.get(candidate, 0), shared.get(candidate, 0))
+        for candidate in mutual.keys() | shared.keys() if candidate not in excluded
+    )
+    return heapq.nlargest(get_suggestion_limit(), scored)
+
+
+def refresh_suggestions(user_id):
+    suggestions = [
+        FollowSuggestion(user_id=user_id, candidate_id=candidate, score=score,
+                         mutual_count=mutual_count, shared_followers_count=shared_count)
+        for score, candidate, mutual_count, shared_count in score_candidates(user_id)
+    ]
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id=user_id).delete()
+        FollowSuggestion.objects.bulk_create(suggestions)
+    return len(suggestions)
+
+
+def mark_dirty(user_ids):
+    SuggestionRefresh.objects.bulk_create([SuggestionRefresh(user_id=pk) for pk in user_ids], ignore_conflicts=True)
+
+
+def mark_follow_dirty(follower_id, following_id):
+    # A follow changes the friends-of-friends of everyone following the follower too;
+    # the most recent of them are queued, and refresh_all catches up with the rest.
+    followers = list(
+        Follow.objects.filter(following_id=follower_id).order_by('-created_at')
+        .values_list('follower_id', flat=True)[:get_dirty_follower_sample_size()]
+    )
+    mark_dirty([follower_id, following_id, *followers])
+
+
+def refresh_dirty(batch_size=100, max_batches=None):
+    refreshed = batches = 0
+    while max_batches is None or batches < max_batches:
+        user_ids = list(SuggestionRefresh.objects.order_by('queued_at').values_list('user_id', flat=True)[:batch_size])
+        if not user_ids:
+            break
+        for user_id in user_ids:
+            # Claiming by delete first means a follow change during the refresh queues the user again.
+            if SuggestionRefresh.objects.filter(user_id=user_id).delete()[0]:
+                refresh_suggestions(user_id)
+                refreshed += 1
+        batches += 1
+    return refreshed
+
+
+def refresh_all(batch_size=1000):
+    refreshed = 0
+    for user_id in CustomUser.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size):
+        refresh_suggestions(user_id)
+        refreshed += 1
+    SuggestionRefresh.objects.all().delete()
+    return refreshed
@@ -1,9 +1,24 @@
+from unittest import mock
 from django.test import TestCase
 from django.core.exceptions import ValidationError
 from instagram_apps.users.models import CustomUser
 from instagram_apps.posts.models import Post
 from instagram_apps.stories.models import Story
 from instagram_apps.interactions.models import Comment, Like  
+from instagram_apps.followers.models import Follow, FollowSuggestion, SuggestionRefresh
+from instagram_apps.followers.serializers import FollowSerializer
+from instagram_apps.followers.suggestions import refresh_dirty, refresh_suggestions
+from instagram_apps.followers.counters import reconcile_follow_counts
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import RequestFactory
+from instagram_apps.followers.graph import FollowGraph, get_follow_graph, load_following_ids
+from instagram_apps.followers.graph import common_following_ids, followed_by_following, relationship
+from instagram_space.utils.permissions import IsOwnerOrOpenProfileOrFollowerPermission
+from io import StringIO
+from django.urls import reverse
+from rest_framework.test import APIClient
+from instagram_space.utils.testing import QueryCountAssertionsMixin
 
 class CommentLikeModelTests(TestCase):
     def setUp(self):
@@ -112,3 +127,336 @@ class CommentLikeModelTests(TestCase):
         Like.objects.create(user=self.user, post=self.post)
         Like.objects.create(user=self.user, comment=comment)
         self.assertEqual(Like.objects.count(), 2)
+
+
+class FollowCounterTests(TestCase):
+    def setUp(self):
+        self.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pass')
+        self.bob = CustomUser.objects.create_user(username='bob', email='bob@example.com', password='pass')
+
+    def test_follow_increments_counters(self):
+        Follow.objects.create(follower=self.alice, following=self.bob)
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.followers_count, 1)
+        self.assertEqual(self.alice.followings_count, 1)
+
+    def test_unfollow_decrements_counters(self):
+        follow = Follow.objects.create(follower=self.alice, following=self.bob)
+        follow.delete()
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.followers_count, 0)
+
+    def test_counters_never_go_negative(self):
+        follow = Follow.objects.create(follower=self.alice, following=self.bob)
+        CustomUser.objects.filter(pk=self.bob.pk).update(followers_count=0)
+        follow.delete()
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.followers_count, 0)
+
+    def test_reading_counters_does_not_query_follow_table(self):
+        Follow.objects.create(follower=self.alice, following=self.bob)
+        bob = CustomUser.objects.get(pk=self.bob.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(bob.followers_count, 1)
+
+    def test_full_save_keeps_concurrent_counter_updates(self):
+        bob = CustomUser.objects.get(pk=self.bob.pk)
+        Follow.objects.create(follower=self.alice, following=self.bob)
+        bob.bio = 'Edited elsewhere'
+        bob.set_password('new-pass')
+        bob.save()
+        bob.refresh_from_db()
+        self.assertEqual(bob.followers_count, 1)
+        self.assertEqual(bob.bio, 'Edited elsewhere')
+        self.assertTrue(bob.check_password('new-pass'))
+
+    def test_reconcile_fixes_drift(self):
+        Follow.objects.create(follower=self.alice, following=self.bob)
+        CustomUser.objects.filter(pk=self.bob.pk).update(followers_count=7)
+        self.assertEqual(reconcile_follow_counts(), 1)
+        self.bob.refresh_from_db()
+        self.assertEqual(self.bob.followers_count, 1)
+        self.assertEqual(reconcile_follow_counts(), 0)
+
+    def test_reconcile_command_dry_run(self):
+        CustomUser.objects.filter(pk=self.alice.pk).update(followings_count=3)
+        out = StringIO()
+        call_command('reconcile_follow_counts', '--dry-run', stdout=out)
+        self.assertIn('Found 1 users', out.getvalue())
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.followings_count, 3)
+
+
+class FollowGraphTests(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = CustomUser.objects.create_user(username='viewer', email='viewer@example.com', password='pass')
+        self.owners = [
+            CustomUser.objects.create_user(username=f'private{i}', email=f'private{i}@example.com', password='pass',
+                                           profile_status=CustomUser.PRIVATE_PROFILE)
+            for i in range(3)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.viewer, following=self.owners[0])
+            Follow.objects.create(follower=self.viewer, following=self.owners[1])
+        self.posts = [Post.objects.create(user=owner, caption='Private post') for owner in self.owners]
+
+    def make_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.viewer
+        return request
+
+    def test_permission_checks_do_not_query_per_owner(self):
+        owners = self.owners + [
+            CustomUser.objects.create_user(username=f'extra{i}', email=f'extra{i}@example.com', password='pass',
+                                           profile_status=CustomUser.PRIVATE_PROFILE)
+            for i in range(5)
+        ]
+        posts = list(Post.objects.select_related('user').filter(id__in=[p.id for p in self.posts]).order_by('id'))
+        posts += [Post(user=owner, caption='Private post') for owner in owners[3:]]
+        permission = IsOwnerOrOpenProfileOrFollowerPermission()
+
+        def check(page):
+            cache.clear()
+            request = self.make_request()
+            return [permission.has_object_permission(request, None, post) for post in page]
+
+        self.assertEqual(self.count_queries(lambda: check(posts[:2])), self.count_queries(lambda: check(posts)))
+        self.assertEqual(check(posts), [True, True] + [False] * 6)
+
+    def test_following_set_is_cached_across_requests(self):
+        load_following_ids(self.viewer.pk)
+        with self.assertNumQueries(0):
+            self.assertIn(self.owners[0].pk, get_follow_graph(self.make_request()).following_ids)
+
+    def test_cache_is_invalidated_on_follow_and_unfollow(self):
+        self.assertNotIn(self.owners[2].pk, FollowGraph(self.viewer).following_ids)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.viewer, following=self.owners[2])
+        self.assertIn(self.owners[2].pk, FollowGraph(self.viewer).following_ids)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.filter(follower=self.viewer, following=self.owners[0]).delete()
+        self.assertNotIn(self.owners[0].pk, FollowGraph(self.viewer).following_ids)
+
+    def test_large_following_sets_filter_with_a_subquery(self):
+        self.viewer.refresh_from_db()
+        with self.settings(FOLLOW_GRAPH_INLINE_LIMIT=1):
+            query = str(Post.objects.filter(FollowGraph(self.viewer).visible_owner_filter()).query)
+        self.assertIn('followers_follow', query)
+        with self.settings(FOLLOW_GRAPH_INLINE_LIMIT=10):
+            query = str(Post.objects.filter(FollowGraph(self.viewer).visible_owner_filter()).query)
+        self.assertNotIn('followers_follow', query)
+
+    def test_non_safe_methods_are_owner_only(self):
+        request = RequestFactory().delete('/')
+        request.user = self.viewer
+        permission = IsOwnerOrOpenProfileOrFollowerPermission()
+        self.assertFalse(permission.has_object_permission(request, None, self.posts[0]))
+
+
+class FollowAPITests(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='apifollower', email='af@example.com', password='pass')
+        self.star = CustomUser.objects.create_user(username='star', email='star@example.com', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.follow_url = reverse('fallower_apis:follow', args=[self.star.id])
+
+    def follow(self, url=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url or self.follow_url)
+
+    def test_follow_and_unfollow_are_idempotent(self):
+        self.assertEqual(self.follow().status_code, 201)
+        self.assertEqual(self.follow().status_code, 200)
+        self.star.refresh_from_db()
+        self.assertEqual(self.star.followers_count, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(self.follow_url).status_code, 204)
+            self.assertEqual(self.client.delete(self.follow_url).status_code, 204)
+        self.star.refresh_from_db()
+        self.assertEqual(self.star.followers_count, 0)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_concurrent_follow_after_validation_is_idempotent(self):
+        Follow.objects.create(follower=self.user, following=self.star)
+        # Both pre-checks miss the existing row, as if a concurrent request inserted it after validation.
+        with mock.patch.object(FollowGraph, 'is_following', return_value=False), \
+                mock.patch.object(FollowSerializer, 'get_validators', return_value=[]), \
+                mock.patch.object(Follow, 'validate_unique'):
+            response = self.follow()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Follow.objects.filter(follower=self.user, following=self.star).count(), 1)
+
+    def test_cannot_follow_yourself(self):
+        self.assertEqual(self.follow(reverse('fallower_apis:follow', args=[self.user.id])).status_code, 400)
+
+    def test_follower_list_pages_newest_first(self):
+        fans = [CustomUser.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com', password='pass')
+                for i in range(5)]
+        for fan in fans:
+            Follow.objects.create(follower=fan, following=self.star)
+        url = reverse('fallower_apis:followers', args=[self.star.id])
+        first = self.client.get(url, {'page_size': 3}).data
+        self.assertEqual([row['user']['username'] for row in first['results']], ['fan4', 'fan3', 'fan2'])
+        second = self.client.get(first['next']).data
+        self.assertEqual([row['user']['username'] for row in second['results']], ['fan1', 'fan0'])
+        self.assertIsNone(second['next'])
+        self.assertQueryCountIndependentOfPageSize(url, page_sizes=(1, 5))
+
+    def test_following_list(self):
+        self.follow()
+        response = self.client.get(reverse('fallower_apis:following', args=[self.user.id]))
+        self.assertEqual([row['user']['username'] for row in response.data['results']], ['star'])
+
+    def test_private_lists_require_follow(self):
+        self.star.profile_status = CustomUser.PRIVATE_PROFILE
+        self.star.save()
+        url = reverse('fallower_apis:followers', args=[self.star.id])
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.follow()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class GraphQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer, self.target, self.a, self.b, self.c = [
+            CustomUser.objects.create_user(username=name, email=f'{name}@example.com', password='pass')
+            for name in ('viewer', 'target', 'alice', 'bob', 'carol')
+        ]
+        for follower, following in ((self.viewer, self.a), (self.viewer, self.b), (self.viewer, self.c),
+                                    (self.a, self.target), (self.b, self.target), (self.c, self.viewer),
+                                    (self.target, self.b), (self.target, self.viewer)):
+            Follow.objects.create(follower=follower, following=following)
+
+    def test_common_followings(self):
+        self.assertEqual(common_following_ids(self.viewer.pk, self.target.pk), {self.b.pk})
+
+    def test_followed_by_following(self):
+        CustomUser.objects.filter(pk=self.b.pk).update(followers_count=10)
+        overlap = followed_by_following(self.viewer.pk, self.target.pk, limit=1)
+        self.assertEqual(overlap['count'], 2)
+        self.assertEqual([user['username'] for user in overlap['users']], ['bob'])
+
+    def test_followed_by_following_is_retired_on_unfollow(self):
+        self.assertEqual(followed_by_following(self.viewer.pk, self.target.pk)['count'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.filter(follower=self.viewer, following=self.a).delete()
+        self.assertEqual(followed_by_following(self.viewer.pk, self.target.pk)['count'], 1)
+
+    def test_relationship(self):
+        info = relationship(self.viewer.pk, self.target.pk)
+        self.assertEqual((info['following'], info['followed_by'], info['mutual']), (False, True, False))
+        self.assertEqual(info['common_followings_count'], 1)
+        self.assertEqual(info['followed_by_following']['count'], 2)
+        self.assertTrue(relationship(self.viewer.pk, self.viewer.pk)['is_self'])
+
+    def test_profile_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(user=self.viewer)
+        response = client.get(reverse('profile_apis:profile', args=[self.target.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], 'target')
+        self.assertEqual(response.data['relationship']['followed_by_following']['count'], 2)
+        for field in ('email', 'password', 'is_staff', 'is_superuser', 'groups', 'user_permissions', 'last_login'):
+            self.assertNotIn(field, response.data)
+        self.assertIn('bio', response.data)
+
+    def test_private_profile_endpoint_shows_summary_to_non_followers(self):
+        self.target.profile_status = CustomUser.PRIVATE_PROFILE
+        self.target.save()
+        client = APIClient()
+        client.force_authenticate(user=self.viewer)
+        response = client.get(reverse('profile_apis:profile', args=[self.target.pk]))
+        self.assertEqual(set(response.data), {'id', 'username', 'profile_picture', 'profile_status', 'relationship'})
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.viewer, following=self.target)
+        response = client.get(reverse('profile_apis:profile', args=[self.target.pk]))
+        self.assertIn('followers_count', response.data)
+
+
+class FollowSuggestionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer, self.target, self.a, self.b, self.c, self.d = [
+            CustomUser.objects.create_user(username=name, email=f'{name}@example.com', password='pass')
+            for name in ('viewer', 'target', 'alice', 'bob', 'carol', 'dave')
+        ]
+        for follower, following in ((self.viewer, self.a), (self.viewer, self.b), (self.viewer, self.c),
+                                    (self.a, self.target), (self.b, self.target), (self.c, self.viewer),
+                                    (self.c, self.d), (self.target, self.viewer), (self.target, self.d)):
+            Follow.objects.create(follower=follower, following=following)
+
+    def suggestions(self, user):
+        return {row.candidate.username: (row.score, row.mutual_count, row.shared_followers_count)
+                for row in FollowSuggestion.objects.filter(user=user).select_related('candidate')}
+
+    def test_scores_friends_of_friends_and_shared_followers(self):
+        refresh_suggestions(self.viewer.pk)
+        # target is followed by alice and bob; dave by carol, and by carol and target who follow viewer.
+        self.assertEqual(self.suggestions(self.viewer), {'target': (2.0, 2, 0), 'dave': (2.0, 1, 2)})
+
+    def test_refresh_replaces_previous_rows(self):
+        refresh_suggestions(self.viewer.pk)
+        Follow.objects.filter(follower=self.c, following=self.d).delete()
+        Follow.objects.filter(follower=self.target, following=self.d).delete()
+        refresh_suggestions(self.viewer.pk)
+        self.assertEqual(set(self.suggestions(self.viewer)), {'target'})
+
+    def test_follow_changes_queue_incremental_refresh(self):
+        SuggestionRefresh.objects.all().delete()
+        refresh_suggestions(self.viewer.pk)
+        Follow.objects.create(follower=self.viewer, following=self.target)
+        self.assertNotIn('target', self.suggestions(self.viewer))
+        # carol and target follow viewer, so their friends of friends changed as well.
+        self.assertEqual(set(SuggestionRefresh.objects.values_list('user_id', flat=True)),
+                         {self.viewer.pk, self.target.pk, self.c.pk})
+        self.assertEqual(refresh_dirty(), 3)
+        self.assertFalse(SuggestionRefresh.objects.exists())
+        self.assertEqual(set(self.suggestions(self.viewer)), {'dave'})
+
+    def test_followers_of_the_follower_are_refreshed(self):
+        c, a, b = [CustomUser.objects.create_user(username=name, email=f'{name}@example.com', password='pass')
+                   for name in ('c', 'a', 'b')]
+        Follow.objects.create(follower=c, following=a)
+        refresh_dirty()
+        Follow.objects.create(follower=a, following=b)
+        refresh_dirty()
+        self.assertIn('b', self.suggestions(c))
+
+    def test_dirty_follower_sample_is_capped(self):
+        SuggestionRefresh.objects.all().delete()
+        with self.settings(SUGGESTION_DIRTY_FOLLOWER_SAMPLE=1):
+            Follow.objects.create(follower=self.viewer, following=self.d)
+        # Of viewer's followers (carol, target) only the most recent one is queued.
+        self.assertEqual(set(SuggestionRefresh.objects.values_list('user_id', flat=True)),
+                         {self.viewer.pk, self.d.pk, self.target.pk})
+
+    def test_command_refreshes_all_users(self):
+        out = StringIO()
+        call_command('refresh_follow_suggestions', '--all', stdout=out)
+        self.assertIn('Refreshed follow suggestions for 6 users', out.getvalue())
+        self.assertFalse(SuggestionRefresh.objects.exists())
+        self.assertEqual(set(self.suggestions(self.viewer)), {'target', 'dave'})
+
+    def test_suggestion_endpoint_pages_by_score(self):
+        refresh_suggestions(self.viewer.pk)
+        FollowSuggestion.objects.filter(user=self.viewer, candidate=self.d).update(score=5)
+        client = APIClient()
+        client.force_authenticate(user=self.viewer)
+        url = reverse('fallower_apis:suggestions')
+        first = client.get(url, {'page_size': 1}).data
+        self.assertEqual([row['user']['username'] for row in first['results']], ['dave'])
+        second = client.get(first['next']).data
+        self.assertEqual([row['user']['username'] for row in second['results']], ['target'])
+        self.assertIsNone(second['next'])
+
+        # Rows left over from before a follow are hidden until the next refresh.
+        FollowSuggestion.objects.filter(user=self.viewer, candidate=self.d).delete()
+        FollowSuggestion.objects.create(user=self.viewer, candidate=self.a, score=9)
+        response = client.get(url)
+        self.assertEqual([row['user']['username'] for row in response.data['results']], ['target'])
+
@@ -1,9 +1,12 @@
 from django.contrib import admin
 from .models import Comment, Like
+from instagram_apps.search.admin import IndexedSearchMixin
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('user', 'text', 'created_at', 'post', 'story')
     search_fields = ('user__username', 'text', 'post__caption', 'story__caption')
+    search_kind = 'comment'
+    exact_search_fields = ('user__username',)
     list_filter = ('created_at', 'user', 'post', 'story')
     ordering = ('-created_at',)
 
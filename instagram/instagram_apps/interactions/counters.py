@@ -0,0 +1,181 @@
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, models, transaction
+from django.db.models.functions import Coalesce, Greatest
+
+from instagram_apps.posts.models import Post
+from instagram_apps.stories.models import Story
+from instagram_space.utils.detail_cache import invalidate_detail
+from .models import Comment, Like
+
+
+logger = logging.getLogger(__name__)
+
+
+# Write-behind buffer for hot counter columns. Increments are summed per row in
+# process memory and written as one UPDATE ... SET field = field + n per (model, n).
+class CounterBuffer:
+    instances = []
+
+    def __init__(self, field, settings_prefix, flush_threshold=100, flush_interval=5, on_flush=None):
+        self.field = field
+        self.settings_prefix = settings_prefix
+        self.on_flush = on_flush
+        self.default_flush_threshold = flush_threshold
+        self.default_flush_interval = flush_interval
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._wake = threading.Event()
+        self._flusher = None
+        CounterBuffer.instances.append(self)
+        atexit.register(self.flush)
+
+    @property
+    def flush_threshold(self):
+        return getattr(settings, f'{self.settings_prefix}_FLUSH_THRESHOLD', self.default_flush_threshold)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, f'{self.settings_prefix}_FLUSH_INTERVAL', self.default_flush_interval)
+
+    def increment(self, model, pk, delta=1):
+        with self._lock:
+            self._pending[(model, pk)] += delta
+            due = (len(self._pending) >= self.flush_threshold
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.request_flush()
+
+    def request_flush(self):
+        # The UPDATE runs on the buffer's flusher thread, so the request that makes the
+        # buffer due stays write-free.
+        if not getattr(settings, 'COUNTER_BACKGROUND_FLUSH', True):
+            self.flush()
+            return
+        self.ensure_flusher()
+        self._wake.set()
+
+    def pending(self, model, pk):
+        with self._lock:
+            return self._pending.get((model, pk), 0)
+
+    def discard(self):
+        with self._lock:
+            self._pending = defaultdict(int)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        batches = defaultdict(list)
+        for (model, pk), delta in pending.items():
+            if delta:
+                batches[(model, delta)].append(pk)
+
+        try:
+            with transaction.atomic():
+                for (model, delta), pks in batches.items():
+                    model.objects.filter(pk__in=pks).update(
+                        **{self.field: Greatest(models.F(self.field) + delta, 0)}
+                    )
+        except Exception:
+            with self._lock:
+                for key, delta in pending.items():
+                    self._pending[key] += delta
+            raise
+        if self.on_flush is not None:
+            self.on_flush([key for key, delta in pending.items() if delta])
+        return sum(len(pks) for pks in batches.values())
+
+    def ensure_flusher(self):
+        # Started lazily, so forked workers each get their own thread.
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return self._flusher
+            self._flusher = threading.Thread(target=self._run_flusher, name=f'{self.field}-counter-flush', daemon=True)
+            self._flusher.start()
+            return self._flusher
+
+    def _run_flusher(self):
+        # Flushes when woken by a due buffer, and every flush_interval to cover idle periods.
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing %s counters failed', self.field)
+            finally:
+                close_old_connections()
+
+
+LIKE_COUNTER_MODELS = ((Post, 'post'), (Story, 'story'), (Comment, 'comment'))
+
+# Comments have no cached detail payload.
+DETAIL_CACHED_MODELS = (Post, Story)
+
+
+def invalidate_like_details(keys):
+    for model, pk in keys:
+        if model in DETAIL_CACHED_MODELS:
+            invalidate_detail(model._meta.model_name, pk)
+
+
+like_counter = CounterBuffer('like_count', 'LIKE_COUNTER', on_flush=invalidate_like_details)
+
+view_counter = CounterBuffer('views', 'VIEW_COUNTER')
+
+
+def like_targets(like):
+    for model, relation in LIKE_COUNTER_MODELS:
+        pk = getattr(like, f'{relation}_id')
+        if pk is not None:
+            yield model, pk
+
+
+def record_like(like, delta):
+    # Like rows saved through the ORM. Cached details are retired now for is_liked and
+    # again when the buffered count reaches the row.
+    for model, pk in like_targets(like):
+        like_counter.increment(model, pk, delta)
+        invalidate_like_details([(model, pk)])
+
+
+def record_view(instance, viewer):
+    return record_view_by_id(type(instance), instance.pk, viewer)
+
+
+def record_view_by_id(model, pk, viewer):
+    # Each viewer is counted at most once per window and object.
+    window = getattr(settings, 'VIEW_DEDUPE_WINDOW', 3600)
+    viewer_key = viewer.pk if viewer.is_authenticated else 'anonymous'
+    key = f'viewed:{model._meta.label_lower}:{pk}:{viewer_key}'
+    if cache.add(key, 1, timeout=window):
+        view_counter.increment(model, pk)
+        return True
+    return False
+
+
+def reconcile_like_counts(model, relation, batch_size=1000, dry_run=False):
+    like_counter.flush()
+    actual = Coalesce(models.Subquery(
+        Like.objects.filter(**{relation: models.OuterRef('pk')}).order_by().values(relation)
+        .annotate(total=models.Count('id')).values('total')
+    ), 0)
+    drifted = model.objects.annotate(actual_likes=actual).exclude(like_count=models.F('actual_likes'))
+
+    fixed = [model(pk=pk, like_count=total)
+             for pk, total in drifted.values_list('pk', 'actual_likes').iterator(chunk_size=batch_size)]
+    if fixed and not dry_run:
+        model.objects.bulk_update(fixed, ['like_count'], batch_size=batch_size)
+    return len(fixed)
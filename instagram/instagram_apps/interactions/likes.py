@@ -0,0 +1,83 @@
+from django.db import connection, models, transaction
+from django.db.models.constants import OnConflict
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Like
+from .counters import LIKE_COUNTER_MODELS, invalidate_like_details
+
+
+# Like/unlike for API traffic. The unique constraints decide whether a like is new,
+# so there is no check-then-insert and no per-insert full_clean() queries. The raw
+# statements send no model signals, so the target's like_count is updated here, in
+# the same transaction, instead of through the buffered counter, and a committed
+# like can never be lost with an unflushed buffer.
+
+LIKE_MODELS = {relation: model for model, relation in LIKE_COUNTER_MODELS}
+
+
+def _column(name):
+    return connection.ops.quote_name(Like._meta.get_field(name).column)
+
+
+def _insert_like(user_id, relation, target_id):
+    created_at = Like._meta.get_field('created_at').get_db_prep_value(timezone.now(), connection)
+    columns = ', '.join(_column(name) for name in ('user', relation, 'created_at'))
+    suffix = connection.ops.on_conflict_suffix_sql([], OnConflict.IGNORE, None, None)
+    sql = (f'{connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)} '
+           f'{connection.ops.quote_name(Like._meta.db_table)} ({columns}) VALUES (%s, %s, %s) {suffix}')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, target_id, created_at])
+        return cursor.rowcount == 1
+
+
+def _delete_like(user_id, relation, target_id):
+    sql = (f'DELETE FROM {connection.ops.quote_name(Like._meta.db_table)} '
+           f'WHERE {_column("user")} = %s AND {_column(relation)} = %s')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, target_id])
+        return cursor.rowcount > 0
+
+
+def _adjust_count(relation, target_id, delta):
+    model = LIKE_MODELS[relation]
+    model.objects.filter(pk=target_id).update(like_count=Greatest(models.F('like_count') + delta, 0))
+    transaction.on_commit(lambda: invalidate_like_details([(model, target_id)]))
+
+
+def like(user, relation, target_id):
+    with transaction.atomic():
+        created = _insert_like(user.pk, relation, target_id)
+        if created:
+            _adjust_count(relation, target_id, 1)
+    return created
+
+
+def unlike(user, relation, target_id):
+    with transaction.atomic():
+        removed = _delete_like(user.pk, relation, target_id)
+        if removed:
+            _adjust_count(relation, target_id, -1)
+    return removed
+
+
+def liked_ids(user, relation, targets):
+    # One query answers "which of these has the viewer liked" for a whole page.
+    ids = [getattr(target, 'pk', target) for target in targets]
+    if not ids or not user.is_authenticated:
+        return set()
+    return set(Like.objects.filter(user=user, **{f'{relation}_id__in': ids})
+               .values_list(f'{relation}_id', flat=True))
+
+
+def like_counts(relation, targets):
+    # Exact counts for a page, read from the Like rows instead of the write-behind like_count.
+    ids = [getattr(target, 'pk', target) for target in targets]
+    if not ids:
+        return {}
+    return dict(Like.objects.filter(**{f'{relation}_id__in': ids}).order_by().values(relation)
+                .annotate(total=models.Count('id')).values_list(relation, 'total'))
+
+
+def has_liked(user, relation, target_id):
+    return target_id in liked_ids(user, relation, [target_id])
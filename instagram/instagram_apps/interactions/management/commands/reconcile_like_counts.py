@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from instagram_apps.interactions.counters import LIKE_COUNTER_MODELS, reconcile_like_counts
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered like counters and fix like_count values that drifted from Like rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows drifted')
+
+    def handle(self, *args, **options):
+        action = 'Found' if options['dry_run'] else 'Fixed'
+        for model, relation in LIKE_COUNTER_MODELS:
+            total = reconcile_like_counts(model, relation, batch_size=options['batch_size'], dry_run=options['dry_run'])
+            self.stdout.write(self.style.SUCCESS(f'{action} {total} {model._meta.verbose_name_plural} with drifted like counts'))
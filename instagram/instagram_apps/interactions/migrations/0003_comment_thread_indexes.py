@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 15:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactions', '0002_like_count'),
+        ('posts', '0005_post_renditions'),
+        ('stories', '0005_story_renditions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['story', 'created_at', 'id'], name='comment_story_created_idx'),
+        ),
+    ]
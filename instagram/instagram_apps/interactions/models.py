@@ -13,6 +13,13 @@ class Comment(models.Model):
 
     text = models.TextField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
+    like_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+            models.Index(fields=['story', 'created_at', 'id'], name='comment_story_created_idx'),
+        ]
 
     def clean(self):
         if not self.post and not self.story:
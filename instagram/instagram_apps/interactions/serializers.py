@@ -1,20 +1,29 @@
 from rest_framework import serializers
 
 from .models import Comment, Like
-from instagram_apps.users.serializers import CustomUserSerializer
+from instagram_apps.users.serializers import UserSummarySerializer, UserProfileSerializer
+from instagram_space.utils.fieldsets import SparseFieldsetMixin
 
 
-class CommentSerializer(serializers.ModelSerializer):
-    user = CustomUserSerializer(read_only=True)
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    user = UserSummarySerializer(read_only=True)
+    is_liked = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
         fields = '__all__' 
+        read_only_fields = ('like_count', 'post', 'story')
+        expandable_fields = {'user': UserProfileSerializer}
 
+    def get_is_liked(self, object):
+        liked_ids = self.context.get('liked_ids')
+        return object.pk in liked_ids if liked_ids is not None else None
 
-class LikeSerializer(serializers.ModelSerializer):
-    user = CustomUserSerializer(read_only=True)
+
+class LikeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    user = UserSummarySerializer(read_only=True)
 
     class Meta:
         model = Like
-        fields = '__all__' 
\ No newline at end of file
+        fields = '__all__' 
+        expandable_fields = {'user': UserProfileSerializer}
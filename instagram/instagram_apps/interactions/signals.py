@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Like
+from . import counters
+
+
+@receiver(post_save, sender=Like)
+def count_new_like(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: counters.record_like(instance, 1))
+
+
+@receiver(post_delete, sender=Like)
+def count_removed_like(sender, instance, **kwargs):
+    transaction.on_commit(lambda: counters.record_like(instance, -1))
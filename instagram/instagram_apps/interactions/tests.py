@@ -1,13 +1,21 @@
 from django.test import TestCase
 from django.core.exceptions import ValidationError
 
-from django.db import IntegrityError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
 from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
 
 from instagram_apps.users.models import CustomUser
 from instagram_apps.posts.models import Post
 from instagram_apps.stories.models import Story
 from instagram_apps.interactions.models import Comment, Like
+from instagram_apps.interactions.counters import like_counter, reconcile_like_counts
+from instagram_apps.interactions.likes import like, liked_ids
+from instagram_apps.followers.models import Follow
+from instagram_space.utils.testing import QueryCountAssertionsMixin
 
 
 class CommentAndLikeModelTest(TestCase):
@@ -105,3 +113,221 @@ class CommentAndLikeModelTest(TestCase):
     def test_like_created_at_auto_now(self):
         like = Like.objects.create(user=self.user, post=self.post)
         self.assertLessEqual(like.created_at, timezone.now())
+
+
+class LikeCounterTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='liker', email='liker@example.com', password='pass')
+        self.other = CustomUser.objects.create_user(username='other', email='other@example.com', password='pass')
+        self.post = Post.objects.create(user=self.user, caption="Hot post")
+        self.story = Story.objects.create(user=self.user, caption="Hot story")
+        self.comment = Comment.objects.create(user=self.user, post=self.post, text="Hot comment")
+        like_counter.flush()
+
+    def like(self, **target):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Like.objects.create(**target)
+
+    def test_likes_are_buffered_until_flush(self):
+        self.like(user=self.user, post=self.post)
+        self.like(user=self.other, post=self.post)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+        self.assertEqual(like_counter.pending(Post, self.post.pk), 2)
+
+        like_counter.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 2)
+
+    def test_flush_batches_updates(self):
+        second_post = Post.objects.create(user=self.user, caption="Another")
+        self.like(user=self.user, post=self.post)
+        self.like(user=self.user, post=second_post)
+        with self.assertNumQueries(3):
+            like_counter.flush()
+
+    def test_unlike_decrements(self):
+        like = self.like(user=self.user, story=self.story)
+        with self.captureOnCommitCallbacks(execute=True):
+            like.delete()
+        like_counter.flush()
+        self.story.refresh_from_db()
+        self.assertEqual(self.story.like_count, 0)
+
+    def test_comment_likes_are_counted(self):
+        self.like(user=self.other, comment=self.comment)
+        like_counter.flush()
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.like_count, 1)
+
+    def test_discard_drops_pending_increments(self):
+        self.like(user=self.user, post=self.post)
+        like_counter.discard()
+        self.assertEqual(like_counter.pending(Post, self.post.pk), 0)
+        self.assertEqual(like_counter.flush(), 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_flush_threshold(self):
+        with self.settings(LIKE_COUNTER_FLUSH_THRESHOLD=1):
+            self.like(user=self.user, post=self.post)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+    def test_reconcile_fixes_drift(self):
+        Like.objects.create(user=self.user, post=self.post)
+        Post.objects.filter(pk=self.post.pk).update(like_count=10)
+        self.assertEqual(reconcile_like_counts(Post, 'post'), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+
+class CommentAPITest(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = CustomUser.objects.create_user(username='poster', email='poster@example.com', password='pass')
+        self.reader = CustomUser.objects.create_user(username='commenter', email='commenter@example.com', password='pass')
+        self.post = Post.objects.create(user=self.author, caption='Discuss')
+        self.story = Story.objects.create(user=self.author, caption='Story')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.reader)
+        self.url = reverse('interaction_apis:post-comments', args=[self.post.id])
+
+    def test_create_comment(self):
+        response = self.client.post(self.url, {'text': 'First!', 'story': self.story.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+        comment = Comment.objects.get()
+        self.assertEqual((comment.user, comment.post, comment.story), (self.reader, self.post, None))
+        self.assertEqual(response.data['user']['username'], 'commenter')
+
+    def test_list_pages_oldest_first_with_cursor(self):
+        comments = [Comment.objects.create(user=self.reader, post=self.post, text=f'Comment {i}') for i in range(5)]
+        Comment.objects.create(user=self.reader, story=self.story, text='Elsewhere')
+        first = self.client.get(self.url, {'page_size': 3}).data
+        self.assertEqual([c['id'] for c in first['results']], [c.id for c in comments[:3]])
+        second = self.client.get(first['next']).data
+        self.assertEqual([c['id'] for c in second['results']], [c.id for c in comments[3:]])
+        self.assertIsNone(second['next'])
+
+    def test_list_includes_like_counts_without_n_plus_one(self):
+        users = [CustomUser.objects.create_user(username=f'c{i}', email=f'c{i}@example.com', password='pass')
+                 for i in range(12)]
+        for i, user in enumerate(users):
+            comment = Comment.objects.create(user=user, post=self.post, text=f'Comment {i}')
+            Like.objects.bulk_create([Like(user=liker, comment=comment) for liker in users[:i]])
+        self.assertQueryCountIndependentOfPageSize(self.url)
+        results = self.client.get(self.url, {'page_size': 12}).data['results']
+        self.assertEqual([c['like_count'] for c in results], list(range(12)))
+
+    def test_list_like_counts_include_unflushed_likes(self):
+        comment = Comment.objects.create(user=self.author, post=self.post, text='Popular')
+        # Comment.like_count has not caught up with this like yet.
+        Like.objects.bulk_create([Like(user=self.reader, comment=comment)])
+        self.assertEqual(self.client.get(self.url).data['results'][0]['like_count'], 1)
+
+    def test_story_comments(self):
+        url = reverse('interaction_apis:story-comments', args=[self.story.id])
+        self.assertEqual(self.client.post(url, {'text': 'Nice'}, format='json').status_code, 201)
+        self.assertEqual(len(self.client.get(url).data['results']), 1)
+
+    def test_private_profile_comments_require_follow(self):
+        self.author.profile_status = CustomUser.PRIVATE_PROFILE
+        self.author.save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.post(self.url, {'text': 'Hi'}, format='json').status_code, 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.reader, following=self.author)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+class LikeAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        like_counter.flush()
+        self.author = CustomUser.objects.create_user(username='likeauthor', email='la@example.com', password='pass')
+        self.reader = CustomUser.objects.create_user(username='likereader', email='lr@example.com', password='pass')
+        self.post = Post.objects.create(user=self.author, caption='Like me')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.reader)
+        self.url = reverse('interaction_apis:post-like', args=[self.post.id])
+
+    def like_count(self, instance):
+        like_counter.flush()
+        instance.refresh_from_db()
+        return instance.like_count
+
+    def post_like(self, url, method='post'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(url)
+
+    def test_like_is_idempotent(self):
+        self.assertEqual(self.post_like(self.url).status_code, 201)
+        self.assertEqual(self.post_like(self.url).status_code, 200)
+        self.assertEqual(Like.objects.filter(user=self.reader, post=self.post).count(), 1)
+        self.assertEqual(self.like_count(self.post), 1)
+
+    def test_unlike_is_idempotent(self):
+        self.post_like(self.url)
+        self.assertEqual(self.post_like(self.url, 'delete').status_code, 204)
+        self.assertEqual(self.post_like(self.url, 'delete').status_code, 204)
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(self.like_count(self.post), 0)
+
+    def test_committed_like_is_counted_without_a_flush(self):
+        self.post_like(self.url)
+        self.assertEqual(like_counter.pending(Post, self.post.pk), 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.post_like(self.url, 'delete')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_like_retires_cached_detail(self):
+        detail_url = reverse('post_apis:open_post_detail', args=[self.post.id])
+        self.assertEqual(self.client.get(detail_url).data['like_count'], 0)
+        self.post_like(self.url)
+        self.assertEqual(self.client.get(detail_url).data['like_count'], 1)
+
+    def test_like_does_not_check_before_inserting(self):
+        like(self.reader, 'post', self.post.pk)
+        with CaptureQueriesContext(connection) as context:
+            # A repeated like is a single INSERT that the unique constraint turns into a no-op.
+            self.assertFalse(like(self.reader, 'post', self.post.pk))
+        statements = [q['sql'].split()[0] for q in context.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(statements, ['INSERT'])
+        self.assertEqual(like_counter.pending(Post, self.post.pk), 0)
+
+    def test_story_and_comment_likes(self):
+        story = Story.objects.create(user=self.author, caption='Story')
+        comment = Comment.objects.create(user=self.author, post=self.post, text='Comment')
+        self.assertEqual(self.post_like(reverse('interaction_apis:story-like', args=[story.id])).status_code, 201)
+        self.assertEqual(self.post_like(reverse('interaction_apis:comment-like', args=[comment.id])).status_code, 201)
+        self.assertEqual((self.like_count(story), self.like_count(comment)), (1, 1))
+
+    def test_private_profile_requires_follow(self):
+        self.author.profile_status = CustomUser.PRIVATE_PROFILE
+        self.author.save()
+        self.assertEqual(self.client.post(self.url).status_code, 403)
+        self.assertFalse(Like.objects.exists())
+
+    def test_bulk_liked_lookup(self):
+        posts = [Post.objects.create(user=self.author, caption=f'Post {i}') for i in range(3)]
+        like(self.reader, 'post', posts[0].pk)
+        like(self.reader, 'post', posts[2].pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(liked_ids(self.reader, 'post', posts), {posts[0].pk, posts[2].pk})
+        response = self.client.get(reverse('interaction_apis:liked-lookup'),
+                                   {'type': 'post', 'ids': ','.join(str(p.pk) for p in posts)})
+        self.assertEqual(response.data['liked'], sorted([posts[0].pk, posts[2].pk]))
+        self.assertEqual(self.client.get(reverse('interaction_apis:liked-lookup'), {'type': 'user'}).status_code, 400)
+
+    def test_lists_and_details_report_is_liked(self):
+        like(self.reader, 'post', self.post.pk)
+        Post.objects.create(user=self.author, caption='Not liked')
+        results = self.client.get(reverse('post_apis:open-profile-posts')).data['results']
+        self.assertEqual({r['caption']: r['is_liked'] for r in results}, {'Like me': True, 'Not liked': False})
+        detail = self.client.get(reverse('post_apis:open_post_detail', args=[self.post.id]))
+        self.assertTrue(detail.data['is_liked'])
+        self.client.force_authenticate(user=self.author)
+        detail = self.client.get(reverse('post_apis:open_post_detail', args=[self.post.id]))
+        self.assertFalse(detail.data['is_liked'])
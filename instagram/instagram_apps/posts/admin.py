@@ -1,11 +1,23 @@
 from django.contrib import admin
-from .models import Post
+from .models import Post, ExploreScore
+from instagram_apps.search.admin import IndexedSearchMixin
 
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('user', 'caption', 'created_at', 'like_count', 'views', 'image', 'video')
     list_filter = ('created_at', 'user', 'like_count', 'views')
     search_fields = ('user__username', 'caption')
+    search_kind = 'post'
+    exact_search_fields = ('user__username',)
     ordering = ('-created_at',)
     list_per_page = 20
 
 admin.site.register(Post, PostAdmin)
+
+
+class ExploreScoreAdmin(admin.ModelAdmin):
+    list_display = ('post', 'score', 'computed_at')
+    raw_id_fields = ('post',)
+    ordering = ('-score',)
+    list_per_page = 20
+
+admin.site.register(ExploreScore, ExploreScoreAdmin)
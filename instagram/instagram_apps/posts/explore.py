@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from instagram_apps.interactions.models import Comment
+from .models import Post, ExploreScore
+
+
+# Explore ranking. Scores are computed offline from the denormalized like_count and
+# views plus one grouped comment count per batch, then decayed by age:
+#   (likes * wl + comments * wc + views * wv) / (age_hours + 2) ** gravity
+# so serving explore is an index scan over ExploreScore.
+
+def get_max_age():
+    return timedelta(seconds=getattr(settings, 'EXPLORE_MAX_AGE', 60 * 60 * 24 * 7))
+
+
+def get_batch_size():
+    return getattr(settings, 'EXPLORE_BATCH_SIZE', 500)
+
+
+def engagement_score(like_count, comment_count, views, age):
+    engagement = (like_count * getattr(settings, 'EXPLORE_LIKE_WEIGHT', 1.0)
+                  + comment_count * getattr(settings, 'EXPLORE_COMMENT_WEIGHT', 2.0)
+                  + views * getattr(settings, 'EXPLORE_VIEW_WEIGHT', 0.1))
+    age_hours = max(age.total_seconds(), 0) / 3600
+    return engagement / (age_hours + 2) ** getattr(settings, 'EXPLORE_GRAVITY', 1.5)
+
+
+def _score_batch(rows, now):
+    comment_counts = dict(
+        Comment.objects.filter(post_id__in=[row[0] for row in rows]).order_by().values('post_id')
+        .annotate(total=models.Count('id')).values_list('post_id', 'total')
+    )
+    scores = [
+        ExploreScore(post_id=pk, score=engagement_score(like_count, comment_counts.get(pk, 0), views, now - created_at),
+                     computed_at=now)
+        for pk, like_count, views, created_at in rows
+    ]
+    ExploreScore.objects.bulk_create(scores, update_conflicts=True, unique_fields=['post'],
+                                     update_fields=['score', 'computed_at'])
+    return len(scores)
+
+
+def compute_explore_scores(now=None, batch_size=None):
+    now = now or timezone.now()
+    batch_size = batch_size or get_batch_size()
+    recent = Post.objects.filter(created_at__gte=now - get_max_age()).order_by('pk') \
+        .values_list('pk', 'like_count', 'views', 'created_at')
+
+    scored = 0
+    batch = []
+    for row in recent.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            scored += _score_batch(batch, now)
+            batch = []
+    if batch:
+        scored += _score_batch(batch, now)
+    # Posts that aged out of the window were not rescored in this run.
+    ExploreScore.objects.filter(computed_at__lt=now).delete()
+    return scored
+
+
+def explore_posts(user):
+    # Open-profile posts by other accounts; explore_rank carries the score for the (score, id) cursor.
+    return Post.objects.filter(explore_score__isnull=False, user__profile_status=user.OPEN_PROFILE) \
+        .exclude(user=user).annotate(explore_rank=models.F('explore_score__score'))
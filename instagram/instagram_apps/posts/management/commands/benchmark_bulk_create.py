@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.posts.serializers import PostSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare per-item serializer saves with the bulk create path (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=500)
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def measure(self, label, func):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(f'{label:<10} {elapsed * 1000:10.1f} ms {len(context.captured_queries):8} queries')
+        return elapsed
+
+    def handle(self, *args, **options):
+        items = [{'caption': f'Benchmark post {i}'} for i in range(options['items'])]
+
+        with transaction.atomic():
+            user = CustomUser.objects.create(username='bulk-benchmark', email='bulk-benchmark@example.com')
+
+            def per_item():
+                serializer = PostSerializer(data=items, many=True)
+                serializer.is_valid(raise_exception=True)
+                serializer.save(user=user)
+
+            def bulk():
+                serializer = PostSerializer(data=items, many=True)
+                serializer.bulk_create(user=user, batch_size=options['batch_size'])
+
+            self.stdout.write(f'Creating {len(items)} posts')
+            legacy = self.measure('per-item', per_item)
+            batched = self.measure('bulk', bulk)
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS(f'Bulk path is {legacy / batched:.1f}x faster'))
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.users.serializers import CustomUserSerializer
+from instagram_apps.posts.models import Post
+from instagram_apps.posts.serializers import PostSerializer
+from instagram_space.utils.query_optimization import optimize_queryset
+
+
+class LegacyPostSerializer(PostSerializer):
+    # The list shape before sparse fieldsets: full user embed, fields rebuilt for every serializer.
+    user = CustomUserSerializer(read_only=True)
+
+    def get_fields(self):
+        return serializers.ModelSerializer.get_fields(self)
+
+
+class Command(BaseCommand):
+    help = 'Measure bytes and milliseconds per page of post list payloads (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def measure(self, label, serializer_class, params, page_size, repeat):
+        request = Request(APIRequestFactory().get('/api/v1/posts/open/', params))
+        request.user = CustomUser(username='benchmark-viewer')
+        size = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            page = list(optimize_queryset(Post.objects.order_by('-created_at', '-id'), serializer_class)[:page_size])
+            data = serializer_class(page, many=True, context={'request': request}).data
+            size = len(JSONRenderer().render(data))
+        elapsed = (time.perf_counter() - started) / repeat
+        self.stdout.write(f'{label:<10} {elapsed * 1000:10.2f} ms/page {size:10} bytes/page')
+        return elapsed, size
+
+    def handle(self, *args, **options):
+        page_size, repeat = options['page_size'], options['repeat']
+        with transaction.atomic():
+            authors = CustomUser.objects.bulk_create([
+                CustomUser(username=f'serializer-benchmark-{i}', email=f'serializer-benchmark-{i}@example.com',
+                           bio='Benchmark author ' * 5)
+                for i in range(page_size)
+            ])
+            Post.objects.bulk_create([Post(user=author, caption=f'Benchmark post {i} ' * 4)
+                                      for i, author in enumerate(authors)])
+
+            self.stdout.write(f'Rendering {page_size} posts per page, {repeat} runs')
+            legacy = self.measure('legacy', LegacyPostSerializer, {}, page_size, repeat)
+            compact = self.measure('compact', PostSerializer, {}, page_size, repeat)
+            self.measure('sparse', PostSerializer, {'fields': 'id,caption,image_url,user'}, page_size, repeat)
+            self.measure('expanded', PostSerializer, {'expand': 'user'}, page_size, repeat)
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Compact pages are {legacy[1] / compact[1]:.1f}x smaller and {legacy[0] / compact[0]:.1f}x faster'))
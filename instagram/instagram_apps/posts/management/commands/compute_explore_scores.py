@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from instagram_apps.posts.explore import compute_explore_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute time-decayed engagement scores for recent posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        scored = compute_explore_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Scored {scored} posts for explore'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.posts import timeline
+
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized home timelines from the follow graph'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help='Only rebuild timelines of these users')
+
+    def handle(self, *args, **options):
+        users = CustomUser.objects.all()
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        total = 0
+        for user in users.iterator():
+            total += timeline.rebuild_timeline(user)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt timelines with {total} entries'))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 16:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExploreScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='explore_score', serialize=False, to='posts.post')),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score', '-post'], name='explore_score_idx')],
+            },
+        ),
+    ]
@@ -10,12 +10,16 @@ class Post(models.Model):
     caption = models.TextField(max_length=255, null=True, blank=True)
     image = models.ImageField(upload_to='post_images/', null=True, blank=True)
     video = models.FileField(upload_to='post_videos/', null=True, blank=True)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     like_count = models.PositiveIntegerField(default=0)
     views = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='post_created_id_idx'),
+        ]
 
     def clean(self):
         caption = self.caption.strip() if self.caption else ''
@@ -27,4 +31,37 @@ class Post(models.Model):
         return super().save(*args, **kwargs)
 
     def __str__(self):
-        return f'{self.user.username}: {self.caption[:20]}'
\ No newline at end of file
+        return f'{self.user.username}: {self.caption[:20]}'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(CustomUser, related_name='timeline_entries', on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, related_name='timeline_entries', on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='unique_user_timeline_post'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.post} in timeline of {self.user.username}'
+
+
+class ExploreScore(models.Model):
+    # Time-decayed engagement score of a recent post, refreshed by compute_explore_scores.
+    post = models.OneToOneField(Post, related_name='explore_score', primary_key=True, on_delete=models.CASCADE)
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', '-post'], name='explore_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.4f}'
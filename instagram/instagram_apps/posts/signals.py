@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Post
+from . import timeline
+from instagram_space.utils.bulk import bulk_created
+from instagram_space.utils.detail_cache import invalidate_detail
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: timeline.fan_out_post(instance))
+
+
+@receiver(bulk_created, sender=Post)
+def fan_out_bulk_created_posts(sender, instances, **kwargs):
+    transaction.on_commit(lambda: timeline.fan_out_posts(instances))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_cached_detail(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_detail('post', pk))
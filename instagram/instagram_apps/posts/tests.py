@@ -1,10 +1,37 @@
+from io import BytesIO, StringIO
+
 from django.test import TestCase
+from django.core.management import call_command
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.exceptions import ValidationError
+from django.test import override_settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.urls import reverse
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
 
 from instagram_apps.users.models import CustomUser
-from instagram_apps.posts.models import Post
+from instagram_apps.followers.models import Follow
+from instagram_apps.posts.models import Post, TimelineEntry, ExploreScore
+from instagram_apps.posts.explore import compute_explore_scores, engagement_score
+from instagram_apps.interactions.models import Comment
+from instagram_apps.posts import timeline
+from instagram_apps.posts.serializers import PostSerializer
+from instagram_space.utils.query_optimization import get_query_plan
+from instagram_space.utils.fieldsets import compile_fields
+from instagram_space.utils.testing import QueryCountAssertionsMixin
+from instagram_space.utils import renderers
+from instagram_space.utils import parsers
+from instagram_apps.interactions.counters import view_counter
 
 
 class PostModelTest(TestCase):
@@ -71,4 +98,445 @@ class PostModelTest(TestCase):
     def test_post_with_only_whitespace_caption_should_fail(self):
         post = Post(user=self.user, caption='   ')
         with self.assertRaises(ValidationError):
-            post.full_clean()
\ No newline at end of file
+            post.full_clean()
+
+
+class TimelineTest(TestCase):
+
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(username='author', email='author@example.com', password='pass')
+        self.reader = CustomUser.objects.create_user(username='reader', email='reader@example.com', password='pass')
+        self.stranger = CustomUser.objects.create_user(username='stranger', email='stranger@example.com', password='pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.reader, following=self.author)
+
+    def create_post(self, user, caption):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(user=user, caption=caption)
+
+    def test_new_post_is_fanned_out_to_followers_and_author(self):
+        post = self.create_post(self.author, 'Hello followers')
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+        self.assertTrue(TimelineEntry.objects.filter(user=self.author, post=post).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=self.stranger, post=post).exists())
+
+    def test_follow_backfills_recent_posts(self):
+        post = self.create_post(self.stranger, 'Before follow')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.reader, following=self.stranger)
+        self.assertIn(post, timeline.home_timeline(self.reader))
+
+    def test_unfollow_removes_posts(self):
+        post = self.create_post(self.author, 'Soon gone')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.filter(follower=self.reader, following=self.author).delete()
+        self.assertNotIn(post, timeline.home_timeline(self.reader))
+
+    @override_settings(TIMELINE_CELEBRITY_FOLLOWER_THRESHOLD=1)
+    def test_celebrity_posts_are_read_on_demand(self):
+        post = self.create_post(self.author, 'Famous post')
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, post=post).exists())
+        self.assertIn(post, timeline.home_timeline(self.reader))
+
+    def test_home_timeline_order(self):
+        first = self.create_post(self.author, 'First')
+        second = self.create_post(self.author, 'Second')
+        self.assertEqual(list(timeline.home_timeline(self.reader)), [second, first])
+
+    def test_rebuild_timeline(self):
+        post = self.create_post(self.author, 'Rebuilt')
+        TimelineEntry.objects.all().delete()
+        timeline.rebuild_timeline(self.reader)
+        self.assertIn(post, timeline.home_timeline(self.reader))
+
+    def test_feed_endpoint(self):
+        self.create_post(self.author, 'Feed post')
+        client = APIClient()
+        client.force_authenticate(user=self.reader)
+        response = client.get(reverse('post_apis:home-timeline'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+    @override_settings(TIMELINE_CELEBRITY_FOLLOWER_THRESHOLD=2)
+    def test_pages_merge_fanned_out_and_celebrity_posts(self):
+        celebrity = CustomUser.objects.create_user(username='celebrity', email='celebrity@example.com', password='pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.reader, following=celebrity)
+            Follow.objects.create(follower=self.stranger, following=celebrity)
+        posts = [self.create_post(self.author if i % 2 else celebrity, f'Post {i}') for i in range(7)]
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader, post__user=celebrity).exists())
+
+        client = APIClient()
+        client.force_authenticate(user=self.reader)
+        url, seen = reverse('post_apis:home-timeline'), []
+        while url:
+            response = client.get(url, {'page_size': 3} if not seen else None)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, [post.pk for post in reversed(posts)])
+
+    def test_timeline_page_reads_entries_without_joining_posts(self):
+        self.create_post(self.author, 'Indexed')
+        with CaptureQueriesContext(connection) as context:
+            timeline.home_timeline_ids(self.reader.pk, 10)
+        entry_query = next(query['sql'] for query in context.captured_queries if 'posts_timelineentry' in query['sql'])
+        self.assertNotIn('JOIN', entry_query)
+
+
+class KeysetPaginationTest(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='pager', email='pager@example.com', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        created_at = timezone.now()
+        for i in range(5):
+            post = Post.objects.create(user=self.user, caption=f'Post {i}')
+            # Two posts share a timestamp so the id tiebreaker is exercised.
+            Post.objects.filter(id=post.id).update(created_at=created_at if i < 2 else created_at - timedelta(minutes=i))
+
+    def test_pages_cover_every_post_once(self):
+        url = reverse('post_apis:open-profile-posts') + '?pagination=cursor&page_size=2'
+        captions = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            captions += [item['caption'] for item in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(sorted(captions), [f'Post {i}' for i in range(5)])
+
+    def test_insert_while_paging_does_not_repeat_rows(self):
+        response = self.client.get(reverse('post_apis:open-profile-posts'), {'pagination': 'cursor', 'page_size': 2})
+        first_page = [item['id'] for item in response.data['results']]
+        Post.objects.create(user=self.user, caption='Newest')
+        response = self.client.get(response.data['next'])
+        self.assertFalse(set(first_page) & {item['id'] for item in response.data['results']})
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('post_apis:open-profile-posts'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_number_pagination_is_default(self):
+        response = self.client.get(reverse('post_apis:open-profile-posts'))
+        self.assertEqual(response.data['count'], 5)
+
+
+class PostListQueryCountTest(QueryCountAssertionsMixin, TestCase):
+
+    def setUp(self):
+        self.viewer = CustomUser.objects.create_user(username='viewer', email='viewer@example.com', password='pass')
+        for i in range(12):
+            author = CustomUser.objects.create_user(username=f'author{i}', email=f'author{i}@example.com', password='pass')
+            Post.objects.create(user=author, caption=f'Post {i}')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.viewer)
+
+    def test_query_plan_for_post_serializer(self):
+        plan = get_query_plan(PostSerializer)
+        self.assertIn('user', plan.select_related)
+        # The embedded user is compact: no groups or permissions to prefetch.
+        self.assertEqual(plan.prefetch_related, [])
+        self.assertIn('user__username', plan.only)
+        # Columns of the ?expand=user representation are loaded too, never deferred per row.
+        self.assertIn('user__bio', plan.only)
+
+    def test_open_profile_list_has_no_n_plus_one(self):
+        self.assertQueryCountIndependentOfPageSize(reverse('post_apis:open-profile-posts'))
+
+    def test_open_profile_list_cursor_mode_has_no_n_plus_one(self):
+        self.assertQueryCountIndependentOfPageSize(
+            reverse('post_apis:open-profile-posts'), params={'pagination': 'cursor'})
+
+    def test_list_checks_emptiness_on_the_fetched_page(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('post_apis:open-profile-posts'), {'pagination': 'cursor'})
+        self.assertFalse(any('SELECT 1 AS "a"' in query['sql'] for query in context.captured_queries))
+        Post.objects.all().delete()
+        response = self.client.get(reverse('post_apis:open-profile-posts'))
+        self.assertEqual(response.data, {'message': 'There are no posts'})
+
+    def test_nested_user_is_serialized(self):
+        response = self.client.get(reverse('post_apis:open-profile-posts'))
+        user = response.data['results'][0]['user']
+        self.assertTrue(user['username'].startswith('author'))
+        self.assertNotIn('password', user)
+        self.assertNotIn('email', user)
+        self.assertEqual(set(user), {'id', 'username', 'profile_picture', 'profile_status'})
+
+    def test_sparse_fieldsets(self):
+        url = reverse('post_apis:open-profile-posts')
+        response = self.client.get(url, {'fields': 'id,caption,bogus'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'caption'})
+        response = self.client.get(url, {'fields': 'id,user', 'expand': 'user'})
+        user = response.data['results'][0]['user']
+        self.assertIn('bio', user)
+        self.assertNotIn('email', user)
+        self.assertQueryCountIndependentOfPageSize(url, params={'expand': 'user'})
+
+    def test_field_plans_are_compiled_once(self):
+        compile_fields.cache_clear()
+        request = APIRequestFactory().get('/', {'fields': 'id,caption'})
+        request = Request(request)
+        for _ in range(3):
+            PostSerializer(Post.objects.all(), many=True, context={'request': request}).data
+        self.assertEqual(compile_fields.cache_info().misses, 2)
+
+
+class PostViewCounterTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        view_counter.flush()
+        self.author = CustomUser.objects.create_user(username='viewed', email='viewed@example.com', password='pass')
+        self.post = Post.objects.create(user=self.author, caption='Viral')
+        self.url = reverse('post_apis:open_post_detail', args=[self.post.id])
+        self.client = APIClient()
+
+    def view_as(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.get(self.url)
+
+    def test_detail_read_does_not_write(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.view_as(self.author)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in context.captured_queries if q['sql'].startswith('UPDATE')])
+        self.assertEqual(view_counter.pending(Post, self.post.pk), 1)
+
+    def test_due_buffer_is_flushed_off_the_request(self):
+        with self.settings(COUNTER_BACKGROUND_FLUSH=True, VIEW_COUNTER_FLUSH_THRESHOLD=1), \
+                mock.patch.object(view_counter, 'ensure_flusher') as ensure_flusher, \
+                CaptureQueriesContext(connection) as context:
+            self.view_as(self.author)
+        ensure_flusher.assert_called_once()
+        self.assertFalse([q for q in context.captured_queries if q['sql'].startswith('UPDATE')])
+        self.assertEqual(view_counter.pending(Post, self.post.pk), 1)
+        view_counter._wake.clear()
+
+    def test_views_are_deduplicated_per_viewer(self):
+        reader = CustomUser.objects.create_user(username='reader', email='reader@example.com', password='pass')
+        self.view_as(self.author)
+        self.view_as(self.author)
+        self.view_as(reader)
+        view_counter.flush()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+
+    def test_views_count_again_after_window(self):
+        self.view_as(self.author)
+        cache.clear()  # the dedupe window expired
+        self.view_as(self.author)
+        self.assertEqual(view_counter.pending(Post, self.post.pk), 2)
+
+
+class BulkCreatePostsTest(TestCase):
+
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(username='bulk', email='bulk@example.com', password='pass')
+        self.follower = CustomUser.objects.create_user(username='fan', email='fan@example.com', password='pass')
+        Follow.objects.create(follower=self.follower, following=self.author)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.author)
+        self.url = reverse('post_apis:create-multiple-posts')
+
+    def test_bulk_create_reports_item_errors_without_aborting(self):
+        payload = [{'caption': 'One'}, {'caption': '   '}, {'caption': 'Three'}]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([post['caption'] for post in response.data['created']], ['One', 'Three'])
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertEqual(Post.objects.filter(user=self.author).count(), 2)
+        self.assertEqual(TimelineEntry.objects.filter(user=self.follower).count(), 2)
+
+    def test_bulk_create_inserts_in_batches(self):
+        payload = [{'caption': f'Post {i}'} for i in range(5)]
+        serializer = PostSerializer(data=payload, many=True)
+        with self.assertNumQueries(5):
+            posts, errors = serializer.bulk_create(user=self.author, batch_size=2)
+        self.assertEqual(len(posts), 5)
+        self.assertFalse(errors)
+        self.assertTrue(all(post.pk for post in posts))
+
+    def test_bulk_create_all_invalid(self):
+        response = self.client.post(self.url, [{'caption': ''}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data['errors']), 1)
+
+    def test_bulk_create_requires_list(self):
+        response = self.client.post(self.url, {'caption': 'Not a list'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_single_create_sets_author(self):
+        response = self.client.post(reverse('post_apis:create-single-post'), {'caption': 'Solo'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Post.objects.get(caption='Solo').user, self.author)
+
+
+class PostDetailCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = CustomUser.objects.create_user(username='cached', email='cached@example.com', password='pass')
+        self.reader = CustomUser.objects.create_user(username='cachereader', email='cr@example.com', password='pass')
+        self.post = Post.objects.create(user=self.author, caption='Hot post')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.reader)
+        self.open_url = reverse('post_apis:open_post_detail', args=[self.post.id])
+        self.private_url = reverse('post_apis:private_post_detail', args=[self.post.id])
+
+    def test_hits_only_look_up_the_viewers_like(self):
+        self.client.get(self.open_url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.open_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['caption'], 'Hot post')
+
+    def test_entries_are_keyed_by_fieldset(self):
+        self.client.get(self.open_url)
+        response = self.client.get(self.open_url, {'fields': 'id,caption'})
+        self.assertEqual(set(response.data), {'id', 'caption'})
+        self.assertIn('user', self.client.get(self.open_url).data)
+
+    def test_patch_invalidates_entry(self):
+        self.client.get(self.open_url)
+        self.client.force_authenticate(user=self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.open_url, {'caption': 'Edited'}, format='json')
+        self.assertEqual(self.client.get(self.open_url).data['caption'], 'Edited')
+
+    def test_delete_invalidates_entry(self):
+        self.client.get(self.open_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        self.assertEqual(self.client.get(self.open_url).status_code, 404)
+
+    def test_visibility_is_checked_on_cached_payload(self):
+        self.assertEqual(self.client.get(self.open_url).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.profile_status = CustomUser.PRIVATE_PROFILE
+            self.author.save()
+        self.assertEqual(self.client.get(self.open_url).status_code, 403)
+        self.assertEqual(self.client.get(self.private_url).status_code, 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.reader, following=self.author)
+        self.assertEqual(self.client.get(self.private_url).status_code, 200)
+
+    def test_concurrent_miss_waits_for_rebuild(self):
+        with self.settings(DETAIL_CACHE_LOCK_WAIT=0.05):
+            self.client.get(self.open_url)
+            cache.clear()
+            cache.set(f'detail-cache:post:{self.post.id}:version', 1)
+            # A held lock means another worker is rebuilding; this request falls back after a short wait.
+            cache.add(f'detail-cache:post:{self.post.id}:1:1080:lock', 1)
+            response = self.client.get(self.open_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(f'detail-cache:post:{self.post.id}:1:1080'))
+
+    def test_evicted_version_does_not_revive_old_entries(self):
+        self.client.get(self.open_url)
+        Post.objects.filter(pk=self.post.pk).update(caption='Edited')
+        cache.delete(f'detail-cache:post:{self.post.id}:version')
+        self.assertEqual(self.client.get(self.open_url).data['caption'], 'Edited')
+
+    def test_image_widths_share_snapped_entries(self):
+        self.client.get(self.open_url, {'image_width': 500})
+        # Every width up to the 640 rendition is served from the same entry.
+        for width in (401, 599, 640):
+            with self.assertNumQueries(1):
+                self.client.get(self.open_url, {'image_width': width})
+
+
+class ExploreTest(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = CustomUser.objects.create_user(username='explorer', email='explorer@example.com', password='pass')
+        self.author = CustomUser.objects.create_user(username='creator', email='creator@example.com', password='pass')
+        self.hidden = CustomUser.objects.create_user(username='secret', email='secret@example.com', password='pass',
+                                                     profile_status=CustomUser.PRIVATE_PROFILE)
+        now = timezone.now()
+        self.quiet = Post.objects.create(user=self.author, caption='quiet')
+        self.liked = Post.objects.create(user=self.author, caption='liked')
+        self.discussed = Post.objects.create(user=self.author, caption='discussed')
+        self.old = Post.objects.create(user=self.author, caption='old')
+        self.private = Post.objects.create(user=self.hidden, caption='private')
+        self.own = Post.objects.create(user=self.viewer, caption='own')
+        Post.objects.filter(pk__in=[self.liked.pk, self.private.pk, self.own.pk]).update(like_count=10)
+        Post.objects.filter(pk=self.old.pk).update(like_count=1000, created_at=now - timedelta(days=8))
+        for i in range(6):
+            Comment.objects.create(user=self.viewer, post=self.discussed, text=f'comment {i}')
+        self.url = reverse('post_apis:explore')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.viewer)
+
+    def test_score_decays_with_age(self):
+        self.assertGreater(engagement_score(10, 0, 0, timedelta(hours=1)), engagement_score(10, 0, 0, timedelta(hours=10)))
+        self.assertGreater(engagement_score(0, 1, 0, timedelta()), engagement_score(1, 0, 0, timedelta()))
+
+    def test_scores_only_recent_posts(self):
+        self.assertEqual(compute_explore_scores(batch_size=2), 5)
+        self.assertFalse(ExploreScore.objects.filter(post=self.old).exists())
+        Post.objects.filter(pk=self.quiet.pk).update(created_at=timezone.now() - timedelta(days=8))
+        compute_explore_scores()
+        self.assertFalse(ExploreScore.objects.filter(post=self.quiet).exists())
+
+    def test_explore_pages_by_score(self):
+        compute_explore_scores()
+        first = self.client.get(self.url, {'page_size': 2}).data
+        self.assertEqual([row['id'] for row in first['results']], [self.discussed.pk, self.liked.pk])
+        second = self.client.get(first['next']).data
+        self.assertEqual([row['id'] for row in second['results']], [self.quiet.pk])
+        self.assertIsNone(second['next'])
+        self.assertQueryCountIndependentOfPageSize(self.url, page_sizes=(1, 3))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('compute_explore_scores', stdout=out)
+        self.assertIn('Scored 5 posts for explore', out.getvalue())
+
+
+class FastJSONRenderingTest(TestCase):
+
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(username='author', email='author@example.com', password='pass')
+        for i in range(6):
+            Post.objects.create(user=self.author, caption=f'Caf\u00e9 #{i} \u2028')
+        self.url = reverse('post_apis:open-profile-posts')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.author)
+        self.payload = {
+            'next': None,
+            'results': [{'id': 1, 'when': timezone.now(), 'price': Decimal('1.50'), 'text': 'caf\u00e9 \u2029'}],
+        }
+
+    def test_matches_stdlib_renderer(self):
+        expected = JSONRenderer().render(self.payload)
+        self.assertEqual(renderers.FastJSONRenderer().render(self.payload), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.FastJSONRenderer().render(self.payload), expected)
+
+    def test_list_endpoint_uses_fast_renderer(self):
+        response = self.client.get(self.url)
+        self.assertIsInstance(response.accepted_renderer, renderers.FastJSONRenderer)
+        self.assertIn(b'\\u2028', response.content)
+        self.assertEqual(len(json.loads(response.content)['results']), 6)
+
+    def test_strict_mode_rejects_nan(self):
+        payload = {'results': [{'score': float('nan')}]}
+        with self.assertRaises(ValueError):
+            renderers.FastJSONRenderer().render(payload)
+        with mock.patch.object(renderers, 'orjson', None):
+            with self.assertRaises(ValueError):
+                renderers.FastJSONRenderer().render(payload)
+
+    def test_parser(self):
+        parser = parsers.FastJSONParser()
+        self.assertEqual(parser.parse(BytesIO('{"caption": "caf\u00e9"}'.encode())), {'caption': 'caf\u00e9'})
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{"caption": '))
+        with mock.patch.object(parsers, 'orjson', None):
+            self.assertEqual(parser.parse(BytesIO(b'[1, 2]')), [1, 2])
+            with self.assertRaises(ParseError):
+                parser.parse(BytesIO(b'{"caption": '))
@@ -0,0 +1,145 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.followers.models import Follow
+from .models import Post, TimelineEntry
+
+
+def get_celebrity_threshold():
+    return getattr(settings, 'TIMELINE_CELEBRITY_FOLLOWER_THRESHOLD', 10000)
+
+
+def get_backfill_limit():
+    return getattr(settings, 'TIMELINE_BACKFILL_LIMIT', 50)
+
+
+def get_fanout_batch_size():
+    return getattr(settings, 'TIMELINE_FANOUT_BATCH_SIZE', 1000)
+
+
+def get_celebrity_cache_timeout():
+    return getattr(settings, 'TIMELINE_CELEBRITY_CACHE_TIMEOUT', 300)
+
+
+def is_celebrity(user_id):
+    return CustomUser.objects.filter(pk=user_id, followers_count__gte=get_celebrity_threshold()).exists()
+
+
+def _celebrities_key(user_id):
+    return f'timeline:celebrities:{user_id}'
+
+
+def followed_celebrity_ids(user_id):
+    # Posts of these accounts are not fanned out and are merged in at read time.
+    key = _celebrities_key(user_id)
+    celebrity_ids = cache.get(key)
+    if celebrity_ids is None:
+        celebrity_ids = list(
+            CustomUser.objects.filter(followers__follower_id=user_id, followers_count__gte=get_celebrity_threshold())
+            .values_list('id', flat=True)
+        )
+        cache.set(key, celebrity_ids, timeout=get_celebrity_cache_timeout())
+    return celebrity_ids
+
+
+def invalidate_celebrities(user_id):
+    cache.delete(_celebrities_key(user_id))
+
+
+def _bulk_insert(entries):
+    batch_size = get_fanout_batch_size()
+    entries = iter(entries)
+    inserted = 0
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return inserted
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        inserted += len(batch)
+
+
+def fan_out_post(post):
+    return fan_out_posts([post])
+
+
+def fan_out_posts(posts):
+    # Below the celebrity threshold the follower list is bounded, so it is read once per author.
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.user_id, []).append(post)
+
+    inserted = 0
+    for author_id, author_posts in by_author.items():
+        recipients = [author_id]
+        if not is_celebrity(author_id):
+            recipients += list(Follow.objects.filter(following_id=author_id).values_list('follower_id', flat=True))
+        inserted += _bulk_insert(
+            TimelineEntry(user_id=user_id, post_id=post.id, created_at=post.created_at)
+            for post in author_posts
+            for user_id in recipients
+        )
+    return inserted
+
+
+def backfill_follow(follower_id, following_id):
+    if is_celebrity(following_id):
+        return 0
+    recent_posts = Post.objects.filter(user_id=following_id).order_by(
+        '-created_at').values_list('id', 'created_at')[:get_backfill_limit()]
+    return _bulk_insert(
+        TimelineEntry(user_id=follower_id, post_id=post_id, created_at=created_at)
+        for post_id, created_at in recent_posts
+    )
+
+
+def remove_follow(follower_id, following_id):
+    deleted, _ = TimelineEntry.objects.filter(user_id=follower_id, post__user_id=following_id).delete()
+    return deleted
+
+
+def rebuild_timeline(user):
+    TimelineEntry.objects.filter(user=user).delete()
+    inserted = _bulk_insert(
+        TimelineEntry(user_id=user.id, post_id=post_id, created_at=created_at)
+        for post_id, created_at in Post.objects.filter(user=user).values_list('id', 'created_at')
+    )
+    for following_id in Follow.objects.filter(follower=user).values_list('following_id', flat=True):
+        inserted += backfill_follow(user.id, following_id)
+    return inserted
+
+
+def _before(after, created_field, id_field):
+    created_at, pk = after
+    return models.Q(**{f'{created_field}__lt': created_at}) | models.Q(**{created_field: created_at, f'{id_field}__lt': pk})
+
+
+def home_timeline_ids(user_id, limit, after=None):
+    # One page of (created_at, post_id), newest first. Fanned-out entries are read from the
+    # (user, -created_at, -post) index; celebrity posts are merged in for this page only.
+    entries = TimelineEntry.objects.filter(user_id=user_id)
+    if after is not None:
+        entries = entries.filter(_before(after, 'created_at', 'post_id'))
+    rows = list(entries.order_by('-created_at', '-post_id').values_list('created_at', 'post_id')[:limit])
+
+    celebrity_ids = followed_celebrity_ids(user_id)
+    if celebrity_ids:
+        posts = Post.objects.filter(user_id__in=celebrity_ids).exclude(id__in=[post_id for _, post_id in rows])
+        if after is not None:
+            posts = posts.filter(_before(after, 'created_at', 'id'))
+        if len(rows) == limit:
+            # Celebrity posts older than a full page of entries cannot make this page.
+            posts = posts.filter(created_at__gte=rows[-1][0])
+        celebrity_rows = posts.order_by('-created_at', '-id').values_list('created_at', 'id')[:limit]
+        rows = list(islice(heapq.merge(rows, celebrity_rows, reverse=True), limit))
+    return rows
+
+
+def home_timeline(user, limit=50, after=None, queryset=None):
+    ids = [post_id for _, post_id in home_timeline_ids(user.pk, limit, after)]
+    posts = (queryset if queryset is not None else Post.objects.all()).filter(pk__in=ids).in_bulk()
+    return [posts[post_id] for post_id in ids if post_id in posts]
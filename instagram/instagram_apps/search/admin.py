@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.contrib import admin, messages
+from django.db import models
+
+from .models import SearchDocument
+from .backends import get_backend
+
+
+class IndexedSearchMixin:
+    # Admin search boxes go through the search index instead of icontains scans.
+    # exact_search_fields are matched with indexed equality lookups (e.g. a username).
+    search_kind = None
+    exact_search_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        backend = get_backend()
+        if backend is None or not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        limit = getattr(settings, 'SEARCH_ADMIN_MAX_RESULTS', 1000)
+        ids = backend.matching_ids(self.search_kind, search_term, limit=limit + 1)
+        if len(ids) > limit:
+            # Too many matches to pass as ids; the plain lookup returns all of them instead of a cut.
+            messages.info(request, f'More than {limit} indexed matches; searched without the index.',
+                          fail_silently=True)
+            return super().get_search_results(request, queryset, search_term)
+        condition = models.Q(pk__in=ids)
+        for field in self.exact_search_fields:
+            condition |= models.Q(**{field: search_term.strip()})
+        return queryset.filter(condition), False
+
+
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'object_id', 'body', 'updated_at')
+    list_filter = ('kind',)
+    ordering = ('-updated_at',)
+    list_per_page = 20
+
+admin.site.register(SearchDocument, SearchDocumentAdmin)
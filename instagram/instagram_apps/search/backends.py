@@ -0,0 +1,111 @@
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from .models import SearchDocument
+
+
+SearchHit = namedtuple('SearchHit', ('id', 'kind', 'object_id', 'score'))
+
+TERM_RE = re.compile(r'\w+')
+
+
+def get_max_query_terms():
+    return getattr(settings, 'SEARCH_MAX_QUERY_TERMS', 8)
+
+
+def query_terms(query):
+    return TERM_RE.findall((query or '').lower())[:get_max_query_terms()]
+
+
+class BaseSearchBackend:
+    # Backends rank hits so that a higher score is better and page through them by
+    # (score, id). Scores are recomputed on every page, so a cursor stays exact as
+    # long as the index does not change underneath it.
+    document_table = SearchDocument._meta.db_table
+
+    def build_query(self, terms):
+        raise NotImplementedError
+
+    def ranked_sql(self):
+        # Returns SQL selecting (id, score) for the documents matching one query parameter.
+        raise NotImplementedError
+
+    def search(self, query, kind=None, limit=10, after=None):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        params = [self.build_query(terms)]
+        conditions = []
+        if kind:
+            conditions.append('d.kind = %s')
+            params.append(kind)
+        if after:
+            score, pk = after
+            conditions.append('(r.score < %s OR (r.score = %s AND r.id < %s))')
+            params.extend([score, score, pk])
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        sql = (f'SELECT r.id, d.kind, d.object_id, r.score FROM ({self.ranked_sql()}) r '
+               f'INNER JOIN {self.document_table} d ON d.id = r.id {where} '
+               f'ORDER BY r.score DESC, r.id DESC LIMIT %s')
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [limit])
+            return [SearchHit(*row) for row in cursor.fetchall()]
+
+    def matching_ids(self, kind, query, limit=1000):
+        return [hit.object_id for hit in self.search(query, kind=kind, limit=limit)]
+
+    def rebuild(self):
+        pass
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    # FTS5 external-content table kept in sync with search_searchdocument by triggers.
+    index_table = 'search_index'
+
+    def build_query(self, terms):
+        # Every term is quoted, so user input can never inject FTS5 operators; the last
+        # one is a prefix so results show up while the user is still typing.
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def ranked_sql(self):
+        # bm25() is lower for better matches.
+        return (f'SELECT rowid AS id, -bm25({self.index_table}) AS score '
+                f'FROM {self.index_table} WHERE {self.index_table} MATCH %s')
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.index_table}({self.index_table}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {self.index_table}({self.index_table}) VALUES ('optimize')")
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    # Matches the GIN expression index created in migration 0002.
+    config = 'simple'
+
+    def build_query(self, terms):
+        quoted = [f"'{term}'" for term in terms]
+        quoted[-1] += ':*'
+        return ' & '.join(quoted)
+
+    def ranked_sql(self):
+        vector = f"to_tsvector('{self.config}', body)"
+        return (f"SELECT id, ts_rank_cd({vector}, query) AS score "
+                f"FROM {self.document_table}, to_tsquery('{self.config}', %s) query WHERE {vector} @@ query")
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend():
+    path = getattr(settings, 'SEARCH_BACKEND', None)
+    backend_class = import_string(path) if path else VENDOR_BACKENDS.get(connection.vendor)
+    return backend_class() if backend_class else None
@@ -0,0 +1,83 @@
+from django.conf import settings
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.posts.models import Post
+from instagram_apps.interactions.models import Comment
+from .models import SearchDocument
+from .backends import get_backend
+
+
+# What each indexed model contributes to the search index. Saves that only touch other
+# fields (counters, last_login, renditions) skip re-indexing.
+
+def post_body(post):
+    return post.caption or ''
+
+
+def comment_body(comment):
+    return comment.text or ''
+
+
+def user_body(user):
+    return ' '.join(filter(None, (user.username, user.first_name, user.last_name)))
+
+
+INDEXED_MODELS = {
+    SearchDocument.POST: (Post, ('caption',), post_body),
+    SearchDocument.COMMENT: (Comment, ('text',), comment_body),
+    SearchDocument.USER: (CustomUser, ('username', 'first_name', 'last_name'), user_body),
+}
+
+MODEL_KINDS = {model: kind for kind, (model, fields, body) in INDEXED_MODELS.items()}
+
+
+def get_batch_size():
+    return getattr(settings, 'SEARCH_INDEX_BATCH_SIZE', 500)
+
+
+def needs_indexing(instance, update_fields=None):
+    kind = MODEL_KINDS[type(instance)]
+    return update_fields is None or bool(set(update_fields) & set(INDEXED_MODELS[kind][1]))
+
+
+def index_instances(instances):
+    if not instances:
+        return
+    kind = MODEL_KINDS[type(instances[0])]
+    body = INDEXED_MODELS[kind][2]
+    documents, empty = [], []
+    for instance in instances:
+        text = body(instance).strip()
+        if text:
+            documents.append(SearchDocument(kind=kind, object_id=instance.pk, body=text))
+        else:
+            empty.append(instance.pk)
+    if documents:
+        SearchDocument.objects.bulk_create(documents, batch_size=get_batch_size(), update_conflicts=True,
+                                           unique_fields=['kind', 'object_id'], update_fields=['body', 'updated_at'])
+    if empty:
+        remove_documents(kind, empty)
+
+
+def remove_documents(kind, object_ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+def rebuild_index(batch_size=None):
+    batch_size = batch_size or get_batch_size()
+    SearchDocument.objects.all().delete()
+    indexed = 0
+    for kind, (model, fields, body) in INDEXED_MODELS.items():
+        batch = []
+        for instance in model.objects.only('pk', *fields).order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(instance)
+            if len(batch) >= batch_size:
+                index_instances(batch)
+                indexed += len(batch)
+                batch = []
+        index_instances(batch)
+        indexed += len(batch)
+    backend = get_backend()
+    if backend is not None:
+        backend.rebuild()
+    return indexed
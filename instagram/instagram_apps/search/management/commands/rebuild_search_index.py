@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from instagram_apps.search.documents import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for posts, comments and users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} search documents'))
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE search_index USING fts5("
+    "body, content='search_searchdocument', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER search_index_insert AFTER INSERT ON search_searchdocument BEGIN "
+    "INSERT INTO search_index(rowid, body) VALUES (new.id, new.body); END",
+    "CREATE TRIGGER search_index_delete AFTER DELETE ON search_searchdocument BEGIN "
+    "INSERT INTO search_index(search_index, rowid, body) VALUES ('delete', old.id, old.body); END",
+    "CREATE TRIGGER search_index_update AFTER UPDATE ON search_searchdocument BEGIN "
+    "INSERT INTO search_index(search_index, rowid, body) VALUES ('delete', old.id, old.body); "
+    "INSERT INTO search_index(rowid, body) VALUES (new.id, new.body); END",
+    "INSERT INTO search_index(search_index) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS search_index_update',
+    'DROP TRIGGER IF EXISTS search_index_delete',
+    'DROP TRIGGER IF EXISTS search_index_insert',
+    'DROP TABLE IF EXISTS search_index',
+]
+
+POSTGRES_INSTALL = [
+    "CREATE INDEX search_document_body_idx ON search_searchdocument USING GIN (to_tsvector('simple', body))",
+]
+
+POSTGRES_UNINSTALL = [
+    'DROP INDEX IF EXISTS search_document_body_idx',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRES_INSTALL}),
+            run({'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL}),
+        ),
+    ]
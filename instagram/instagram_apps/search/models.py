@@ -0,0 +1,28 @@
+from django.db import models
+
+
+# One row per indexed object. The database-specific inverted index (an FTS5 table on
+# SQLite, a GIN tsvector index on Postgres) is built over `body` by migration 0002.
+class SearchDocument(models.Model):
+    POST = 'post'
+    COMMENT = 'comment'
+    USER = 'user'
+
+    KIND_LIST = [
+        (POST, 'Post'),
+        (COMMENT, 'Comment'),
+        (USER, 'User'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_LIST)
+    object_id = models.PositiveBigIntegerField()
+    body = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.posts.models import Post
+from instagram_apps.interactions.models import Comment
+from instagram_space.utils.bulk import bulk_created
+from .documents import MODEL_KINDS, needs_indexing, index_instances, remove_documents
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=CustomUser)
+def index_saved_instance(sender, instance, update_fields=None, **kwargs):
+    if needs_indexing(instance, update_fields):
+        transaction.on_commit(lambda: index_instances([instance]))
+
+
+@receiver(bulk_created, sender=Post)
+def index_bulk_created_posts(sender, instances, **kwargs):
+    transaction.on_commit(lambda: index_instances(instances))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=CustomUser)
+def remove_deleted_instance(sender, instance, **kwargs):
+    remove_documents(MODEL_KINDS[sender], [instance.pk])
@@ -0,0 +1,159 @@
+from io import StringIO
+
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.users.admin import CustomUserAdmin
+from instagram_apps.posts.models import Post
+from instagram_apps.posts.admin import PostAdmin
+from instagram_apps.interactions.models import Comment
+from instagram_apps.followers.models import Follow
+from instagram_apps.search.models import SearchDocument
+from instagram_apps.search.backends import get_backend, SQLiteSearchBackend
+from instagram_apps.search.documents import rebuild_index
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = CustomUser.objects.create_user(username='sunny_coast', email='sunny@example.com',
+                                                       password='pass', first_name='Sunny')
+            self.post = Post.objects.create(user=self.user, caption='Sunset over the harbour')
+            self.other = Post.objects.create(user=self.user, caption='Morning coffee')
+            self.comment = Comment.objects.create(user=self.user, post=self.other, text='What a sunset!')
+
+    def ids(self, query, kind=None):
+        return [(hit.kind, hit.object_id) for hit in get_backend().search(query, kind=kind)]
+
+    def test_backend_matches_vendor(self):
+        self.assertIsInstance(get_backend(), SQLiteSearchBackend)
+        self.assertEqual(connection.vendor, 'sqlite')
+
+    def test_saves_are_indexed_incrementally(self):
+        self.assertEqual(set(self.ids('sunset')), {('post', self.post.pk), ('comment', self.comment.pk)})
+        self.assertEqual(self.ids('sunset', kind='post'), [('post', self.post.pk)])
+        self.assertEqual(self.ids('sunny_coast'), [('user', self.user.pk)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.caption = 'Harbour at night'
+            self.post.save()
+        self.assertEqual(self.ids('sunset'), [('comment', self.comment.pk)])
+        self.assertEqual(self.ids('night'), [('post', self.post.pk)])
+
+        self.comment.delete()
+        self.assertEqual(self.ids('sunset'), [])
+
+    def test_unrelated_saves_skip_indexing(self):
+        indexed_at = SearchDocument.objects.get(kind='post', object_id=self.post.pk).updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.views = 5
+            self.post.save(update_fields=['views'])
+        self.assertEqual(SearchDocument.objects.get(kind='post', object_id=self.post.pk).updated_at, indexed_at)
+
+    def test_prefix_matching_and_operator_injection(self):
+        self.assertEqual(self.ids('harb'), [('post', self.post.pk)])
+        self.assertEqual(self.ids('sunset OR coffee'), [])
+        self.assertEqual(self.ids('"coffee*'), [('post', self.other.pk)])
+        self.assertEqual(self.ids('coffee NEAR('), [])
+        self.assertEqual(self.ids('   '), [])
+
+    def test_ranked_by_relevance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            best = Post.objects.create(user=self.user, caption='sunset sunset sunset')
+        self.assertEqual(self.ids('sunset', kind='post')[0], ('post', best.pk))
+
+    def test_rebuild_command(self):
+        SearchDocument.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 4 search documents', out.getvalue())
+        self.assertEqual(self.ids('coffee'), [('post', self.other.pk)])
+        self.assertEqual(rebuild_index(), 4)
+
+    def test_admin_search_uses_index(self):
+        request = RequestFactory().get('/admin/')
+        admin = PostAdmin(Post, AdminSite())
+        queryset, duplicates = admin.get_search_results(request, Post.objects.all(), 'sunset')
+        self.assertEqual(list(queryset), [self.post])
+        self.assertFalse(duplicates)
+        queryset, _ = admin.get_search_results(request, Post.objects.all(), 'sunny_coast')
+        self.assertEqual(set(queryset), {self.post, self.other})
+        user_admin = CustomUserAdmin(CustomUser, AdminSite())
+        queryset, _ = user_admin.get_search_results(request, CustomUser.objects.all(), 'sunny@example.com')
+        self.assertEqual(list(queryset), [self.user])
+
+    @override_settings(SEARCH_ADMIN_MAX_RESULTS=1)
+    def test_admin_search_falls_back_instead_of_truncating(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            another = Post.objects.create(user=self.user, caption='Another sunset')
+        request = RequestFactory().get('/admin/')
+        queryset, _ = PostAdmin(Post, AdminSite()).get_search_results(request, Post.objects.all(), 'sunset')
+        self.assertEqual(set(queryset), {self.post, another})
+
+
+class SearchAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.viewer = CustomUser.objects.create_user(username='viewer', email='viewer@example.com', password='pass')
+            self.hidden = CustomUser.objects.create_user(username='hidden', email='hidden@example.com', password='pass',
+                                                         profile_status=CustomUser.PRIVATE_PROFILE)
+            self.posts = [Post.objects.create(user=self.viewer, caption='beach ' * (i + 1)) for i in range(3)]
+            self.private_post = Post.objects.create(user=self.hidden, caption='beach party')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.viewer)
+        self.url = reverse('search_apis:search')
+
+    def test_ranked_pages(self):
+        first = self.client.get(self.url, {'q': 'beach', 'type': 'post', 'page_size': 2}).data
+        self.assertEqual([row['object']['id'] for row in first['results']], [self.posts[2].pk, self.posts[1].pk])
+        self.assertGreaterEqual(first['results'][0]['score'], first['results'][1]['score'])
+        second = self.client.get(first['next']).data
+        self.assertEqual([row['object']['id'] for row in second['results']], [self.posts[0].pk])
+        self.assertIsNone(second['next'])
+
+    def test_hidden_hits_do_not_shorten_pages(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(4):
+                Post.objects.create(user=self.hidden, caption='beach ' * (i + 10))
+        first = self.client.get(self.url, {'q': 'beach', 'type': 'post', 'page_size': 2}).data
+        self.assertEqual([row['object']['id'] for row in first['results']], [self.posts[2].pk, self.posts[1].pk])
+        second = self.client.get(first['next']).data
+        self.assertEqual([row['object']['id'] for row in second['results']], [self.posts[0].pk])
+        self.assertIsNone(second['next'])
+
+    @override_settings(SEARCH_MAX_SCAN_BATCHES=1)
+    def test_scan_limit_resumes_after_hidden_hits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(4):
+                Post.objects.create(user=self.hidden, caption='beach ' * (i + 10))
+        response = self.client.get(self.url, {'q': 'beach', 'type': 'post', 'page_size': 2}).data
+        seen = [row['object']['id'] for row in response['results']]
+        while response['next']:
+            response = self.client.get(response['next']).data
+            seen += [row['object']['id'] for row in response['results']]
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+
+    def test_private_results_require_follow(self):
+        response = self.client.get(self.url, {'q': 'party'})
+        self.assertEqual(response.data['results'], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.viewer, following=self.hidden)
+        response = self.client.get(self.url, {'q': 'party'})
+        self.assertEqual([row['object']['id'] for row in response.data['results']], [self.private_post.pk])
+
+    def test_mixed_types(self):
+        response = self.client.get(self.url, {'q': 'hidden'})
+        self.assertEqual([(row['type'], row['object']['username']) for row in response.data['results']],
+                         [('user', 'hidden')])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': 'beach', 'type': 'story'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': 'beach', 'cursor': 'bogus'}).status_code, 404)
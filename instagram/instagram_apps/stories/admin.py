@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Story
+from .models import Story, ArchivedStory
 
 class StoryAdmin(admin.ModelAdmin):
     list_display = ('user', 'caption', 'created_at', 'views', 'image', 'video')
@@ -9,3 +9,12 @@ class StoryAdmin(admin.ModelAdmin):
     list_per_page = 20
 
 admin.site.register(Story, StoryAdmin)
+
+class ArchivedStoryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'caption', 'created_at', 'archived_at', 'views')
+    list_filter = ('created_at', 'archived_at')
+    search_fields = ('user__username', 'caption')
+    ordering = ('-created_at',)
+    list_per_page = 20
+
+admin.site.register(ArchivedStory, ArchivedStoryAdmin)
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class StoriesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'instagram_apps.stories'
+
+    def ready(self):
+        from django.conf import settings
+        from . import signals
+        from .scheduler import start_expiry_scheduler
+
+        interval = getattr(settings, 'STORY_PURGE_INTERVAL', None)
+        if interval:
+            start_expiry_scheduler(interval, archive=getattr(settings, 'STORY_PURGE_ARCHIVE', False))
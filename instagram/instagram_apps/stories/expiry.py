@@ -0,0 +1,50 @@
+import time
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Story, ArchivedStory
+from instagram_apps.uploads.blobs import retain_instances
+
+
+PurgeResult = namedtuple('PurgeResult', ['processed', 'batches', 'elapsed'])
+
+ARCHIVED_FIELDS = ('user_id', 'caption', 'image', 'video', 'created_at', 'views', 'like_count')
+
+
+def _delete_media(stories):
+    for story in stories:
+        for field in (story.image, story.video):
+            if field:
+                field.storage.delete(field.name)
+
+
+def purge_expired_stories(batch_size=500, archive=False, delete_media=True, now=None, max_batches=None):
+    # Each batch is its own short transaction, so locks are never held across the whole purge.
+    started = time.monotonic()
+    now = now or timezone.now()
+    processed = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            stories = list(
+                Story.expired_stories(now).order_by('created_at', 'id')
+                .only('id', *ARCHIVED_FIELDS)[:batch_size]
+            )
+            if not stories:
+                break
+            if archive:
+                archived = [ArchivedStory(original_id=story.id, **{name: getattr(story, name) for name in ARCHIVED_FIELDS})
+                            for story in stories]
+                ArchivedStory.objects.bulk_create(archived, ignore_conflicts=True)
+                # Archived copies share the stories' blobs, so they hold references of their own.
+                retain_instances(archived)
+            Story.objects.filter(id__in=[story.id for story in stories]).delete()
+
+        if delete_media and not archive:
+            _delete_media(stories)
+        processed += len(stories)
+        batches += 1
+
+    return PurgeResult(processed, batches, time.monotonic() - started)
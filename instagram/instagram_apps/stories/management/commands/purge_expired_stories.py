@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from instagram_apps.stories.expiry import purge_expired_stories
+
+
+class Command(BaseCommand):
+    help = 'Delete (or archive) stories older than the story lifetime in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, default=None)
+        parser.add_argument('--archive', action='store_true', help='Move expired stories to the archive instead of deleting them')
+        parser.add_argument('--keep-media', action='store_true', help='Do not delete media files of purged stories')
+
+    def handle(self, *args, **options):
+        result = purge_expired_stories(
+            batch_size=options['batch_size'],
+            archive=options['archive'],
+            delete_media=not options['keep_media'],
+            max_batches=options['max_batches'],
+        )
+        action = 'Archived' if options['archive'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {result.processed} expired stories in {result.batches} batches ({result.elapsed:.2f}s)'
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 14:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stories', '0002_created_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='story',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -5,22 +5,44 @@ from datetime import timedelta
 
 from instagram_apps.users.models import CustomUser
 
+
+class VisibleStoryManager(models.Manager):
+    # The lifetime cutoff is taken on every query, so the manager can be held in class attributes.
+    def get_queryset(self):
+        return super().get_queryset().filter(created_at__gte=timezone.now() - Story.LIFETIME)
+
+
 class Story(models.Model):
+    LIFETIME = timedelta(hours=24)
+
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
 
     caption = models.TextField(max_length=255, null=True, blank=True)
     image = models.ImageField(upload_to='story_images/', null=True, blank=True)
     video = models.FileField(upload_to='story_videos/', null=True, blank=True)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     views = models.PositiveIntegerField(default=0)
+    like_count = models.PositiveIntegerField(default=0)
+
+    objects = models.Manager()
+    visible = VisibleStoryManager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='story_created_id_idx'),
+            models.Index(fields=['created_at', 'user'], name='story_created_user_idx'),
+        ]
     
     @staticmethod
     def visible_stories():
-        time_limit = timezone.now() - timedelta(hours=24)
-        return Story.visible_stories().objects.filter(created_at__gte=time_limit)
+        return Story.visible.all()
+
+    @staticmethod
+    def expired_stories(now=None):
+        time_limit = (now or timezone.now()) - Story.LIFETIME
+        return Story.objects.filter(created_at__lt=time_limit)
 
     def clean(self):
         caption = self.caption.strip() if self.caption else ''
@@ -33,3 +55,25 @@ class Story(models.Model):
 
     def __str__(self):
         return f'{self.user.username}: {self.caption[:20]}'
+
+
+class ArchivedStory(models.Model):
+    user = models.ForeignKey(CustomUser, related_name='archived_stories', on_delete=models.CASCADE)
+    original_id = models.BigIntegerField(unique=True)
+
+    caption = models.TextField(max_length=255, null=True, blank=True)
+    image = models.ImageField(upload_to='story_images/', null=True, blank=True)
+    video = models.FileField(upload_to='story_videos/', null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    views = models.PositiveIntegerField(default=0)
+    like_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='archived_story_user_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user.username} (archived): {(self.caption or "")[:20]}'
@@ -0,0 +1,28 @@
+import logging
+import threading
+import time
+
+from django.db import close_old_connections
+
+from .expiry import purge_expired_stories
+
+
+logger = logging.getLogger(__name__)
+
+
+def start_expiry_scheduler(interval, **purge_options):
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                result = purge_expired_stories(**purge_options)
+                logger.info('Purged %s expired stories in %s batches (%.2fs)',
+                            result.processed, result.batches, result.elapsed)
+            except Exception:
+                logger.exception('Expired story purge failed')
+            finally:
+                close_old_connections()
+
+    thread = threading.Thread(target=run, name='story-expiry', daemon=True)
+    thread.start()
+    return thread
@@ -1,26 +1,43 @@
 from rest_framework import serializers 
 
 from .models import Story
-from instagram_apps.users.serializers import CustomUserSerializer
+from instagram_apps.users.serializers import UserSummarySerializer, UserProfileSerializer
+from instagram_apps.uploads.renditions import best_fit_url
+from instagram_space.utils.bulk import BulkCreateListSerializer
+from instagram_space.utils.fieldsets import SparseFieldsetMixin
 
-class StorySerializer(serializers.ModelSerializer):
-    user = CustomUserSerializer(read_only=True)
+class StorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    user = UserSummarySerializer(read_only=True)
     image_url = serializers.SerializerMethodField()
     video_url = serializers.SerializerMethodField()
+    poster_url = serializers.SerializerMethodField()
+    is_liked = serializers.SerializerMethodField()
   
     class Meta:
         model = Story
         fields = '__all__' 
+        required_fields = ('image', 'video', 'renditions')
+        read_only_fields = ('like_count', 'views')
+        list_serializer_class = BulkCreateListSerializer
+        expandable_fields = {'user': UserProfileSerializer}
     
     def get_image_url(self, object):
         if object.image:
-            return object.image.url
+            return best_fit_url(object, 'image', self.context) or object.image.url
         return None
     
     def get_video_url(self, object):
         if object.video:
             return object.video.url
         return None
+
+    def get_poster_url(self, object):
+        return best_fit_url(object, 'video', self.context, kind='poster')
+
+    def get_is_liked(self, object):
+        # Views put the viewer's liked ids for the whole page in the context (one query per page).
+        liked_ids = self.context.get('liked_ids')
+        return object.pk in liked_ids if liked_ids is not None else None
     
     def get_is_expired(self, obj):
-        return obj.is_expired()
\ No newline at end of file
+        return obj.is_expired()
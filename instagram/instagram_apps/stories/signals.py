@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Story
+from . import tray
+from instagram_space.utils.bulk import bulk_created
+from instagram_space.utils.detail_cache import invalidate_detail
+
+
+@receiver(post_save, sender=Story)
+def invalidate_trays_on_create(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: tray.invalidate_authors([instance.user_id]))
+
+
+@receiver(bulk_created, sender=Story)
+def invalidate_trays_on_bulk_create(sender, instances, **kwargs):
+    author_ids = {story.user_id for story in instances}
+    transaction.on_commit(lambda: tray.invalidate_authors(author_ids))
+
+
+@receiver(post_delete, sender=Story)
+def invalidate_trays_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: tray.invalidate_authors([instance.user_id]))
+
+
+@receiver(post_save, sender=Story)
+@receiver(post_delete, sender=Story)
+def invalidate_cached_detail(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_detail('story', pk))
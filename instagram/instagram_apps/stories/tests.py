@@ -1,14 +1,23 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.urls import reverse
+from django.core.cache import cache
 from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from rest_framework.test import APIClient
 
 from instagram_apps.users.models import CustomUser
-from instagram_apps.stories.models import Story
+from instagram_apps.stories.models import Story, ArchivedStory
+from instagram_apps.stories.expiry import purge_expired_stories
+from instagram_apps.followers.models import Follow
+from instagram_space.utils.testing import QueryCountAssertionsMixin
+from instagram_apps.interactions.counters import view_counter
 
 
-class StoryModelTest(TestCase):
+class StoryModelTest(QueryCountAssertionsMixin, TestCase):
 
     def setUp(self):
         self.user = CustomUser.objects.create_user(
@@ -71,3 +80,148 @@ class StoryModelTest(TestCase):
         story = Story(user=self.user)
         with self.assertRaises(ValidationError):
             story.save()
+
+    def test_story_list_cursor_pagination(self):
+        for i in range(3):
+            Story.objects.create(user=self.user, caption=f"Story {i}")
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(reverse('story_apis:open-profile-stories'), {'pagination': 'cursor', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        response = client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+    def test_story_list_has_no_n_plus_one(self):
+        for i in range(10):
+            user = CustomUser.objects.create_user(username=f'storyuser{i}', email=f'story{i}@example.com', password='pass')
+            Story.objects.create(user=user, caption=f"Story {i}")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.assertQueryCountIndependentOfPageSize(reverse('story_apis:open-profile-stories'))
+
+    def test_story_detail_records_view(self):
+        cache.clear()
+        story = Story.objects.create(user=self.user, caption="Viewed story")
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(reverse('story_apis:open_story_detail', args=[story.id]))
+        self.assertEqual(response.status_code, 200)
+        view_counter.flush()
+        story.refresh_from_db()
+        self.assertEqual(story.views, 1)
+
+    def test_bulk_create_stories(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        payload = [{'caption': 'First'}, {'caption': 'Second'}]
+        response = client.post(reverse('story_apis:create-multiple-stories'), payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Story.objects.filter(user=self.user).count(), 2)
+
+
+class StoryExpiryTest(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='expiring', email='expiring@example.com', password='pass')
+        self.fresh = Story.objects.create(user=self.user, caption="Fresh")
+        expired_at = timezone.now() - timedelta(hours=25)
+        for i in range(5):
+            story = Story.objects.create(user=self.user, caption=f"Old {i}")
+            Story.objects.filter(pk=story.pk).update(created_at=expired_at)
+
+    def test_purge_deletes_expired_stories_in_batches(self):
+        result = purge_expired_stories(batch_size=2)
+        self.assertEqual(result.processed, 5)
+        self.assertEqual(result.batches, 3)
+        self.assertEqual(list(Story.objects.all()), [self.fresh])
+
+    def test_purge_can_stop_after_max_batches(self):
+        result = purge_expired_stories(batch_size=2, max_batches=1)
+        self.assertEqual(result.processed, 2)
+        self.assertEqual(Story.objects.count(), 4)
+
+    def test_purge_archives_stories(self):
+        purge_expired_stories(archive=True)
+        self.assertEqual(ArchivedStory.objects.filter(user=self.user).count(), 5)
+        self.assertEqual(Story.objects.count(), 1)
+
+    @override_settings(BLOB_ORPHAN_GRACE=0)
+    def test_purge_deletes_media(self):
+        image = SimpleUploadedFile("expired.jpg", b"img", content_type="image/jpeg")
+        story = Story.objects.create(user=self.user, image=image)
+        Story.objects.filter(pk=story.pk).update(created_at=timezone.now() - timedelta(days=2))
+        storage, name = story.image.storage, story.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            purge_expired_stories()
+        self.assertFalse(storage.exists(name))
+
+    def test_purge_command_reports_counts(self):
+        out = StringIO()
+        call_command('purge_expired_stories', '--batch-size', '10', stdout=out)
+        self.assertIn('Deleted 5 expired stories in 1 batches', out.getvalue())
+
+
+class StoryTrayTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = CustomUser.objects.create_user(username='trayviewer', email='tray@example.com', password='pass')
+        self.open_user = CustomUser.objects.create_user(username='openuser', email='open@example.com', password='pass')
+        self.private_user = CustomUser.objects.create_user(
+            username='privateuser', email='private@example.com', password='pass', profile_status=CustomUser.PRIVATE_PROFILE)
+        self.hidden_user = CustomUser.objects.create_user(
+            username='hiddenuser', email='hidden@example.com', password='pass', profile_status=CustomUser.PRIVATE_PROFILE)
+        Follow.objects.create(follower=self.viewer, following=self.private_user)
+        Story.objects.create(user=self.open_user, caption="Open 1")
+        Story.objects.create(user=self.open_user, caption="Open 2")
+        Story.objects.create(user=self.private_user, caption="Private")
+        Story.objects.create(user=self.hidden_user, caption="Hidden")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.viewer)
+        self.url = reverse('story_apis:story-tray')
+
+    def test_tray_groups_stories_per_user(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        tray = {entry['username']: entry for entry in response.data['results']}
+        self.assertEqual(set(tray), {'openuser', 'privateuser'})
+        self.assertEqual(tray['openuser']['story_count'], 2)
+
+    def test_tray_is_cached(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_tray_is_invalidated_on_story_create(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Story.objects.create(user=self.open_user, caption="Open 3")
+        response = self.client.get(self.url)
+        tray = {entry['username']: entry for entry in response.data['results']}
+        self.assertEqual(tray['openuser']['story_count'], 3)
+
+    def test_story_write_only_retires_trays_that_include_the_author(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Story.objects.create(user=self.hidden_user, caption="Hidden 2")
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Story.objects.create(user=self.private_user, caption="Private 2")
+        response = self.client.get(self.url)
+        tray = {entry['username']: entry for entry in response.data['results']}
+        self.assertEqual(tray['privateuser']['story_count'], 2)
+
+    def test_follow_changes_rebuild_the_tray(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.viewer, following=self.hidden_user)
+        response = self.client.get(self.url)
+        self.assertIn('hiddenuser', {entry['username'] for entry in response.data['results']})
+
+    @override_settings(STORY_TRAY_LIMIT=2)
+    def test_tray_is_capped(self):
+        response = self.client.get(self.url)
+        self.assertEqual([entry['username'] for entry in response.data['results']], ['privateuser', 'openuser'])
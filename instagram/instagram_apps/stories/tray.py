@@ -0,0 +1,93 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import models
+
+from instagram_apps.users.models import CustomUser
+from .models import Story
+
+
+# A tray is the viewer's followed (and own) accounts with active stories, merged with the
+# most recent open-profile accounts. Every author has a version that is bumped when they
+# add or remove a story; a cached tray remembers the versions of the authors it covers,
+# so a story write only retires the trays of that author's followers (and the shared
+# open-profile part if the author is in it).
+
+def get_tray_timeout():
+    return getattr(settings, 'STORY_TRAY_CACHE_TIMEOUT', 30)
+
+
+def get_tray_limit():
+    return getattr(settings, 'STORY_TRAY_LIMIT', 100)
+
+
+def _author_key(author_id):
+    return f'story-tray:author:{author_id}'
+
+
+def author_versions(author_ids):
+    keys = {author_id: _author_key(author_id) for author_id in author_ids}
+    found = cache.get_many(keys.values())
+    return {author_id: found.get(key) for author_id, key in keys.items()}
+
+
+def invalidate_authors(author_ids):
+    version = time.time_ns()
+    cache.set_many({_author_key(author_id): version for author_id in author_ids}, timeout=None)
+
+
+def build_tray(owner_filter, limit):
+    rows = (
+        Story.visible_stories()
+        .filter(owner_filter)
+        .order_by()
+        .values('user_id', 'user__username', 'user__profile_picture')
+        .annotate(story_count=models.Count('id'), latest_story_at=models.Max('created_at'))
+        .order_by('-latest_story_at', '-user_id')[:limit]
+    )
+    return [
+        {
+            'user_id': row['user_id'],
+            'username': row['user__username'],
+            'profile_picture': default_storage.url(row['user__profile_picture']) if row['user__profile_picture'] else None,
+            'story_count': row['story_count'],
+            'latest_story_at': row['latest_story_at'],
+        }
+        for row in rows
+    ]
+
+
+def _cached_entries(key, build, author_ids=None):
+    # author_ids: the authors whose writes retire this entry; by default the ones it lists.
+    cached = cache.get(key)
+    if cached is not None:
+        tracked = author_ids if author_ids is not None else cached['versions'].keys()
+        if author_versions(tracked) == cached['versions']:
+            return cached['entries']
+    versions = author_versions(author_ids) if author_ids is not None else None
+    entries = build()
+    if versions is None:
+        versions = author_versions(entry['user_id'] for entry in entries)
+    cache.set(key, {'versions': versions, 'entries': entries}, timeout=get_tray_timeout())
+    return entries
+
+
+def get_story_tray(user, graph):
+    limit = get_tray_limit()
+    followed = _cached_entries(
+        f'story-tray:{user.pk}',
+        lambda: build_tray(graph.following_filter('user') | models.Q(user=user), limit),
+        author_ids=graph.following_ids | {user.pk},
+    )
+    # Open-profile accounts the viewer does not follow are shared by every viewer; new
+    # accounts appear when the entry expires, changes to listed ones retire it at once.
+    open_profiles = _cached_entries(
+        'story-tray:open',
+        lambda: build_tray(models.Q(user__profile_status=CustomUser.OPEN_PROFILE), limit),
+    )
+    seen = {entry['user_id'] for entry in followed}
+    tray = followed + [entry for entry in open_profiles if entry['user_id'] not in seen]
+    tray.sort(key=lambda entry: (entry['latest_story_at'], entry['user_id']), reverse=True)
+    return tray[:limit]
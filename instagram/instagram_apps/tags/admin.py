@@ -0,0 +1,37 @@
+from django.contrib import admin
+from .models import Hashtag, PostHashtag, CommentHashtag, Mention, HashtagTrend
+
+class HashtagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name',)
+    ordering = ('-created_at',)
+    list_per_page = 20
+
+class PostHashtagAdmin(admin.ModelAdmin):
+    list_display = ('hashtag', 'post', 'created_at')
+    raw_id_fields = ('hashtag', 'post')
+    ordering = ('-created_at',)
+    list_per_page = 20
+
+class CommentHashtagAdmin(admin.ModelAdmin):
+    list_display = ('hashtag', 'comment')
+    raw_id_fields = ('hashtag', 'comment')
+    list_per_page = 20
+
+class MentionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'post', 'comment', 'created_at')
+    raw_id_fields = ('user', 'post', 'comment')
+    ordering = ('-created_at',)
+    list_per_page = 20
+
+class HashtagTrendAdmin(admin.ModelAdmin):
+    list_display = ('hashtag', 'bucket', 'count')
+    raw_id_fields = ('hashtag',)
+    ordering = ('-bucket', '-count')
+    list_per_page = 20
+
+admin.site.register(Hashtag, HashtagAdmin)
+admin.site.register(PostHashtag, PostHashtagAdmin)
+admin.site.register(CommentHashtag, CommentHashtagAdmin)
+admin.site.register(Mention, MentionAdmin)
+admin.site.register(HashtagTrend, HashtagTrendAdmin)
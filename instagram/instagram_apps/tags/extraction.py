@@ -0,0 +1,98 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import models
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.posts.models import Post
+from instagram_apps.interactions.models import Comment
+from .models import Hashtag, PostHashtag, CommentHashtag, Mention
+from .parsing import extract_hashtags, extract_mentions
+from .trends import record_uses
+
+
+# Parsing stage for posts and comments: hashtags and @mentions in the text are kept in
+# join tables, diffed against what is already stored so an edit only touches the
+# tags that changed.
+
+def get_batch_size():
+    return getattr(settings, 'TAG_BATCH_SIZE', 500)
+
+
+def hashtag_ids(names):
+    if not names:
+        return {}
+    Hashtag.objects.bulk_create([Hashtag(name=name) for name in names], ignore_conflicts=True,
+                                batch_size=get_batch_size())
+    return dict(Hashtag.objects.filter(name__in=names).values_list('name', 'id'))
+
+
+def user_ids(usernames):
+    if not usernames:
+        return {}
+    return dict(CustomUser.objects.filter(username__in=usernames).values_list('username', 'id'))
+
+
+def sync_links(link_model, source_field, target_field, desired, defaults=None):
+    # desired maps each source id to the full set of target ids it should link to.
+    existing = defaultdict(set)
+    rows = link_model.objects.filter(**{f'{source_field}_id__in': list(desired)})
+    for source_id, target_id in rows.values_list(f'{source_field}_id', f'{target_field}_id'):
+        existing[source_id].add(target_id)
+
+    stale = models.Q()
+    added = []
+    for source_id, targets in desired.items():
+        removed = existing[source_id] - targets
+        if removed:
+            stale |= models.Q(**{f'{source_field}_id': source_id, f'{target_field}_id__in': removed})
+        for target_id in targets - existing[source_id]:
+            extra = defaults(source_id) if defaults else {}
+            added.append(link_model(**{f'{source_field}_id': source_id, f'{target_field}_id': target_id}, **extra))
+    if stale:
+        link_model.objects.filter(stale).delete()
+    link_model.objects.bulk_create(added, ignore_conflicts=True, batch_size=get_batch_size())
+    return added
+
+
+def _sync(instances, text_field, hashtag_model, source_field, defaults=None, record_trends=True):
+    tags = {instance.pk: extract_hashtags(getattr(instance, text_field)) for instance in instances}
+    mentions = {instance.pk: extract_mentions(getattr(instance, text_field)) for instance in instances}
+    tag_ids = hashtag_ids(set().union(*tags.values()))
+    mentioned_ids = user_ids(set().union(*mentions.values()))
+
+    added = sync_links(hashtag_model, source_field, 'hashtag',
+                       {pk: {tag_ids[name] for name in names} for pk, names in tags.items()}, defaults)
+    sync_links(Mention, source_field, 'user',
+               {pk: {mentioned_ids[name] for name in names if name in mentioned_ids} for pk, names in mentions.items()})
+    if record_trends:
+        record_uses(link.hashtag_id for link in added)
+
+
+def sync_post_tags(posts, record_trends=True):
+    if posts:
+        created_at = {post.pk: post.created_at for post in posts}
+        _sync(posts, 'caption', PostHashtag, 'post', lambda pk: {'created_at': created_at[pk]}, record_trends)
+
+
+def sync_comment_tags(comments, record_trends=True):
+    if comments:
+        _sync(comments, 'text', CommentHashtag, 'comment', record_trends=record_trends)
+
+
+def extract_all(batch_size=None):
+    # Backfill: existing uses are not current activity, so trends are left alone.
+    batch_size = batch_size or get_batch_size()
+    processed = 0
+    for queryset, sync in ((Post.objects.only('pk', 'caption', 'created_at'), sync_post_tags),
+                           (Comment.objects.only('pk', 'text'), sync_comment_tags)):
+        batch = []
+        for instance in queryset.order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(instance)
+            if len(batch) >= batch_size:
+                sync(batch, record_trends=False)
+                processed += len(batch)
+                batch = []
+        sync(batch, record_trends=False)
+        processed += len(batch)
+    return processed
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from instagram_apps.tags.extraction import extract_all
+
+
+class Command(BaseCommand):
+    help = 'Extract hashtags and mentions from every post caption and comment'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        processed = extract_all(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Extracted tags from {processed} posts and comments'))
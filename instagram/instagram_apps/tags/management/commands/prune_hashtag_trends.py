@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from instagram_apps.tags.trends import prune_trends
+
+
+class Command(BaseCommand):
+    help = 'Delete hashtag trend buckets older than TAG_TREND_RETENTION'
+
+    def handle(self, *args, **options):
+        pruned = prune_trends()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} hashtag trend buckets'))
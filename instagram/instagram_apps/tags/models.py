@@ -0,0 +1,83 @@
+from django.db import models
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.posts.models import Post
+from instagram_apps.interactions.models import Comment
+
+
+class Hashtag(models.Model):
+    # Names are stored normalized (NFKC, casefolded), see parsing.normalize_hashtag.
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostHashtag(models.Model):
+    post = models.ForeignKey(Post, related_name='post_hashtags', on_delete=models.CASCADE)
+    hashtag = models.ForeignKey(Hashtag, related_name='post_hashtags', on_delete=models.CASCADE)
+    # Copied from the post so the tag feed is served from one (hashtag, created_at) index.
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'hashtag'], name='unique_post_hashtag'),
+        ]
+        indexes = [
+            models.Index(fields=['hashtag', '-created_at', '-id'], name='post_hashtag_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.hashtag} on {self.post_id}'
+
+
+class CommentHashtag(models.Model):
+    comment = models.ForeignKey(Comment, related_name='comment_hashtags', on_delete=models.CASCADE)
+    hashtag = models.ForeignKey(Hashtag, related_name='comment_hashtags', on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['comment', 'hashtag'], name='unique_comment_hashtag'),
+        ]
+
+    def __str__(self):
+        return f'{self.hashtag} on comment {self.comment_id}'
+
+
+class Mention(models.Model):
+    user = models.ForeignKey(CustomUser, related_name='mentions', on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, related_name='mentions', on_delete=models.CASCADE, null=True, blank=True)
+    comment = models.ForeignKey(Comment, related_name='mentions', on_delete=models.CASCADE, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'user'], name='unique_post_mention'),
+            models.UniqueConstraint(fields=['comment', 'user'], name='unique_comment_mention'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='mention_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'@{self.user_id} in {"post " + str(self.post_id) if self.post_id else "comment " + str(self.comment_id)}'
+
+
+class HashtagTrend(models.Model):
+    # Uses of a tag per time bucket. Trending sums the buckets inside a rolling window;
+    # buckets older than TAG_TREND_RETENTION are pruned.
+    hashtag = models.ForeignKey(Hashtag, related_name='trends', on_delete=models.CASCADE)
+    bucket = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hashtag', 'bucket'], name='unique_hashtag_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket'], name='hashtag_trend_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.hashtag} x{self.count} at {self.bucket}'
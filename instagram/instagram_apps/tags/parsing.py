@@ -0,0 +1,23 @@
+import re
+import unicodedata
+
+
+HASHTAG_RE = re.compile(r'(?<![\w#&])#(\w{1,100})')
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.]{1,150})')
+
+
+def normalize_hashtag(name):
+    return unicodedata.normalize('NFKC', name).casefold()[:100]
+
+
+def extract_hashtags(text):
+    # Tags made only of digits (#1) are ordinary text, as on most platforms.
+    return {normalize_hashtag(name) for name in HASHTAG_RE.findall(text or '') if not name.isdigit()}
+
+
+def extract_mentions(text):
+    return {name.rstrip('.') for name in MENTION_RE.findall(text or '') if name.rstrip('.')}
+
+
+def has_markup(text):
+    return bool(text) and ('#' in text or '@' in text)
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from instagram_apps.posts.models import Post
+from instagram_apps.interactions.models import Comment
+from instagram_space.utils.bulk import bulk_created
+from .parsing import has_markup
+from .extraction import sync_post_tags, sync_comment_tags
+
+
+def needs_parsing(text, created, update_fields, field_name):
+    if update_fields is not None and field_name not in update_fields:
+        return False
+    # New text without # or @ has nothing to extract; edits may have removed tags.
+    return not created or has_markup(text)
+
+
+@receiver(post_save, sender=Post)
+def parse_post_caption(sender, instance, created, update_fields=None, **kwargs):
+    if needs_parsing(instance.caption, created, update_fields, 'caption'):
+        sync_post_tags([instance])
+
+
+@receiver(bulk_created, sender=Post)
+def parse_bulk_created_captions(sender, instances, **kwargs):
+    sync_post_tags([post for post in instances if has_markup(post.caption)])
+
+
+@receiver(post_save, sender=Comment)
+def parse_comment_text(sender, instance, created, update_fields=None, **kwargs):
+    if needs_parsing(instance.text, created, update_fields, 'text'):
+        sync_comment_tags([instance])
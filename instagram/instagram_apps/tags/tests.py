@@ -0,0 +1,126 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.posts.models import Post
+from instagram_apps.interactions.models import Comment
+from instagram_apps.followers.models import Follow
+from instagram_apps.tags.models import Hashtag, PostHashtag, CommentHashtag, Mention, HashtagTrend
+from instagram_apps.tags.parsing import extract_hashtags, extract_mentions
+from instagram_apps.tags.trends import record_uses, trending_hashtags, prune_trends, bucket_start
+from instagram_space.utils.testing import QueryCountAssertionsMixin
+
+
+class ParsingTests(TestCase):
+    def test_hashtags_are_normalized(self):
+        self.assertEqual(extract_hashtags('#Sunset and #SUNSET, #café_2 #1 a#b &#39; ##double'),
+                         {'sunset', 'café_2'})
+        self.assertEqual(extract_hashtags(None), set())
+
+    def test_mentions(self):
+        self.assertEqual(extract_mentions('hi @alice. and @bob.smith, mail a@b.com'), {'alice', 'bob.smith'})
+
+
+class TagExtractionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='author', email='author@example.com', password='pass')
+        self.alice = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pass')
+
+    def tags(self, post):
+        return set(PostHashtag.objects.filter(post=post).values_list('hashtag__name', flat=True))
+
+    def test_post_save_extracts_tags_and_mentions(self):
+        post = Post.objects.create(user=self.user, caption='#Beach day with @alice and @nobody')
+        self.assertEqual(self.tags(post), {'beach'})
+        self.assertEqual(PostHashtag.objects.get(post=post).created_at, post.created_at)
+        self.assertEqual(list(Mention.objects.filter(post=post).values_list('user__username', flat=True)), ['alice'])
+
+        post.caption = '#beach #sunset'
+        post.save()
+        self.assertEqual(self.tags(post), {'beach', 'sunset'})
+        self.assertFalse(Mention.objects.filter(post=post).exists())
+        self.assertEqual(Hashtag.objects.count(), 2)
+
+    def test_unrelated_saves_do_not_parse(self):
+        post = Post.objects.create(user=self.user, caption='#beach')
+        with CaptureQueriesContext(connection) as queries:
+            post.save(update_fields=['views'])
+            Post.objects.create(user=self.user, caption='no tags here')
+        self.assertFalse([query for query in queries.captured_queries if 'tags_' in query['sql']])
+
+    def test_comment_tags(self):
+        post = Post.objects.create(user=self.user, caption='plain')
+        comment = Comment.objects.create(user=self.user, post=post, text='@alice look #wow')
+        self.assertEqual(list(CommentHashtag.objects.filter(comment=comment).values_list('hashtag__name', flat=True)),
+                         ['wow'])
+        self.assertTrue(Mention.objects.filter(comment=comment, user=self.alice).exists())
+
+    def test_uses_are_counted_in_time_buckets(self):
+        Post.objects.create(user=self.user, caption='#beach')
+        Post.objects.create(user=self.user, caption='#beach #sun')
+        counts = dict(HashtagTrend.objects.values_list('hashtag__name', 'count'))
+        self.assertEqual(counts, {'beach': 2, 'sun': 1})
+        self.assertEqual(set(HashtagTrend.objects.values_list('bucket', flat=True)), {bucket_start()})
+
+    def test_trending_uses_rolling_window(self):
+        beach, sun = [Hashtag.objects.create(name=name) for name in ('beach', 'sun')]
+        now = timezone.now()
+        record_uses([beach.pk] * 3, now=now - timedelta(hours=30))
+        record_uses([sun.pk] * 2 + [beach.pk], now=now)
+        self.assertEqual(trending_hashtags(now=now), [{'name': 'sun', 'count': 2}, {'name': 'beach', 'count': 1}])
+        self.assertEqual(trending_hashtags(window=48 * 60 * 60, now=now)[0], {'name': 'beach', 'count': 4})
+        self.assertEqual(prune_trends(now=now + timedelta(days=7)), 1)
+
+    def test_extract_command_backfills_without_trends(self):
+        post = Post.objects.create(user=self.user, caption='old')
+        Post.objects.filter(pk=post.pk).update(caption='#legacy')
+        out = StringIO()
+        call_command('extract_tags', stdout=out)
+        self.assertIn('Extracted tags from 1 posts and comments', out.getvalue())
+        self.assertEqual(self.tags(post), {'legacy'})
+        self.assertFalse(HashtagTrend.objects.exists())
+
+
+class TagAPITests(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = CustomUser.objects.create_user(username='viewer', email='viewer@example.com', password='pass')
+        self.hidden = CustomUser.objects.create_user(username='hidden', email='hidden@example.com', password='pass',
+                                                     profile_status=CustomUser.PRIVATE_PROFILE)
+        self.posts = [Post.objects.create(user=self.viewer, caption=f'#Travel {i}') for i in range(4)]
+        self.private_post = Post.objects.create(user=self.hidden, caption='#travel secret')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.viewer)
+        self.url = reverse('tag_apis:feed', args=['TRAVEL'])
+
+    def test_feed_pages_newest_first(self):
+        first = self.client.get(self.url, {'page_size': 3}).data
+        self.assertEqual([row['id'] for row in first['results']], [post.pk for post in self.posts[:0:-1]])
+        second = self.client.get(first['next']).data
+        self.assertEqual([row['id'] for row in second['results']], [self.posts[0].pk])
+        self.assertIsNone(second['next'])
+        self.assertQueryCountIndependentOfPageSize(self.url, page_sizes=(1, 4))
+
+    def test_feed_hides_private_posts_until_followed(self):
+        self.assertNotIn(self.private_post.pk, [row['id'] for row in self.client.get(self.url).data['results']])
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.create(follower=self.viewer, following=self.hidden)
+        self.assertEqual(self.client.get(self.url).data['results'][0]['id'], self.private_post.pk)
+
+    def test_unknown_tag(self):
+        self.assertEqual(self.client.get(reverse('tag_apis:feed', args=['missing'])).status_code, 404)
+
+    def test_trending(self):
+        response = self.client.get(reverse('tag_apis:trending'))
+        self.assertEqual(response.data['results'], [{'name': 'travel', 'count': 5}])
+        self.assertEqual(self.client.get(reverse('tag_apis:trending'), {'hours': 'x'}).status_code, 400)
@@ -0,0 +1,71 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, models
+from django.utils import timezone
+
+from .models import HashtagTrend
+
+
+def get_bucket_size():
+    return getattr(settings, 'TAG_TREND_BUCKET_SECONDS', 60 * 60)
+
+
+def get_retention():
+    return timedelta(seconds=getattr(settings, 'TAG_TREND_RETENTION', 7 * 24 * 60 * 60))
+
+
+def get_trending_window():
+    return getattr(settings, 'TAG_TRENDING_WINDOW', 24 * 60 * 60)
+
+
+def bucket_start(now=None):
+    timestamp = int((now or timezone.now()).timestamp())
+    return datetime.fromtimestamp(timestamp - timestamp % get_bucket_size(), tz=dt_timezone.utc)
+
+
+def _column(name):
+    return connection.ops.quote_name(HashtagTrend._meta.get_field(name).column)
+
+
+def record_uses(hashtag_ids, now=None):
+    # One upsert per call adds the uses to the current bucket, so counters are never
+    # recomputed from the join tables.
+    counts = Counter(hashtag_ids)
+    if not counts:
+        return
+    bucket = HashtagTrend._meta.get_field('bucket').get_db_prep_value(bucket_start(now), connection)
+    table = connection.ops.quote_name(HashtagTrend._meta.db_table)
+    hashtag, bucket_column, count = _column('hashtag'), _column('bucket'), _column('count')
+    values = ', '.join(['(%s, %s, %s)'] * len(counts))
+    sql = (f'INSERT INTO {table} ({hashtag}, {bucket_column}, {count}) VALUES {values} '
+           f'ON CONFLICT ({hashtag}, {bucket_column}) DO UPDATE SET {count} = {table}.{count} + EXCLUDED.{count}')
+    params = []
+    for hashtag_id, uses in sorted(counts.items()):
+        params.extend([hashtag_id, bucket, uses])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def trending_hashtags(window=None, limit=None, now=None):
+    window = min(window or get_trending_window(), int(get_retention().total_seconds()))
+    limit = limit or getattr(settings, 'TAG_TRENDING_LIMIT', 20)
+    start = bucket_start((now or timezone.now()) - timedelta(seconds=window - get_bucket_size()))
+    key = f'tags:trending:{window}:{limit}:{int(start.timestamp())}'
+    trending = cache.get(key)
+    if trending is None:
+        trending = list(
+            HashtagTrend.objects.filter(bucket__gte=start).values('hashtag__name')
+            .annotate(count=models.Sum('count')).order_by('-count', 'hashtag__name')
+            .values_list('hashtag__name', 'count')[:limit]
+        )
+        trending = [{'name': name, 'count': count} for name, count in trending]
+        cache.set(key, trending, timeout=getattr(settings, 'TAG_TRENDING_CACHE_TIMEOUT', 60))
+    return trending
+
+
+def prune_trends(now=None):
+    cutoff = bucket_start((now or timezone.now()) - get_retention())
+    return HashtagTrend.objects.filter(bucket__lt=cutoff).delete()[0]
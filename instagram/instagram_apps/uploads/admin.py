@@ -0,0 +1,30 @@
+from django.contrib import admin
+from .models import MediaJob, UploadSession, Blob
+
+class MediaJobAdmin(admin.ModelAdmin):
+    list_display = ('content_type', 'object_id', 'field_name', 'status', 'attempts', 'created_at', 'updated_at')
+    list_filter = ('status', 'content_type')
+    search_fields = ('source_name',)
+    ordering = ('-created_at',)
+    list_per_page = 20
+
+admin.site.register(MediaJob, MediaJobAdmin)
+
+
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'target', 'filename', 'offset', 'total_size', 'status', 'created_at')
+    list_filter = ('status', 'target')
+    search_fields = ('filename', 'user__username')
+    ordering = ('-created_at',)
+    list_per_page = 20
+
+admin.site.register(UploadSession, UploadSessionAdmin)
+
+
+class BlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'ref_count', 'created_at', 'updated_at')
+    search_fields = ('name',)
+    ordering = ('-created_at',)
+    list_per_page = 20
+
+admin.site.register(Blob, BlobAdmin)
@@ -0,0 +1,162 @@
+import os
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.posts.models import Post
+from instagram_apps.stories.models import Story, ArchivedStory
+
+from .models import Blob
+
+
+BLOB_FIELDS = {
+    Post: ('image', 'video'),
+    Story: ('image', 'video'),
+    ArchivedStory: ('image', 'video'),
+    CustomUser: ('profile_picture',),
+}
+
+
+def get_blob_grace():
+    return getattr(settings, 'BLOB_ORPHAN_GRACE', 60 * 60)
+
+
+def blob_name(field, name):
+    if not name or not hasattr(field.storage, 'blob_name'):
+        return None
+    return field.storage.blob_name(name)
+
+
+def current_blob_names(instance):
+    # Read from __dict__ so deferred file fields are skipped instead of loaded.
+    names = {}
+    for field_name in BLOB_FIELDS[type(instance)]:
+        if field_name in instance.__dict__:
+            value = instance.__dict__[field_name]
+            names[field_name] = blob_name(instance._meta.get_field(field_name), getattr(value, 'name', value))
+    return names
+
+
+def _group_by_count(counts):
+    groups = defaultdict(list)
+    for name, count in counts.items():
+        groups[count].append(name)
+    return groups.items()
+
+
+def retain(counts):
+    counts = Counter({name: count for name, count in counts.items() if name})
+    if not counts:
+        return
+    Blob.objects.bulk_create([Blob(name=name) for name in counts], ignore_conflicts=True)
+    for count, names in _group_by_count(counts):
+        Blob.objects.filter(name__in=names).update(ref_count=models.F('ref_count') + count)
+
+
+def release(counts):
+    counts = Counter({name: count for name, count in counts.items() if name})
+    if not counts:
+        return
+    for count, names in _group_by_count(counts):
+        Blob.objects.filter(name__in=names).update(ref_count=Greatest(models.F('ref_count') - count, 0))
+    names = list(counts)
+    transaction.on_commit(lambda: collect_garbage(names))
+
+
+def sync_instances(instances):
+    retained, released = Counter(), Counter()
+    for instance in instances:
+        previous = getattr(instance, '_blob_names', {})
+        current = current_blob_names(instance)
+        for field_name, name in current.items():
+            if field_name in previous and previous[field_name] != name:
+                retained[name] += 1
+                released[previous[field_name]] += 1
+        instance._blob_names = current
+    retain(retained)
+    release(released)
+
+
+def retain_instances(instances):
+    retained = Counter()
+    for instance in instances:
+        instance._blob_names = current_blob_names(instance)
+        retained.update(name for name in instance._blob_names.values() if name)
+    retain(retained)
+
+
+def release_instances(instances):
+    released = Counter()
+    for instance in instances:
+        released.update(name for name in getattr(instance, '_blob_names', {}).values() if name)
+    release(released)
+
+
+def claim_blob(name):
+    # Called by the storage before it reuses an existing file. Touching the row keeps collect_garbage
+    # away from it until the saving row takes its reference in post_save.
+    if Blob.objects.filter(name=name).update(updated_at=timezone.now()):
+        return True
+    Blob.objects.bulk_create([Blob(name=name)], ignore_conflicts=True)
+    return False
+
+
+def collect_garbage(names=None, grace=None):
+    cutoff = timezone.now() - timedelta(seconds=get_blob_grace() if grace is None else grace)
+    # Blobs claimed within the grace period may belong to a save whose reference is not taken yet.
+    unreferenced = models.Q(ref_count=0, updated_at__lt=cutoff)
+    blobs = Blob.objects.filter(unreferenced)
+    if names is not None:
+        blobs = blobs.filter(name__in=names)
+    collected = 0
+    for pk, name in blobs.values_list('pk', 'name'):
+        # The row is removed first and only if it is still unreferenced, so a concurrent upload keeps its blob.
+        if Blob.objects.filter(unreferenced, pk=pk).delete()[0] and not Blob.objects.filter(name=name).exists():
+            default_storage.purge_blob(name)
+            collected += 1
+    return collected
+
+
+def count_references():
+    counts = Counter()
+    for model, field_names in BLOB_FIELDS.items():
+        fields = [model._meta.get_field(field_name) for field_name in field_names]
+        for row in model.objects.values_list(*field_names).iterator():
+            counts.update(blob_name(field, value) for field, value in zip(fields, row))
+    counts.pop(None, None)
+    return counts
+
+
+def reconcile_blobs(batch_size=1000):
+    counts = count_references()
+    Blob.objects.bulk_create([Blob(name=name) for name in counts], ignore_conflicts=True, batch_size=batch_size)
+    drifted = []
+    for blob in Blob.objects.only('pk', 'name', 'ref_count').iterator():
+        if blob.ref_count != counts.get(blob.name, 0):
+            blob.ref_count = counts.get(blob.name, 0)
+            drifted.append(blob)
+    Blob.objects.bulk_update(drifted, ['ref_count'], batch_size=batch_size)
+    return len(drifted)
+
+
+def purge_orphan_files(grace=None):
+    # Files with no Blob row are leftovers of failed saves; recent ones may belong to a save still in flight.
+    root = default_storage.blob_path(default_storage.blob_root)
+    known = set(Blob.objects.values_list('name', flat=True))
+    cutoff = time.time() - (get_blob_grace() if grace is None else grace)
+    purged = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, default_storage.location).replace(os.sep, '/')
+            if name not in known and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                purged += 1
+    return purged
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.core.files import File
+from django.db import transaction
+
+from instagram_apps.posts.models import Post
+from instagram_apps.stories.models import Story
+
+from .models import UploadSession
+
+
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, message, status_code=400, **extra):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.extra = extra
+
+
+def get_max_upload_size():
+    return getattr(settings, 'UPLOAD_MAX_SIZE', 2 * 1024 ** 3)
+
+
+def get_max_chunk_size():
+    return getattr(settings, 'UPLOAD_MAX_CHUNK_SIZE', 16 * 1024 ** 2)
+
+
+def get_session_ttl():
+    return timedelta(seconds=getattr(settings, 'UPLOAD_SESSION_TTL', 60 * 60 * 24))
+
+
+def get_video_extensions():
+    return getattr(settings, 'UPLOAD_VIDEO_EXTENSIONS', ('.mp4', '.mov', '.m4v', '.webm'))
+
+
+class PartialUploadFile(File):
+    # Exposing the on-disk path lets FileSystemStorage move the assembled file instead of copying it.
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def start_upload(user, filename, total_size, target=UploadSession.POST, checksum='', caption=None):
+    filename = os.path.basename(filename)
+    if os.path.splitext(filename)[1].lower() not in get_video_extensions():
+        raise UploadError('Unsupported video format')
+    if total_size <= 0 or total_size > get_max_upload_size():
+        raise UploadError('Invalid upload size', max_size=get_max_upload_size())
+
+    session = UploadSession.objects.create(user=user, target=target, filename=filename, total_size=total_size,
+                                           checksum=checksum.lower(), caption=caption)
+    os.makedirs(os.path.dirname(session.partial_path), exist_ok=True)
+    open(session.partial_path, 'wb').close()
+    return session
+
+
+def write_chunk(session, stream, offset, length, chunk_checksum=None):
+    if session.status != UploadSession.IN_PROGRESS:
+        raise UploadError('Upload is already complete', status_code=409)
+    if offset != session.offset:
+        raise UploadError('Offset mismatch', status_code=409, offset=session.offset)
+    if length <= 0 or length > get_max_chunk_size():
+        raise UploadError('Invalid chunk size', max_chunk_size=get_max_chunk_size())
+    if offset + length > session.total_size:
+        raise UploadError('Chunk exceeds declared upload size', offset=session.offset)
+
+    digest = hashlib.sha256()
+    written = 0
+    with open(session.partial_path, 'r+b') as partial:
+        partial.seek(offset)
+        try:
+            # The body is copied in small reads, so a chunk is never held in memory as a whole.
+            while written < length:
+                data = stream.read(min(READ_SIZE, length - written))
+                if not data:
+                    break
+                partial.write(data)
+                digest.update(data)
+                written += len(data)
+            if written != length:
+                raise UploadError('Chunk body is shorter than its Content-Length', offset=session.offset)
+            if chunk_checksum and digest.hexdigest() != chunk_checksum.lower():
+                raise UploadError('Chunk checksum mismatch', offset=session.offset)
+        except Exception:
+            partial.truncate(offset)
+            raise
+
+    # Moving the offset only from the value we started at keeps concurrent retries of the same chunk consistent.
+    if not UploadSession.objects.filter(pk=session.pk, offset=offset,
+                                        status=UploadSession.IN_PROGRESS).update(offset=offset + length):
+        session.refresh_from_db()
+        raise UploadError('Offset mismatch', status_code=409, offset=session.offset)
+    session.offset = offset + length
+    return session
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for data in iter(lambda: source.read(READ_SIZE), b''):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def _finished_instance(session):
+    instance = session.post or session.story
+    if instance is None:
+        raise UploadError(f'The uploaded {session.target} no longer exists', status_code=410)
+    return instance
+
+
+def claim_finish(session):
+    # Only one request may move the partial file: the conditional UPDATE picks the winner.
+    if UploadSession.objects.filter(pk=session.pk, status=UploadSession.IN_PROGRESS, offset=session.total_size) \
+            .update(status=UploadSession.FINISHING, updated_at=timezone.now()):
+        session.status = UploadSession.FINISHING
+        return True
+    session.refresh_from_db()
+    if session.status == UploadSession.COMPLETE:
+        return False
+    if session.status == UploadSession.FINISHING:
+        raise UploadError('Upload is already being finished', status_code=409)
+    raise UploadError('Upload is incomplete', status_code=409, offset=session.offset)
+
+
+def finish_upload(session):
+    if session.status == UploadSession.COMPLETE or not claim_finish(session):
+        return _finished_instance(session)
+
+    model = Post if session.target == UploadSession.POST else Story
+    instance = model(user=session.user, caption=session.caption)
+    try:
+        checksum = file_checksum(session.partial_path)
+        if session.checksum and checksum != session.checksum:
+            raise UploadError('Upload checksum mismatch', offset=session.offset)
+
+        with transaction.atomic():
+            with open(session.partial_path, 'rb') as partial:
+                instance.video.save(session.filename, PartialUploadFile(partial), save=False)
+            instance.save()
+            setattr(session, session.target, instance)
+            session.status = UploadSession.COMPLETE
+            session.checksum = checksum
+            session.save(update_fields=[session.target, 'status', 'checksum', 'updated_at'])
+    except Exception:
+        offset = _restore_partial(session, instance.video)
+        UploadSession.objects.filter(pk=session.pk, status=UploadSession.FINISHING).update(
+            status=UploadSession.IN_PROGRESS, offset=offset)
+        session.status, session.offset = UploadSession.IN_PROGRESS, offset
+        raise
+    return instance
+
+
+def _restore_partial(session, stored):
+    # Storing the video moves the partial file away, so a failure after that copies it
+    # back (the stored name may be a blob shared with other rows) and drops the stored
+    # copy. If nothing can be recovered the session restarts from offset 0.
+    if os.path.exists(session.partial_path):
+        return session.offset
+    if stored and stored.name and stored.storage.exists(stored.name):
+        with stored.storage.open(stored.name, 'rb') as source, open(session.partial_path, 'wb') as partial:
+            shutil.copyfileobj(source, partial)
+        stored.storage.delete(stored.name)
+        return session.offset
+    open(session.partial_path, 'wb').close()
+    return 0
+
+
+def abort_upload(session):
+    if session.status == UploadSession.FINISHING:
+        raise UploadError('Upload is already being finished', status_code=409)
+    if os.path.exists(session.partial_path):
+        os.remove(session.partial_path)
+    session.delete()
+
+
+def purge_stale_uploads(now=None):
+    cutoff = (now or timezone.now()) - get_session_ttl()
+    # Sessions left FINISHING by a crashed request are stale too.
+    stale = UploadSession.objects.filter(status__in=[UploadSession.IN_PROGRESS, UploadSession.FINISHING],
+                                         updated_at__lt=cutoff)
+    purged = 0
+    for session in stale.iterator():
+        abort_upload(session)
+        purged += 1
+    return purged
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from instagram_apps.uploads.blobs import collect_garbage, reconcile_blobs, purge_orphan_files
+
+
+class Command(BaseCommand):
+    help = 'Delete content-addressed media blobs that no post, story or profile references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reconcile', action='store_true',
+                            help='Recount references from the model tables before collecting')
+        parser.add_argument('--grace', type=int, default=None,
+                            help='Seconds a newly claimed or untracked blob is kept before it is collected')
+
+    def handle(self, *args, **options):
+        if options['reconcile']:
+            drifted = reconcile_blobs()
+            self.stdout.write(f'Corrected {drifted} blob reference counts')
+        collected = collect_garbage(grace=options['grace'])
+        orphans = purge_orphan_files(grace=options['grace'])
+        self.stdout.write(self.style.SUCCESS(f'Collected {collected} unreferenced blobs and {orphans} orphan files'))
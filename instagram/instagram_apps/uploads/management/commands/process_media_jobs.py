@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from instagram_apps.uploads.pipeline import run_pending_jobs, run_worker
+
+
+class Command(BaseCommand):
+    help = 'Produce image renditions and video poster frames for queued uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--once', action='store_true', help='Process the current queue and exit')
+        parser.add_argument('--poll-interval', type=float, default=2)
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = run_pending_jobs(workers=options['workers'])
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} media jobs'))
+            return
+        self.stdout.write('Waiting for media jobs...')
+        run_worker(workers=options['workers'], poll_interval=options['poll_interval'])
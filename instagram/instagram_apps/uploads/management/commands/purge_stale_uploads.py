@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from instagram_apps.uploads.chunked import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Delete chunked upload sessions that were abandoned before finishing'
+
+    def handle(self, *args, **options):
+        purged = purge_stale_uploads()
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} stale upload sessions'))
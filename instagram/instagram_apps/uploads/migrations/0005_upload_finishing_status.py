@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0004_media_job_lease'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('in_progress', 'In progress'), ('finishing', 'Finishing'), ('complete', 'Complete')], default='in_progress', max_length=15),
+        ),
+    ]
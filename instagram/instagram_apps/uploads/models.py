@@ -0,0 +1,109 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.posts.models import Post
+from instagram_apps.stories.models import Story
+
+
+class MediaJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUS_LIST = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+]
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    target = GenericForeignKey('content_type', 'object_id')
+    field_name = models.CharField(max_length=50)
+    source_name = models.CharField(max_length=255)
+
+    status = models.CharField(max_length=10, choices=STATUS_LIST, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='media_job_status_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id', 'field_name', 'source_name'],
+                                    name='unique_media_job_source'),
+        ]
+
+    def __str__(self):
+        return f'{self.content_type.model} {self.object_id} {self.field_name}: {self.status}'
+
+
+class UploadSession(models.Model):
+    POST = 'post'
+    STORY = 'story'
+
+    TARGET_LIST = [
+        (POST, 'Post'),
+        (STORY, 'Story'),
+]
+    IN_PROGRESS = 'in_progress'
+    FINISHING = 'finishing'
+    COMPLETE = 'complete'
+
+    STATUS_LIST = [
+        (IN_PROGRESS, 'In progress'),
+        (FINISHING, 'Finishing'),
+        (COMPLETE, 'Complete'),
+]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, related_name='upload_sessions', on_delete=models.CASCADE)
+    target = models.CharField(max_length=10, choices=TARGET_LIST, default=POST)
+    filename = models.CharField(max_length=255)
+    caption = models.TextField(max_length=255, null=True, blank=True)
+    total_size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    checksum = models.CharField(max_length=64, blank=True, default='')
+
+    status = models.CharField(max_length=15, choices=STATUS_LIST, default=IN_PROGRESS)
+    post = models.ForeignKey(Post, null=True, blank=True, on_delete=models.SET_NULL)
+    story = models.ForeignKey(Story, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def partial_path(self):
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', 'partial', f'{self.id}.part')
+
+    def __str__(self):
+        return f'{self.user.username}: {self.filename} ({self.offset}/{self.total_size})'
+
+
+class Blob(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at'], name='blob_ref_count_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.ref_count})'
@@ -0,0 +1,155 @@
+import logging
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, models, transaction
+from django.utils import timezone
+
+from .models import MediaJob
+from .renditions import extract_poster_frame, render_image, rendition_prefix
+from instagram_space.utils.detail_cache import invalidate_detail
+
+
+logger = logging.getLogger(__name__)
+
+MEDIA_FIELDS = ('image', 'video')
+
+
+def get_max_attempts():
+    return getattr(settings, 'MEDIA_JOB_MAX_ATTEMPTS', 3)
+
+
+def get_lease_timeout():
+    return getattr(settings, 'MEDIA_JOB_LEASE_TIMEOUT', 15 * 60)
+
+
+def needs_processing(instance, field_name):
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return False
+    meta = (instance.renditions or {}).get(field_name) or {}
+    return meta.get('source') != field_file.name
+
+
+def enqueue_media(instances):
+    jobs = []
+    for instance in instances:
+        content_type = ContentType.objects.get_for_model(instance)
+        for field_name in MEDIA_FIELDS:
+            if needs_processing(instance, field_name):
+                jobs.append(MediaJob(content_type=content_type, object_id=instance.pk,
+                                     field_name=field_name, source_name=getattr(instance, field_name).name))
+    if jobs:
+        MediaJob.objects.bulk_create(jobs, ignore_conflicts=True)
+        if getattr(settings, 'MEDIA_PROCESSING_IN_PROCESS', False):
+            transaction.on_commit(lambda: get_executor().submit(run_pending_jobs))
+    return len(jobs)
+
+
+def requeue_stale_jobs(now=None):
+    # A claim is a lease: jobs left RUNNING by a worker that died are retried, or failed
+    # once they have used up their attempts.
+    expired = MediaJob.objects.filter(
+        status=MediaJob.RUNNING, claimed_at__lt=(now or timezone.now()) - timedelta(seconds=get_lease_timeout()))
+    failed = expired.filter(attempts__gte=get_max_attempts()).update(
+        status=MediaJob.FAILED, error='lease expired', claimed_at=None)
+    requeued = expired.update(status=MediaJob.PENDING, error='lease expired', claimed_at=None)
+    return requeued + failed
+
+
+def claim_jobs(limit):
+    # A conditional UPDATE per job claims it atomically on every backend, without row locks.
+    claimed = []
+    candidates = MediaJob.objects.filter(status=MediaJob.PENDING).order_by('created_at').values_list('pk', flat=True)
+    for pk in candidates[:limit]:
+        if MediaJob.objects.filter(pk=pk, status=MediaJob.PENDING).update(
+                status=MediaJob.RUNNING, attempts=models.F('attempts') + 1, claimed_at=timezone.now()):
+            claimed.append(pk)
+    return list(MediaJob.objects.filter(pk__in=claimed).select_related('content_type'))
+
+
+def process_field(instance, field_name):
+    field_file = getattr(instance, field_name)
+    storage = field_file.storage
+    prefix = rendition_prefix(instance, field_name, field_file.name)
+
+    if field_name == 'image':
+        with storage.open(field_file.name, 'rb') as source:
+            meta = render_image(source, storage, prefix)
+    else:
+        meta = {'poster': []}
+        poster = extract_poster_frame(storage.path(field_file.name))
+        if poster is not None:
+            poster_meta = render_image(poster, storage, f'{prefix}-poster')
+            meta = {'width': poster_meta['width'], 'height': poster_meta['height'],
+                    'poster': poster_meta['renditions']}
+
+    meta['source'] = field_file.name
+    return meta
+
+
+def process_job(job):
+    model = job.content_type.model_class()
+    instance = model.objects.filter(pk=job.object_id).first()
+    if instance is None or getattr(instance, job.field_name).name != job.source_name:
+        # The object was deleted or its media replaced; a newer job covers the new file.
+        MediaJob.objects.filter(pk=job.pk).update(status=MediaJob.DONE, error='stale')
+        return False
+
+    try:
+        meta = process_field(instance, job.field_name)
+    except Exception as exc:
+        logger.exception('Media job %s failed', job.pk)
+        status = MediaJob.FAILED if job.attempts >= get_max_attempts() else MediaJob.PENDING
+        MediaJob.objects.filter(pk=job.pk).update(status=status, error=str(exc))
+        return False
+
+    with transaction.atomic():
+        # Only the renditions column is written, so model saves and their signals are not re-run.
+        current = model.objects.select_for_update().filter(pk=instance.pk).values_list('renditions', flat=True).first()
+        renditions = dict(current or {})
+        renditions[job.field_name] = meta
+        model.objects.filter(pk=instance.pk).update(renditions=renditions)
+        MediaJob.objects.filter(pk=job.pk).update(status=MediaJob.DONE, error='')
+        transaction.on_commit(lambda: invalidate_detail(model._meta.model_name, instance.pk))
+    return True
+
+
+def _process_in_thread(job):
+    try:
+        return process_job(job)
+    finally:
+        close_old_connections()
+
+
+def run_pending_jobs(workers=None, batch_size=None):
+    workers = workers or getattr(settings, 'MEDIA_PROCESSING_WORKERS', 2)
+    batch_size = batch_size or workers * 4
+    processed = 0
+    requeue_stale_jobs()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            jobs = claim_jobs(batch_size)
+            if not jobs:
+                return processed
+            processed += sum(1 for done in pool.map(_process_in_thread, jobs) if done)
+
+
+def run_worker(workers=None, poll_interval=2):
+    while True:
+        if not run_pending_jobs(workers=workers):
+            time.sleep(poll_interval)
+        close_old_connections()
+
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='media-pipeline')
+    return _executor
@@ -0,0 +1,142 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+
+def get_rendition_widths():
+    return getattr(settings, 'MEDIA_RENDITION_WIDTHS', (320, 640, 1080))
+
+
+def get_default_width():
+    return getattr(settings, 'MEDIA_DEFAULT_RENDITION_WIDTH', 1080)
+
+
+def rendition_prefix(instance, field_name, source_name):
+    # The source digest makes every rendition name immutable: a new upload gets new names.
+    digest = hashlib.sha256(source_name.encode()).hexdigest()[:12]
+    return f'renditions/{instance._meta.label_lower.replace(".", "/")}/{instance.pk}/{field_name}-{digest}'
+
+
+def render_image(source, storage, prefix):
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        original_width, original_height = image.size
+
+        renditions = []
+        for width in sorted(set(get_rendition_widths())):
+            target_width = min(width, original_width)
+            target_height = max(1, round(original_height * target_width / original_width))
+            resized = image.resize((target_width, target_height), Image.LANCZOS)
+            buffer = BytesIO()
+            resized.save(buffer, format='WEBP', quality=getattr(settings, 'MEDIA_WEBP_QUALITY', 80), method=4)
+            name = f'{prefix}-{target_width}.webp'
+            # Rendition names are derived from the source, so re-processing overwrites instead of piling up copies.
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(name, ContentFile(buffer.getvalue()))
+            renditions.append({
+                'width': target_width,
+                'height': target_height,
+                'format': 'webp',
+                'name': name,
+                'size': buffer.tell(),
+            })
+            if width >= original_width:
+                break
+
+    return {'width': original_width, 'height': original_height, 'renditions': renditions}
+
+
+def extract_poster_frame(video_path, offset=1.0):
+    ffmpeg = shutil.which(getattr(settings, 'MEDIA_FFMPEG_BINARY', 'ffmpeg'))
+    if ffmpeg is None:
+        return None
+    handle, poster_path = tempfile.mkstemp(suffix='.png')
+    os.close(handle)
+    try:
+        subprocess.run(
+            [ffmpeg, '-y', '-loglevel', 'error', '-ss', str(offset), '-i', video_path, '-frames:v', '1', poster_path],
+            check=True, timeout=getattr(settings, 'MEDIA_FFMPEG_TIMEOUT', 60),
+        )
+        if os.path.getsize(poster_path) == 0 and offset:
+            # Clips shorter than the offset produce no frame; take the first one instead.
+            os.remove(poster_path)
+            return extract_poster_frame(video_path, offset=0)
+        with open(poster_path, 'rb') as poster:
+            return BytesIO(poster.read())
+    finally:
+        if os.path.exists(poster_path):
+            os.remove(poster_path)
+
+
+def best_fit(renditions, width):
+    candidates = sorted(renditions, key=lambda rendition: rendition['width'])
+    for rendition in candidates:
+        if rendition['width'] >= width:
+            return rendition
+    return candidates[-1] if candidates else None
+
+
+def requested_width(context):
+    request = context.get('request')
+    width = context.get('image_width')
+    if width is None and request is not None:
+        width = request.query_params.get('image_width') if hasattr(request, 'query_params') else None
+    try:
+        return int(width)
+    except (TypeError, ValueError):
+        return get_default_width()
+
+
+def snap_width(width):
+    # The smallest configured width that covers the request, so arbitrary widths share cache entries.
+    widths = sorted(get_rendition_widths())
+    for candidate in widths:
+        if candidate >= width:
+            return candidate
+    return widths[-1] if widths else width
+
+
+def best_fit_url(instance, field_name, context, kind='renditions'):
+    meta = (instance.renditions or {}).get(field_name) or {}
+    field_file = getattr(instance, field_name)
+    if not field_file or meta.get('source') != field_file.name:
+        return None
+    rendition = best_fit(meta.get(kind) or [], requested_width(context))
+    if rendition is None:
+        return None
+    return field_file.storage.url(rendition['name'])
+
+
+def rendition_names(meta):
+    return [rendition['name'] for kind in ('renditions', 'poster') for rendition in meta.get(kind) or []]
+
+
+def stale_rendition_names(instance, deleted=False):
+    # Renditions of media that was replaced or removed, or of every field once the row is deleted.
+    if 'renditions' not in instance.__dict__:
+        return []
+    names = []
+    for field_name, meta in (instance.renditions or {}).items():
+        if deleted:
+            names += rendition_names(meta)
+        elif field_name in instance.__dict__:
+            # Deferred file fields are skipped rather than loaded.
+            field_file = instance.__dict__[field_name]
+            if meta.get('source') != (getattr(field_file, 'name', field_file) or None):
+                names += rendition_names(meta)
+    return names
+
+
+def delete_renditions(storage, names):
+    for name in names:
+        storage.delete(name)
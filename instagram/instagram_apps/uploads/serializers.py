@@ -0,0 +1,13 @@
+from rest_framework import serializers
+
+from .models import UploadSession
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    checksum = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False, allow_blank=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ('id', 'target', 'filename', 'caption', 'total_size', 'offset', 'checksum',
+                  'status', 'post', 'story', 'created_at', 'updated_at')
+        read_only_fields = ('offset', 'status', 'post', 'story')
@@ -0,0 +1,66 @@
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.posts.models import Post
+from instagram_apps.stories.models import Story, ArchivedStory
+from instagram_space.utils.bulk import bulk_created
+from .pipeline import enqueue_media, needs_processing, MEDIA_FIELDS
+from .blobs import current_blob_names, sync_instances, release_instances
+from .renditions import stale_rendition_names, delete_renditions
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Story)
+def enqueue_uploaded_media(sender, instance, **kwargs):
+    if any(needs_processing(instance, field_name) for field_name in MEDIA_FIELDS):
+        transaction.on_commit(lambda: enqueue_media([instance]))
+
+
+@receiver(bulk_created, sender=Post)
+@receiver(bulk_created, sender=Story)
+def process_bulk_created_media(sender, instances, **kwargs):
+    sync_instances(instances)
+    transaction.on_commit(lambda: enqueue_media(instances))
+
+
+@receiver(post_init, sender=Post)
+@receiver(post_init, sender=Story)
+@receiver(post_init, sender=ArchivedStory)
+@receiver(post_init, sender=CustomUser)
+def remember_blobs(sender, instance, **kwargs):
+    instance._blob_names = current_blob_names(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Story)
+@receiver(post_save, sender=ArchivedStory)
+@receiver(post_save, sender=CustomUser)
+def count_blob_references(sender, instance, **kwargs):
+    sync_instances([instance])
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Story)
+@receiver(post_delete, sender=ArchivedStory)
+@receiver(post_delete, sender=CustomUser)
+def release_blob_references(sender, instance, **kwargs):
+    release_instances([instance])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Story)
+def delete_replaced_renditions(sender, instance, **kwargs):
+    names = stale_rendition_names(instance)
+    if names:
+        transaction.on_commit(lambda: delete_renditions(default_storage, names))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Story)
+def delete_renditions_of_deleted(sender, instance, **kwargs):
+    names = stale_rendition_names(instance, deleted=True)
+    if names:
+        transaction.on_commit(lambda: delete_renditions(default_storage, names))
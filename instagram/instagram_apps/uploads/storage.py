@@ -0,0 +1,93 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+
+
+HASH_NAME_RE = re.compile(r'^[0-9a-f]{64}(\.[a-z0-9]{1,10})?$')
+EXTENSION_RE = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    # Files are named after the sha256 of their content. Names keep their upload_to
+    # prefix (post_images/<sha>.jpg), but every name with the same content resolves
+    # to one blob on disk (blobs/ab/cd/<sha>.jpg), so duplicates are stored once.
+    blob_root = 'blobs'
+
+    def is_content_addressed(self, name):
+        excluded = getattr(settings, 'MEDIA_CAS_EXCLUDED_PREFIXES', ('renditions/', 'uploads/'))
+        return not name.startswith(tuple(excluded))
+
+    def blob_name(self, name):
+        basename = posixpath.basename(name)
+        if not self.is_content_addressed(name) or not HASH_NAME_RE.match(basename):
+            return None
+        return posixpath.join(self.blob_root, basename[:2], basename[2:4], basename)
+
+    def blob_path(self, blob_name):
+        return super().path(blob_name)
+
+    def path(self, name):
+        return super().path(self.blob_name(name) or name)
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content, so the uploaded name never collides.
+        if self.is_content_addressed(name):
+            return name
+        return super().get_available_name(name, max_length=max_length)
+
+    def _save(self, name, content):
+        if not self.is_content_addressed(name):
+            return super()._save(name, content)
+
+        digest = hashlib.sha256()
+        if hasattr(content, 'temporary_file_path'):
+            # Large uploads already sit on disk: hash them in place and move them, never copy.
+            source_path = content.temporary_file_path()
+            with open(source_path, 'rb') as source:
+                for chunk in iter(lambda: source.read(content.DEFAULT_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+        else:
+            temp_dir = self.blob_path(posixpath.join(self.blob_root, 'tmp'))
+            os.makedirs(temp_dir, exist_ok=True)
+            handle, source_path = tempfile.mkstemp(dir=temp_dir)
+            with os.fdopen(handle, 'wb') as temp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+
+        extension = os.path.splitext(name)[1].lower()
+        extension = extension if EXTENSION_RE.match(extension) else ''
+        final_name = posixpath.join(posixpath.dirname(name), digest.hexdigest() + extension)
+        final_path = self.path(final_name)
+
+        # The Blob row is claimed before the file is reused, so garbage collection cannot
+        # delete it between this check and the reference taken when the row is saved.
+        from .blobs import claim_blob
+        if claim_blob(self.blob_name(final_name)) and os.path.exists(final_path):
+            os.remove(source_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            file_move_safe(source_path, final_path, allow_overwrite=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(final_path, self.file_permissions_mode)
+        return final_name
+
+    def delete(self, name):
+        # Blobs may be shared by several rows; they are removed by reference counting instead.
+        if self.blob_name(name):
+            return
+        super().delete(name)
+
+    def purge_blob(self, blob_name):
+        try:
+            os.remove(self.blob_path(blob_name))
+        except FileNotFoundError:
+            pass
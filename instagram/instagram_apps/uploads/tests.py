@@ -0,0 +1,456 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import mock
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.posts.models import Post
+from instagram_apps.posts.serializers import PostSerializer
+from instagram_apps.stories.models import Story
+from instagram_apps.stories.expiry import purge_expired_stories
+from instagram_apps.uploads.models import MediaJob, UploadSession, Blob
+from instagram_apps.uploads.blobs import collect_garbage, reconcile_blobs
+from instagram_apps.uploads.pipeline import claim_jobs, process_job, requeue_stale_jobs
+from instagram_apps.uploads.renditions import best_fit
+
+
+def make_image(name='photo.png', size=(2000, 1000)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color=(200, 30, 30)).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class MediaPipelineTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='uploader', email='uploader@example.com', password='pass')
+
+    def create_post(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(user=self.user, **fields)
+
+    def run_jobs(self):
+        return [process_job(job) for job in claim_jobs(10)]
+
+    def test_upload_enqueues_job(self):
+        post = self.create_post(image=make_image())
+        job = MediaJob.objects.get()
+        self.assertEqual(job.object_id, post.pk)
+        self.assertEqual(job.field_name, 'image')
+        self.assertEqual(job.status, MediaJob.PENDING)
+
+    def test_caption_only_post_enqueues_nothing(self):
+        self.create_post(caption='Just text')
+        self.assertFalse(MediaJob.objects.exists())
+
+    def test_job_records_webp_renditions(self):
+        post = self.create_post(image=make_image())
+        self.assertEqual(self.run_jobs(), [True])
+        post.refresh_from_db()
+        meta = post.renditions['image']
+        self.assertEqual(meta['source'], post.image.name)
+        self.assertEqual([r['width'] for r in meta['renditions']], [320, 640, 1080])
+        self.assertTrue(all(r['name'].endswith('.webp') for r in meta['renditions']))
+        self.assertEqual(MediaJob.objects.get().status, MediaJob.DONE)
+
+    def test_small_images_are_not_upscaled(self):
+        post = self.create_post(image=make_image(size=(400, 300)))
+        self.run_jobs()
+        post.refresh_from_db()
+        self.assertEqual([r['width'] for r in post.renditions['image']['renditions']], [320, 400])
+
+    def test_claimed_jobs_are_not_claimed_twice(self):
+        self.create_post(image=make_image())
+        self.assertEqual(len(claim_jobs(10)), 1)
+        self.assertEqual(claim_jobs(10), [])
+
+    def test_image_url_returns_best_fit_rendition(self):
+        post = self.create_post(image=make_image())
+        self.run_jobs()
+        post.refresh_from_db()
+        url = PostSerializer(post, context={'image_width': 500}).data['image_url']
+        self.assertTrue(url.endswith('-640.webp'))
+        url = PostSerializer(post, context={'image_width': 5000}).data['image_url']
+        self.assertTrue(url.endswith('-1080.webp'))
+
+    def test_image_url_falls_back_to_original(self):
+        post = self.create_post(image=make_image())
+        self.assertEqual(PostSerializer(post).data['image_url'], post.image.url)
+
+    def test_replaced_media_marks_old_job_stale(self):
+        post = self.create_post(image=make_image())
+        with self.captureOnCommitCallbacks(execute=True):
+            post.image = make_image('other.png', size=(1000, 500))
+            post.save()
+        results = self.run_jobs()
+        self.assertEqual(sorted(results), [False, True])
+
+    def test_abandoned_jobs_are_requeued_after_the_lease(self):
+        self.create_post(image=make_image())
+        job = claim_jobs(10)[0]
+        self.assertEqual(requeue_stale_jobs(), 0)
+        later = timezone.now() + timedelta(seconds=16 * 60)
+        self.assertEqual(requeue_stale_jobs(now=later), 1)
+        self.assertEqual(MediaJob.objects.get(pk=job.pk).status, MediaJob.PENDING)
+        with self.settings(MEDIA_JOB_MAX_ATTEMPTS=2):
+            claim_jobs(10)
+            requeue_stale_jobs(now=later + timedelta(seconds=16 * 60))
+        self.assertEqual(MediaJob.objects.get(pk=job.pk).status, MediaJob.FAILED)
+
+    def rendition_files(self, instance):
+        instance.refresh_from_db()
+        names = [r['name'] for meta in instance.renditions.values() for r in meta.get('renditions', [])]
+        self.assertTrue(names)
+        return names
+
+    def test_renditions_are_deleted_with_the_post(self):
+        post = self.create_post(image=make_image())
+        self.run_jobs()
+        names = self.rendition_files(post)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+
+    def test_renditions_of_replaced_media_are_deleted(self):
+        post = self.create_post(image=make_image())
+        self.run_jobs()
+        names = self.rendition_files(post)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.only('id', 'renditions').get(pk=post.pk).save()
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+        with self.captureOnCommitCallbacks(execute=True):
+            post.image = make_image('other.png', size=(1000, 500))
+            post.save()
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+
+    def test_purged_stories_lose_their_renditions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            story = Story.objects.create(user=self.user, image=make_image())
+        self.run_jobs()
+        names = self.rendition_files(story)
+        with self.captureOnCommitCallbacks(execute=True):
+            purge_expired_stories(now=timezone.now() + timedelta(days=2))
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+
+    @override_settings(MEDIA_FFMPEG_BINARY='missing-ffmpeg-binary')
+    def test_video_without_ffmpeg_records_no_poster(self):
+        video = SimpleUploadedFile('clip.mp4', b'video', content_type='video/mp4')
+        post = self.create_post(video=video)
+        self.run_jobs()
+        post.refresh_from_db()
+        self.assertEqual(post.renditions['video']['poster'], [])
+        self.assertIsNone(PostSerializer(post).data['poster_url'])
+
+    def test_best_fit(self):
+        renditions = [{'width': 320}, {'width': 1080}, {'width': 640}]
+        self.assertEqual(best_fit(renditions, 600)['width'], 640)
+        self.assertEqual(best_fit(renditions, 2000)['width'], 1080)
+        self.assertIsNone(best_fit([], 100))
+
+
+class ChunkedUploadTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='chunker', email='chunker@example.com', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.payload = os.urandom(300 * 1024)
+
+    def start(self, **data):
+        data = {'filename': 'clip.mp4', 'total_size': len(self.payload), 'caption': 'Clip', **data}
+        return self.client.post(reverse('upload_apis:start-upload'), data, format='json')
+
+    def put_chunk(self, upload_id, offset, data, **headers):
+        return self.client.put(reverse('upload_apis:upload-chunk', args=[upload_id]), data,
+                               content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset), **headers)
+
+    def finish(self, upload_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('upload_apis:finish-upload', args=[upload_id]))
+
+    def upload_all(self, upload_id, chunk_size=100 * 1024):
+        for offset in range(0, len(self.payload), chunk_size):
+            response = self.put_chunk(upload_id, offset, self.payload[offset:offset + chunk_size])
+            self.assertEqual(response.status_code, 200)
+
+    def test_chunks_are_assembled_into_post_video(self):
+        checksum = hashlib.sha256(self.payload).hexdigest()
+        upload_id = self.start(checksum=checksum).data['id']
+        self.upload_all(upload_id)
+
+        response = self.finish(upload_id)
+        self.assertEqual(response.status_code, 201)
+        post = Post.objects.get(pk=response.data['id'])
+        self.assertEqual(post.caption, 'Clip')
+        with post.video.open('rb') as video:
+            self.assertEqual(video.read(), self.payload)
+        session = UploadSession.objects.get(pk=upload_id)
+        self.assertEqual(session.status, UploadSession.COMPLETE)
+        self.assertEqual(session.post, post)
+        self.assertFalse(os.path.exists(session.partial_path))
+        self.assertTrue(MediaJob.objects.filter(object_id=post.pk, field_name='video').exists())
+
+    def test_story_target(self):
+        upload_id = self.start(target=UploadSession.STORY).data['id']
+        self.upload_all(upload_id)
+        response = self.finish(upload_id)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Story.objects.get(pk=response.data['id']).video)
+
+    def test_resume_after_interrupted_chunk(self):
+        upload_id = self.start().data['id']
+        self.put_chunk(upload_id, 0, self.payload[:1024])
+        # A retried chunk at a stale offset is rejected with the offset to resume from.
+        response = self.put_chunk(upload_id, 0, self.payload[:1024])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['offset'], 1024)
+        status_response = self.client.get(reverse('upload_apis:upload-session', args=[upload_id]))
+        self.assertEqual(status_response.data['offset'], 1024)
+        response = self.put_chunk(upload_id, 1024, self.payload[1024:])
+        self.assertEqual(response.data['offset'], len(self.payload))
+        self.assertEqual(self.finish(upload_id).status_code, 201)
+
+    def test_chunk_checksum_mismatch_rolls_back(self):
+        upload_id = self.start().data['id']
+        response = self.put_chunk(upload_id, 0, self.payload[:1024], HTTP_UPLOAD_CHECKSUM='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        session = UploadSession.objects.get(pk=upload_id)
+        self.assertEqual(session.offset, 0)
+        self.assertEqual(os.path.getsize(session.partial_path), 0)
+        good = hashlib.sha256(self.payload[:1024]).hexdigest()
+        self.assertEqual(self.put_chunk(upload_id, 0, self.payload[:1024], HTTP_UPLOAD_CHECKSUM=good).status_code, 200)
+
+    def test_finish_rejects_incomplete_or_corrupt_upload(self):
+        upload_id = self.start(checksum='a' * 64).data['id']
+        self.put_chunk(upload_id, 0, self.payload[:1024])
+        self.assertEqual(self.finish(upload_id).status_code, 409)
+        self.put_chunk(upload_id, 1024, self.payload[1024:])
+        self.assertEqual(self.finish(upload_id).status_code, 400)
+        self.assertFalse(Post.objects.exists())
+
+    def test_finish_is_claimed_once(self):
+        upload_id = self.start().data['id']
+        self.upload_all(upload_id)
+        # Another request has claimed the session and is still moving the file.
+        UploadSession.objects.filter(pk=upload_id).update(status=UploadSession.FINISHING)
+        self.assertEqual(self.finish(upload_id).status_code, 409)
+        self.assertFalse(Post.objects.exists())
+
+        UploadSession.objects.filter(pk=upload_id).update(status=UploadSession.IN_PROGRESS)
+        first = self.finish(upload_id)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(self.finish(upload_id).data['id'], first.data['id'])
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_failed_finish_releases_the_claim(self):
+        upload_id = self.start(checksum='a' * 64).data['id']
+        self.upload_all(upload_id)
+        self.assertEqual(self.finish(upload_id).status_code, 400)
+        self.assertEqual(UploadSession.objects.get(pk=upload_id).status, UploadSession.IN_PROGRESS)
+
+    def test_failed_save_restores_the_partial_file(self):
+        upload_id = self.start().data['id']
+        self.upload_all(upload_id)
+        with mock.patch.object(Post, 'save', side_effect=RuntimeError('database went away')):
+            with self.assertRaises(RuntimeError):
+                self.finish(upload_id)
+        session = UploadSession.objects.get(pk=upload_id)
+        self.assertEqual((session.status, session.offset), (UploadSession.IN_PROGRESS, len(self.payload)))
+        with open(session.partial_path, 'rb') as partial:
+            self.assertEqual(partial.read(), self.payload)
+
+        response = self.finish(upload_id)
+        self.assertEqual(response.status_code, 201)
+        with Post.objects.get(pk=response.data['id']).video.open('rb') as video:
+            self.assertEqual(video.read(), self.payload)
+
+    def test_finish_after_post_is_deleted(self):
+        upload_id = self.start().data['id']
+        self.upload_all(upload_id)
+        Post.objects.get(pk=self.finish(upload_id).data['id']).delete()
+        self.assertEqual(self.finish(upload_id).status_code, 410)
+
+    def test_cancel_returns_empty_response(self):
+        upload_id = self.start().data['id']
+        response = self.client.delete(reverse('upload_apis:upload-session', args=[upload_id]))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.content, b'')
+        self.assertFalse(UploadSession.objects.filter(pk=upload_id).exists())
+
+    def test_start_validates_format_and_size(self):
+        self.assertEqual(self.start(filename='notes.txt').status_code, 400)
+        with self.settings(UPLOAD_MAX_SIZE=10):
+            self.assertEqual(self.start().status_code, 400)
+
+    def test_sessions_are_private(self):
+        upload_id = self.start().data['id']
+        other = CustomUser.objects.create_user(username='other', email='other@example.com', password='pass')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.put_chunk(upload_id, 0, self.payload[:10]).status_code, 404)
+
+
+class MediaServingTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.content = bytes(range(256)) * 40
+        self.name = default_storage.save('post_videos/clip.mp4', ContentFile(self.content))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def get(self, name=None, **headers):
+        response = self.client.get(f'/media/{name or self.name}', **headers)
+        response.body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response
+
+    def test_full_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.body, self.content)
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_legacy_names_are_revalidated(self):
+        # Files stored before content addressing keep their original, mutable names.
+        os.makedirs(os.path.join(self.media_root, 'post_images'))
+        with open(os.path.join(self.media_root, 'post_images', 'legacy.jpg'), 'wb') as legacy:
+            legacy.write(b'jpeg')
+        response = self.get('post_images/legacy.jpg')
+        self.assertEqual(response.body, b'jpeg')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+
+    def test_byte_ranges(self):
+        response = self.get(HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.body, self.content[100:200])
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '100')
+
+        self.assertEqual(self.get(HTTP_RANGE='bytes=-10').body, self.content[-10:])
+        self.assertEqual(self.get(HTTP_RANGE='bytes=10000-').body, self.content[10000:])
+        response = self.get(HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_conditional_get(self):
+        first = self.get()
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_stale_if_range_serves_full_file(self):
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.body), len(self.content))
+
+    def test_renditions_are_immutable(self):
+        name = default_storage.save('renditions/posts/post/1/image-abc-320.webp', ContentFile(b'webp'))
+        self.assertIn('immutable', self.get(name)['Cache-Control'])
+
+    def test_private_and_missing_paths(self):
+        default_storage.save('uploads/partial/secret.part', ContentFile(b'partial'))
+        self.assertEqual(self.get('uploads/partial/secret.part').status_code, 404)
+        self.assertEqual(self.get('post_videos/missing.mp4').status_code, 404)
+        self.assertEqual(self.get('../settings.py').status_code, 404)
+        self.assertEqual(self.get('post_videos').status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='x-accel-redirect')
+    def test_accel_redirect_offload(self):
+        response = self.get()
+        location = os.path.relpath(default_storage.path(self.name), self.media_root)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + location)
+        self.assertEqual(response.body, b'')
+
+
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, BLOB_ORPHAN_GRACE=0)
+        self.settings_override.enable()
+        self.user = CustomUser.objects.create_user(username='hasher', email='hasher@example.com', password='pass')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def create_post(self, content=b'same bytes', name='photo.jpg'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(user=self.user, video=SimpleUploadedFile(name, content))
+
+    def test_names_are_content_hashes(self):
+        post = self.create_post()
+        digest = hashlib.sha256(b'same bytes').hexdigest()
+        self.assertEqual(post.video.name, f'post_videos/{digest}.jpg')
+        self.assertEqual(default_storage.path(post.video.name),
+                         os.path.join(self.media_root, 'blobs', digest[:2], digest[2:4], f'{digest}.jpg'))
+        with post.video.open('rb') as video:
+            self.assertEqual(video.read(), b'same bytes')
+
+    def test_duplicates_share_one_blob(self):
+        first = self.create_post(name='a.jpg')
+        second = self.create_post(name='b.jpg')
+        story = Story.objects.create(user=self.user, video=SimpleUploadedFile('c.jpg', b'same bytes'))
+        self.assertEqual(first.video.name, second.video.name)
+        self.assertEqual(Blob.objects.get().ref_count, 3)
+        self.assertEqual(default_storage.path(story.video.name), default_storage.path(first.video.name))
+
+    def test_blob_is_collected_with_its_last_reference(self):
+        first = self.create_post()
+        second = self.create_post()
+        path = default_storage.path(first.video.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(os.path.exists(path))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(Blob.objects.exists())
+
+    def test_reused_blob_survives_collection_before_its_reference(self):
+        post = self.create_post()
+        path = default_storage.path(post.video.name)
+        Blob.objects.update(ref_count=0, updated_at=timezone.now() - timedelta(hours=2))
+        # The storage reuses the file but the new row's reference is not taken yet.
+        default_storage.save('post_videos/copy.jpg', ContentFile(b'same bytes'))
+        self.assertEqual(collect_garbage(grace=60), 0)
+        self.assertTrue(os.path.exists(path))
+        Blob.objects.update(updated_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(collect_garbage(grace=60), 1)
+        self.assertFalse(os.path.exists(path))
+
+    def test_replacing_media_releases_the_old_blob(self):
+        post = self.create_post(b'old')
+        old_path = default_storage.path(post.video.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.video = SimpleUploadedFile('new.jpg', b'new')
+            post.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(list(Blob.objects.values_list('ref_count', flat=True)), [1])
+
+    def test_profile_pictures_share_blobs_with_posts(self):
+        self.user.profile_picture = SimpleUploadedFile('me.jpg', b'same bytes')
+        self.user.save()
+        self.create_post()
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+
+    def test_reconcile_fixes_drift(self):
+        post = self.create_post()
+        Blob.objects.update(ref_count=0)
+        self.assertEqual(reconcile_blobs(), 1)
+        self.assertEqual(collect_garbage(), 0)
+        self.assertTrue(os.path.exists(default_storage.path(post.video.name)))
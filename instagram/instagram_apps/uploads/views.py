@@ -0,0 +1,167 @@
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class RangedFile:
+    # Reads stop at the end of the range. fileno()/tell() stay available so WSGI
+    # servers with sendfile support (e.g. gunicorn) can still send the range zero-copy.
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def seekable(self):
+        return False
+
+    def tell(self):
+        return self.file.tell()
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def is_private(name):
+    return name.startswith(tuple(getattr(settings, 'MEDIA_PRIVATE_PREFIXES', ('uploads/',))))
+
+
+def is_immutable(name):
+    if name.startswith(tuple(getattr(settings, 'MEDIA_IMMUTABLE_PREFIXES', ('renditions/',)))):
+        return True
+    # Content-addressed names change whenever the content does.
+    blob_name = getattr(default_storage, 'blob_name', None)
+    return bool(blob_name and blob_name(name))
+
+
+def parse_range(header, size):
+    # Only single ranges are honoured; anything else falls back to the full file, as RFC 9110 allows.
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def set_cache_headers(response, name):
+    if is_immutable(name):
+        patch_cache_control(response, public=True, immutable=True,
+                            max_age=getattr(settings, 'MEDIA_IMMUTABLE_MAX_AGE', 60 * 60 * 24 * 365))
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'MEDIA_CACHE_MAX_AGE', 60 * 60))
+    return response
+
+
+def offload_response(full_path, content_type):
+    mode = getattr(settings, 'MEDIA_ACCEL_REDIRECT', None)
+    if mode == 'x-accel-redirect':
+        # nginx serves the file (ranges included) from an internal location mapped to MEDIA_ROOT.
+        response = HttpResponse(content_type=content_type)
+        location = os.path.relpath(full_path, default_storage.location).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/') + quote(location)
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return response
+    return None
+
+
+@require_safe
+def serve_media(request, path):
+    name = path.lstrip('/')
+    if not name or is_private(name):
+        raise Http404
+    try:
+        full_path = default_storage.path(name)
+        file_stat = os.stat(full_path)
+    except (SuspiciousFileOperation, NotImplementedError, FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404
+
+    size = file_stat.st_size
+    last_modified = int(file_stat.st_mtime)
+    etag = f'"{file_stat.st_mtime_ns:x}-{size:x}"'
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    headers = HttpResponse()
+    headers['ETag'] = etag
+    headers['Last-Modified'] = http_date(last_modified)
+    set_cache_headers(headers, name)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified, response=headers)
+    if response is not headers:
+        return response
+
+    response = offload_response(full_path, content_type)
+    if response is None:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size) \
+                if if_range_matches(request, etag, last_modified) else None
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range is None:
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+        else:
+            start, end = byte_range
+            length = end - start + 1
+            response = FileResponse(RangedFile(open(full_path, 'rb'), start, length),
+                                    status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(length)
+        response['Accept-Ranges'] = 'bytes'
+
+    for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+        response[header] = headers[header]
+    return response
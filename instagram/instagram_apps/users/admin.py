@@ -1,9 +1,12 @@
 from django.contrib import admin
 from .models import CustomUser
+from instagram_apps.search.admin import IndexedSearchMixin
 
-class CustomUserAdmin(admin.ModelAdmin):
+class CustomUserAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('username', 'email', 'profile_status', 'bio', 'followers_count', 'followings_count', 'profile_picture')
     search_fields = ('username', 'email')
+    search_kind = 'user'
+    exact_search_fields = ('email',)
     list_filter = ('profile_status',)
     ordering = ('-date_joined',)
     list_per_page = 20
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-18 14:54
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def populate_follow_counters(apps, schema_editor):
+    CustomUser = apps.get_model('users', 'CustomUser')
+    Follow = apps.get_model('followers', 'Follow')
+
+    def count_of(field):
+        return Coalesce(models.Subquery(
+            Follow.objects.filter(**{field: models.OuterRef('pk')}).order_by().values(field)
+            .annotate(total=models.Count('id')).values('total')
+        ), 0)
+
+    CustomUser.objects.update(
+        followers_count=count_of('following'),
+        followings_count=count_of('follower'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_customuser_profile_status_alter_customuser_email'),
+        ('followers', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='followings_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_follow_counters, migrations.RunPython.noop),
+    ]
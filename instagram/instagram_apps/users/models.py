@@ -15,14 +15,21 @@ class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
     bio = models.TextField(max_length=155, null=True, blank=True)
     profile_picture = models.ImageField(upload_to='profile/pictures', null=True, blank=True)
-   
-    @property
-    def followers_count(self):
-        return self.followers.count() 
-    
-    @property
-    def followings_count(self):
-        return self.followings.count()
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    followings_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Maintained with F() updates by the follow signals; a full save of an existing user
+    # would write the stale in-memory values back over concurrent increments.
+    COUNTER_FIELDS = ('followers_count', 'followings_count')
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.username
\ No newline at end of file
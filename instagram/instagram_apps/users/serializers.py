@@ -7,16 +7,35 @@ class CustomUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = '__all__'
+        extra_kwargs = {'password': {'write_only': True}}
 
     def to_representation(self, instance):
         request = self.context.get('request')
-        if instance.profile_status == CustomUser.PRIVATE_PROFILE and not request.user.is_authenticated:
+        is_authenticated = request is not None and request.user.is_authenticated
+        if instance.profile_status == CustomUser.PRIVATE_PROFILE and not is_authenticated:
             return {
                 'username': instance.username,
                 'profile_picture': instance.profile_picture.url if instance.profile_picture else None,
                 'message': 'This profile is private'
             }
-          
+        return super().to_representation(instance)
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    # Compact user embedded in list payloads; ?expand=user swaps in UserProfileSerializer.
+    class Meta:
+        model = CustomUser
+        fields = ('id', 'username', 'profile_picture', 'profile_status')
+
+
+class UserProfileSerializer(serializers.ModelSerializer):
+    # Public profile fields only: no email, password hash, permissions or groups.
+    class Meta:
+        model = CustomUser
+        fields = ('id', 'username', 'first_name', 'last_name', 'bio', 'profile_picture', 'profile_status',
+                  'followers_count', 'followings_count', 'date_joined')
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     
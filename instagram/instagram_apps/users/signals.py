@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import CustomUser
+from instagram_space.utils.detail_cache import invalidate_owner
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_cached_details(sender, instance, created, **kwargs):
+    # Detail payloads embed their owner, so profile changes retire them.
+    if not created:
+        pk = instance.pk
+        transaction.on_commit(lambda: invalidate_owner(pk))
@@ -1,7 +1,11 @@
 from django.urls import path
+from instagram_space.fallower_apis.views import *
 
 app_name = 'fallower_apis'
 
 urlpatterns = [
-
-]
\ No newline at end of file
+    path('users/<int:user_id>/follow/', FollowAPIView.as_view(), name='follow'),
+    path('users/<int:user_id>/followers/', FollowerListAPIView.as_view(), name='followers'),
+    path('users/<int:user_id>/following/', FollowingListAPIView.as_view(), name='following'),
+    path('suggestions/', FollowSuggestionListAPIView.as_view(), name='suggestions'),
+]
@@ -0,0 +1,88 @@
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.views import APIView, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.followers.models import Follow, FollowSuggestion
+from instagram_apps.followers.graph import get_follow_graph
+from instagram_apps.followers.serializers import (
+    FollowSerializer, FollowerSerializer, FollowingSerializer, FollowSuggestionSerializer
+)
+from instagram_space.utils.custom_pagination import KeysetPagination
+from instagram_space.utils.query_optimization import optimize_queryset
+
+
+class FollowAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, user_id):
+        following = get_object_or_404(CustomUser, id=user_id)
+        if get_follow_graph(request).is_following(following.pk):
+            return Response({'message': f'You already follow {following.username}'}, status=status.HTTP_200_OK)
+
+        serializer = FollowSerializer(data={'follower': request.user.pk, 'following': following.pk})
+        if serializer.is_valid():
+            try:
+                with transaction.atomic():
+                    serializer.save()
+            except IntegrityError:
+                # A concurrent follow from the same user won between validation and the insert.
+                return Response({'message': f'You already follow {following.username}'}, status=status.HTTP_200_OK)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        if Follow.objects.filter(follower=request.user, following=following).exists():
+            # Lost a race with a concurrent follow before validation; the result is the same.
+            return Response({'message': f'You already follow {following.username}'}, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def delete(self, request, user_id):
+        # Deleting through the queryset still sends post_delete, which keeps counters and caches in sync.
+        Follow.objects.filter(follower=request.user, following_id=user_id).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BaseFollowListAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = None
+    user_field = None
+
+    def get(self, request, user_id):
+        user = get_object_or_404(CustomUser, id=user_id)
+        if not get_follow_graph(request).can_view(user):
+            return Response({'message': 'This profile is private'}, status=status.HTTP_403_FORBIDDEN)
+
+        # Newest first along the (user, created_at) index; the id breaks ties between equal timestamps.
+        pagination = KeysetPagination(ordering=('-created_at', '-id'))
+        follows = Follow.objects.filter(**{self.user_field: user})
+        result_page = pagination.paginate_queryset(optimize_queryset(follows, self.serializer_class), request)
+        serializer = self.serializer_class(result_page, many=True, context={'request': request})
+        return pagination.get_paginated_response(serializer.data)
+
+
+class FollowerListAPIView(BaseFollowListAPIView):
+    serializer_class = FollowerSerializer
+    user_field = 'following'
+
+
+class FollowingListAPIView(BaseFollowListAPIView):
+    serializer_class = FollowingSerializer
+    user_field = 'follower'
+
+
+class FollowSuggestionListAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # Suggestions are precomputed by refresh_follow_suggestions; accounts followed since
+        # the last refresh are filtered out here so stale rows never reach the client.
+        pagination = KeysetPagination(ordering=('-score', '-id'))
+        suggestions = FollowSuggestion.objects.filter(user=request.user) \
+            .exclude(get_follow_graph(request).following_filter('candidate'))
+        result_page = pagination.paginate_queryset(optimize_queryset(suggestions, FollowSuggestionSerializer), request)
+        serializer = FollowSuggestionSerializer(result_page, many=True, context={'request': request})
+        return pagination.get_paginated_response(serializer.data)
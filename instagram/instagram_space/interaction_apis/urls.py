@@ -1,7 +1,13 @@
 from django.urls import path
+from instagram_space.interaction_apis.views import *
 
 app_name = 'interaction_apis'
 
 urlpatterns = [
-
-]
\ No newline at end of file
+    path('posts/<int:post_id>/comments/', PostCommentListCreateAPIView.as_view(), name='post-comments'),
+    path('stories/<int:story_id>/comments/', StoryCommentListCreateAPIView.as_view(), name='story-comments'),
+    path('posts/<int:post_id>/like/', PostLikeAPIView.as_view(), name='post-like'),
+    path('stories/<int:story_id>/like/', StoryLikeAPIView.as_view(), name='story-like'),
+    path('comments/<int:comment_id>/like/', CommentLikeAPIView.as_view(), name='comment-like'),
+    path('likes/', LikedLookupAPIView.as_view(), name='liked-lookup'),
+]
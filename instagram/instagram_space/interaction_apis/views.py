@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.views import APIView, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from instagram_apps.posts.models import Post
+from instagram_apps.stories.models import Story
+from instagram_apps.interactions.models import Comment
+from instagram_apps.interactions.serializers import CommentSerializer
+from instagram_apps.interactions.likes import LIKE_MODELS, like, unlike, liked_ids, like_counts
+from instagram_apps.followers.graph import get_follow_graph
+from instagram_space.utils.custom_pagination import KeysetPagination
+from instagram_space.utils.query_optimization import optimize_queryset
+
+
+class BaseCommentListCreateAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    queryset = None
+    parent_field = None
+    lookup_url_kwarg = None
+
+    def get_parent(self, request, **kwargs):
+        return get_object_or_404(self.queryset.select_related('user'), id=kwargs[self.lookup_url_kwarg])
+
+    def get(self, request, *args, **kwargs):
+        parent = self.get_parent(request, **kwargs)
+        if not get_follow_graph(request).can_view(parent.user):
+            return Response({'message': 'This profile is private'}, status=status.HTTP_403_FORBIDDEN)
+
+        # Threads read oldest first along the (parent, created_at, id) index.
+        pagination = KeysetPagination(ordering=('created_at', 'id'))
+        comments = Comment.objects.filter(**{self.parent_field: parent})
+        result_page = pagination.paginate_queryset(optimize_queryset(comments, CommentSerializer), request)
+        # Comment.like_count is flushed behind, so the page shows counts taken from the likes themselves.
+        counts = like_counts('comment', result_page)
+        for comment in result_page:
+            comment.like_count = counts.get(comment.pk, 0)
+        serializer = CommentSerializer(result_page, many=True, context={
+            'request': request, 'liked_ids': liked_ids(request.user, 'comment', result_page)})
+        return pagination.get_paginated_response(serializer.data)
+
+    def post(self, request, *args, **kwargs):
+        parent = self.get_parent(request, **kwargs)
+        if not get_follow_graph(request).can_view(parent.user):
+            return Response({'message': 'This profile is private'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = CommentSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            serializer.save(user=request.user, **{self.parent_field: parent})
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class PostCommentListCreateAPIView(BaseCommentListCreateAPIView):
+    queryset = Post.objects
+    parent_field = 'post'
+    lookup_url_kwarg = 'post_id'
+
+
+class StoryCommentListCreateAPIView(BaseCommentListCreateAPIView):
+    queryset = Story.visible
+    parent_field = 'story'
+    lookup_url_kwarg = 'story_id'
+
+
+class BaseLikeAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    queryset = None
+    relation = None
+    lookup_url_kwarg = None
+    # Only the owner's privacy is read, so just those columns are loaded.
+    owner_fields = ('user',)
+
+    def get_owner(self, target):
+        return target.user
+
+    def get_target(self, request, **kwargs):
+        only = [f'{field}__{name}' for field in self.owner_fields for name in ('id', 'profile_status')]
+        queryset = self.queryset.select_related(*self.owner_fields).only('id', *only)
+        return get_object_or_404(queryset, id=kwargs[self.lookup_url_kwarg])
+
+    def post(self, request, *args, **kwargs):
+        target = self.get_target(request, **kwargs)
+        if not get_follow_graph(request).can_view(self.get_owner(target)):
+            return Response({'message': 'This profile is private'}, status=status.HTTP_403_FORBIDDEN)
+        # Repeating a like is not an error; the status only tells whether this call created it.
+        created = like(request.user, self.relation, target.pk)
+        return Response({'liked': True}, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        target = self.get_target(request, **kwargs)
+        unlike(request.user, self.relation, target.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PostLikeAPIView(BaseLikeAPIView):
+    queryset = Post.objects
+    relation = 'post'
+    lookup_url_kwarg = 'post_id'
+
+
+class StoryLikeAPIView(BaseLikeAPIView):
+    queryset = Story.visible
+    relation = 'story'
+    lookup_url_kwarg = 'story_id'
+
+
+class CommentLikeAPIView(BaseLikeAPIView):
+    queryset = Comment.objects
+    relation = 'comment'
+    lookup_url_kwarg = 'comment_id'
+    owner_fields = ('post__user', 'story__user')
+
+    def get_owner(self, target):
+        return (target.post or target.story).user
+
+
+class LikedLookupAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        relation = request.query_params.get('type', 'post')
+        if relation not in LIKE_MODELS:
+            return Response({'message': f'type must be one of {", ".join(LIKE_MODELS)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value]
+        except ValueError:
+            return Response({'message': 'ids must be a comma separated list of integers'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        max_ids = getattr(settings, 'LIKE_LOOKUP_MAX_IDS', 100)
+        if len(ids) > max_ids:
+            return Response({'message': f'At most {max_ids} ids can be looked up at once'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({'liked': sorted(liked_ids(request.user, relation, ids))}, status=status.HTTP_200_OK)
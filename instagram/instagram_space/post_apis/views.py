@@ -1,4 +1,5 @@
 from django.shortcuts import get_object_or_404
+from django.http import Http404
 from rest_framework.response import Response
 from rest_framework.views import APIView, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -7,56 +8,114 @@ from django.db import models
 
 from instagram_apps.posts.models import Post
 from instagram_apps.users.models import CustomUser
+from instagram_apps.followers.graph import get_follow_graph
 from instagram_apps.posts.serializers import PostSerializer
-from instagram_space.utils.custom_pagination import CustomPagination
+from instagram_apps.posts.timeline import home_timeline
+from instagram_apps.posts.explore import explore_posts
+from instagram_apps.interactions.counters import record_view_by_id
+from instagram_apps.interactions.likes import liked_ids, has_liked
+from instagram_space.utils.custom_pagination import PaginationModeMixin, KeysetPagination
+from instagram_space.utils.detail_cache import get_cached_detail
+from instagram_space.utils.query_optimization import optimize_queryset, optimize_instances
 from instagram_space.utils.permissions import *
 
 
-class OpenProfilePostListAPIView(APIView):
-    pagination_class = CustomPagination
+class OpenProfilePostListAPIView(PaginationModeMixin, APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        pagination = self.pagination_class()
+        pagination = self.get_paginator(request)
         posts = Post.objects.filter(
             user__profile_status=CustomUser.OPEN_PROFILE).order_by('-created_at')
         
-        if posts.exists():
-            result_page = pagination.paginate_queryset(posts, request)
-            serializer = PostSerializer(result_page, many=True, context={'request': request})
+        result_page = pagination.paginate_queryset(optimize_queryset(posts, PostSerializer), request)
+        if result_page:
+            serializer = PostSerializer(result_page, many=True, context={
+                'request': request, 'liked_ids': liked_ids(request.user, 'post', result_page)})
             return pagination.get_paginated_response(serializer.data)
         return Response({'message': 'There are no posts'}, status=status.HTTP_200_OK)
 
 
-class PrivateProfilePostListAPIView(APIView):
-    pagination_class = CustomPagination
+class PrivateProfilePostListAPIView(PaginationModeMixin, APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated, IsOwnerOrOpenProfileOrFollowerPermission]
 
     def get(self, request):
-        pagination = self.pagination_class()
+        pagination = self.get_paginator(request)
         user = request.user
         posts = Post.objects.filter(user__profile_status=CustomUser.PRIVATE_PROFILE).filter(
-            models.Q(user__in=user.following.all()) | models.Q(user=user)
+            get_follow_graph(request).following_filter('user') | models.Q(user=user)
         ).order_by('-created_at')
 
-        if posts.exists():
-            result_page = pagination.paginate_queryset(posts, request)
-            serializer = PostSerializer(result_page, many=True, context={'request': request})
+        result_page = pagination.paginate_queryset(optimize_queryset(posts, PostSerializer), request)
+        if result_page:
+            serializer = PostSerializer(result_page, many=True, context={
+                'request': request, 'liked_ids': liked_ids(request.user, 'post', result_page)})
             return pagination.get_paginated_response(serializer.data)
         return Response({'message': 'No posts available'}, status=status.HTTP_200_OK)
     
 
+class HomeTimelinePagination(KeysetPagination):
+    # Keyset over (created_at, id) of the merged timeline; the cursor is applied to TimelineEntry.
+
+    def paginate_timeline(self, user, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = Post
+        encoded = request.query_params.get(self.cursor_query_param)
+        after = self.decode_cursor(encoded) if encoded else None
+        posts = home_timeline(user, limit=self.page_size + 1, after=after, queryset=queryset)
+        self.has_next = len(posts) > self.page_size
+        self.page = posts[:self.page_size]
+        return self.page
+
+
+class HomeTimelineAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        pagination = HomeTimelinePagination()
+        result_page = pagination.paginate_timeline(
+            request.user, optimize_queryset(Post.objects.all(), PostSerializer), request)
+
+        if result_page or pagination.cursor_query_param in request.query_params:
+            serializer = PostSerializer(result_page, many=True, context={
+                'request': request, 'liked_ids': liked_ids(request.user, 'post', result_page)})
+            return pagination.get_paginated_response(serializer.data)
+        return Response({'message': 'Your feed is empty'}, status=status.HTTP_200_OK)
+
+
+class ExploreAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # Ranked by the precomputed explore score; the id breaks ties between equal scores.
+        pagination = KeysetPagination(ordering=('-explore_rank', '-id'))
+        posts = explore_posts(request.user)
+        result_page = pagination.paginate_queryset(optimize_queryset(posts, PostSerializer), request)
+        serializer = PostSerializer(result_page, many=True, context={
+            'request': request, 'liked_ids': liked_ids(request.user, 'post', result_page)})
+        return pagination.get_paginated_response(serializer.data)
+
+
 class OpenProfilePostDetail(APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, post_id, *args, **kwargs):
-        post = get_object_or_404(Post, id=post_id)
-        if post.user.profile_status == CustomUser.OPEN_PROFILE:
-                serializer = PostSerializer(post, context={'request': request})
-                return Response(serializer.data,  status=status.HTTP_200_OK)
+        payload = get_cached_detail('post', Post.objects.all(), post_id, PostSerializer, request)
+        if payload is None:
+            raise Http404
+        if payload['owner_status'] == CustomUser.OPEN_PROFILE:
+                record_view_by_id(Post, post_id, request.user)
+                # is_liked is per viewer, so it is never part of the shared cached payload.
+                data = dict(payload['data'])
+                if 'is_liked' in data:
+                    data['is_liked'] = has_liked(request.user, 'post', post_id)
+                return Response(data,  status=status.HTTP_200_OK)
         return Response({'message': 'This post is private'}, status=status.HTTP_403_FORBIDDEN)
     
     def delete(self, request, post_id):
@@ -82,10 +141,18 @@ class PrivateProfilePostDetail(APIView):
     permission_classes = [IsAuthenticated, IsOwnerOrOpenProfileOrFollowerPermission]
 
     def get(self, request, post_id, *args, **kwargs):
-        post = get_object_or_404(Post, id=post_id)
-        if post.user.profile_status == CustomUser.PRIVATE_PROFILE or post.user.id == request.user.id:
-                serializer = PostSerializer(post, context={'request': request})
-                return Response(serializer.data,  status=status.HTTP_200_OK)
+        payload = get_cached_detail('post', Post.objects.all(), post_id, PostSerializer, request)
+        if payload is None:
+            raise Http404
+        owner_id = payload['owner_id']
+        if owner_id == request.user.id or (
+                payload['owner_status'] == CustomUser.PRIVATE_PROFILE and get_follow_graph(request).is_following(owner_id)):
+                record_view_by_id(Post, post_id, request.user)
+                # is_liked is per viewer, so it is never part of the shared cached payload.
+                data = dict(payload['data'])
+                if 'is_liked' in data:
+                    data['is_liked'] = has_liked(request.user, 'post', post_id)
+                return Response(data,  status=status.HTTP_200_OK)
         return Response({'message': 'This post is private'}, status=status.HTTP_403_FORBIDDEN)
     
     def delete(self, request, post_id):
@@ -111,9 +178,9 @@ class CreateSinglePostAPIView(APIView):
     authentication_classes = [JWTAuthentication]
 
     def post(self, request, *args, **kwargs):
-        serializer = PostSerializer(data=request.data, many=False)
+        serializer = PostSerializer(data=request.data, many=False, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            serializer.save(user=request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -123,11 +190,15 @@ class CreateMultiplePostsAPIView(APIView):
     authentication_classes = [JWTAuthentication]
 
     def post(self, request, *args, **kwargs):
-        serializer = PostSerializer(data=request.data, many=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer = PostSerializer(data=request.data, many=True, context={'request': request})
+        posts, errors = serializer.bulk_create(user=request.user)
+        if not posts:
+            return Response({'created': [], 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        optimize_instances(posts, PostSerializer)
+        created = PostSerializer(posts, many=True, context={'request': request}).data
+        response_status = status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED
+        return Response({'created': created, 'errors': errors}, status=response_status)
          
          
 
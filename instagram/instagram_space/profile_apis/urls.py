@@ -1,7 +1,8 @@
 from django.urls import path
+from instagram_space.profile_apis.views import *
 
 app_name = 'profile_apis'
 
 urlpatterns = [
-
-]
\ No newline at end of file
+    path('profiles/<int:user_id>/', ProfileAPIView.as_view(), name='profile'),
+]
@@ -0,0 +1,22 @@
+from django.shortcuts import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.views import APIView, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.users.serializers import UserProfileSerializer, UserSummarySerializer
+from instagram_apps.followers.graph import get_follow_graph, relationship
+
+
+class ProfileAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, user_id):
+        user = get_object_or_404(CustomUser, id=user_id)
+        # Private profiles show only their public summary to viewers who do not follow them.
+        serializer_class = UserProfileSerializer if get_follow_graph(request).can_view(user) else UserSummarySerializer
+        data = serializer_class(user, context={'request': request}).data
+        data['relationship'] = relationship(request.user.pk, user.pk)
+        return Response(data, status=status.HTTP_200_OK)
@@ -0,0 +1,8 @@
+from django.urls import path
+from instagram_space.search_apis.views import *
+
+app_name = 'search_apis'
+
+urlpatterns = [
+    path('search/', SearchAPIView.as_view(), name='search'),
+]
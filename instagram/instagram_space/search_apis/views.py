@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.db import models
+from rest_framework.response import Response
+from rest_framework.views import APIView, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.utils.urls import replace_query_param
+
+from instagram_apps.users.models import CustomUser
+from instagram_apps.users.serializers import UserProfileSerializer
+from instagram_apps.posts.models import Post
+from instagram_apps.posts.serializers import PostSerializer
+from instagram_apps.stories.models import Story
+from instagram_apps.interactions.models import Comment
+from instagram_apps.interactions.serializers import CommentSerializer
+from instagram_apps.interactions.likes import liked_ids
+from instagram_apps.followers.graph import get_follow_graph
+from instagram_apps.search.models import SearchDocument
+from instagram_apps.search.backends import get_backend
+from instagram_space.utils.custom_pagination import KeysetPagination
+from instagram_space.utils.query_optimization import optimize_queryset
+
+
+def get_max_scan_batches():
+    return getattr(settings, 'SEARCH_MAX_SCAN_BATCHES', 5)
+
+
+class SearchPagination(KeysetPagination):
+    # Keyset over (score, id) of the ranked hits; the backend applies the cursor in SQL.
+    ordering = ('-score', '-id')
+
+    def paginate_hits(self, backend, query, kind, request, load):
+        # load(hits) returns (hit, result) pairs for the hits the viewer may see. Hidden
+        # hits are dropped before the page is cut, so further batches are read until the
+        # page is full, the index runs out or SEARCH_MAX_SCAN_BATCHES is reached.
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = SearchDocument
+        encoded = request.query_params.get(self.cursor_query_param)
+        after = self.decode_cursor(encoded) if encoded else None
+        visible = []
+        for _ in range(get_max_scan_batches()):
+            hits = backend.search(query, kind=kind, limit=self.page_size + 1, after=after)
+            visible.extend(load(hits))
+            exhausted = len(hits) <= self.page_size
+            if exhausted or len(visible) > self.page_size:
+                break
+            after = (hits[-1].score, hits[-1].id)
+
+        self.page = visible[:self.page_size]
+        if len(visible) > self.page_size:
+            self.has_next, self.cursor_hit = True, self.page[-1][0]
+        else:
+            # A page cut short by the scan limit resumes after the last hit that was read.
+            self.has_next, self.cursor_hit = not exhausted, hits[-1] if hits else None
+        return [result for hit, result in self.page]
+
+    def get_next_link(self):
+        if not self.has_next or self.cursor_hit is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.cursor_hit))
+
+
+class SearchAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post_results(self, request, ids):
+        posts = Post.objects.filter(get_follow_graph(request).visible_owner_filter('user__'), pk__in=ids)
+        posts = list(optimize_queryset(posts, PostSerializer))
+        context = {'request': request, 'liked_ids': liked_ids(request.user, 'post', posts)}
+        return dict(zip((post.pk for post in posts), PostSerializer(posts, many=True, context=context).data))
+
+    def comment_results(self, request, ids):
+        # A comment is as visible as the post or live story it was left on.
+        graph = get_follow_graph(request)
+        comments = Comment.objects.filter(
+            models.Q(graph.visible_owner_filter('post__user__'))
+            | models.Q(graph.visible_owner_filter('story__user__'), story__in=Story.visible_stories()),
+            pk__in=ids,
+        )
+        comments = list(optimize_queryset(comments, CommentSerializer))
+        context = {'request': request, 'liked_ids': liked_ids(request.user, 'comment', comments)}
+        return dict(zip((comment.pk for comment in comments), CommentSerializer(comments, many=True, context=context).data))
+
+    def user_results(self, request, ids):
+        users = list(optimize_queryset(CustomUser.objects.filter(pk__in=ids), UserProfileSerializer))
+        return dict(zip((user.pk for user in users), UserProfileSerializer(users, many=True, context={'request': request}).data))
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        kind = request.query_params.get('type') or None
+        if not query:
+            return Response({'message': 'A search query is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if kind is not None and kind not in dict(SearchDocument.KIND_LIST):
+            return Response({'message': 'Invalid search type'}, status=status.HTTP_400_BAD_REQUEST)
+        backend = get_backend()
+        if backend is None:
+            return Response({'message': 'Search is not available'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        pagination = SearchPagination()
+        results = pagination.paginate_hits(backend, query, kind, request, lambda hits: self.load_results(request, hits))
+        return pagination.get_paginated_response(results)
+
+    def load_results(self, request, hits):
+        loaders = {
+            SearchDocument.POST: self.post_results,
+            SearchDocument.COMMENT: self.comment_results,
+            SearchDocument.USER: self.user_results,
+        }
+        # One query per kind in the batch; hits the viewer may not see are dropped.
+        objects = {
+            hit_kind: loader(request, [hit.object_id for hit in hits if hit.kind == hit_kind])
+            for hit_kind, loader in loaders.items() if any(hit.kind == hit_kind for hit in hits)
+        }
+        return [
+            (hit, {'type': hit.kind, 'score': hit.score, 'object': objects[hit.kind][hit.object_id]})
+            for hit in hits if hit.object_id in objects[hit.kind]
+        ]
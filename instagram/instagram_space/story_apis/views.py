@@ -1,63 +1,89 @@
 from django.shortcuts import get_object_or_404
+from django.http import Http404
 from rest_framework.response import Response
 from rest_framework.views import APIView, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.db import models
+from django.utils import timezone
 
 from instagram_apps.stories.models import Story
 from instagram_apps.users.models import CustomUser
+from instagram_apps.followers.graph import get_follow_graph
 from instagram_apps.stories.serializers import StorySerializer
-from instagram_space.utils.custom_pagination import CustomPagination
+from instagram_apps.stories.tray import get_story_tray
+from instagram_apps.interactions.counters import record_view_by_id
+from instagram_apps.interactions.likes import liked_ids, has_liked
+from instagram_space.utils.custom_pagination import PaginationModeMixin
+from instagram_space.utils.detail_cache import get_cached_detail
+from instagram_space.utils.query_optimization import optimize_queryset, optimize_instances
 from instagram_space.utils.permissions import *
 
 
+def is_expired(payload):
+    # Cached payloads can outlive the story, so expiry is checked on every hit.
+    return payload['created_at'] < timezone.now() - Story.LIFETIME
 
-class OpenProfileStoryListAPIView(APIView):
-    pagination_class = CustomPagination
+
+class OpenProfileStoryListAPIView(PaginationModeMixin, APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        pagination = self.pagination_class()
+        pagination = self.get_paginator(request)
         stories = Story.visible_stories().filter(user__profile_status=CustomUser.OPEN_PROFILE, ).order_by('-created_at')
         
-        if stories.exists():
-            result_page = pagination.paginate_queryset(stories, request)
-            serializer = StorySerializer(result_page, many=True, context={'request': request})
+        result_page = pagination.paginate_queryset(optimize_queryset(stories, StorySerializer), request)
+        if result_page:
+            serializer = StorySerializer(result_page, many=True, context={
+                'request': request, 'liked_ids': liked_ids(request.user, 'story', result_page)})
             return pagination.get_paginated_response(serializer.data)
         return Response({'message': 'There are no stories'}, status=status.HTTP_200_OK)
 
 
-class PrivateProfileStoryListAPIView(APIView):
-    pagination_class = CustomPagination
+class PrivateProfileStoryListAPIView(PaginationModeMixin, APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated, IsOwnerOrOpenProfileOrFollowerPermission]
 
     def get(self, request):
-        pagination = self.pagination_class()
+        pagination = self.get_paginator(request)
         user = request.user
         stories = Story.visible_stories().filter(user__profile_status=CustomUser.PRIVATE_PROFILE).filter(
-            models.Q(user__in=user.following.all()) | models.Q(user=user)
+            get_follow_graph(request).following_filter('user') | models.Q(user=user)
         ).order_by('-created_at')
 
-        if stories.exists():
-            result_page = pagination.paginate_queryset(stories, request)
-            serializer = StorySerializer(result_page, many=True, context={'request': request})
+        result_page = pagination.paginate_queryset(optimize_queryset(stories, StorySerializer), request)
+        if result_page:
+            serializer = StorySerializer(result_page, many=True, context={
+                'request': request, 'liked_ids': liked_ids(request.user, 'story', result_page)})
             return pagination.get_paginated_response(serializer.data)
         return Response({'message': 'No stories available'}, status=status.HTTP_200_OK)
     
 
+class StoryTrayAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        tray = get_story_tray(request.user, get_follow_graph(request))
+        return Response({'results': tray}, status=status.HTTP_200_OK)
+
+
 class OpenProfileStoryDetail(APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, story_id, *args, **kwargs):
-        story = get_object_or_404(Story.visible_stories(), id=story_id)
-    
-        if story.user.profile_status == CustomUser.OPEN_PROFILE:
-                serializer = StorySerializer(story, context={'request': request})
-                return Response(serializer.data,  status=status.HTTP_200_OK)
+        payload = get_cached_detail('story', Story.visible_stories(), story_id, StorySerializer, request)
+        if payload is None or is_expired(payload):
+            raise Http404
+        if payload['owner_status'] == CustomUser.OPEN_PROFILE:
+                record_view_by_id(Story, story_id, request.user)
+                # is_liked is per viewer, so it is never part of the shared cached payload.
+                data = dict(payload['data'])
+                if 'is_liked' in data:
+                    data['is_liked'] = has_liked(request.user, 'story', story_id)
+                return Response(data,  status=status.HTTP_200_OK)
         return Response({'message': 'This story is private'}, status=status.HTTP_403_FORBIDDEN)
     
     def delete(self, request, story_id):
@@ -83,11 +109,18 @@ class PrivateProfileStoryDetail(APIView):
     permission_classes = [IsAuthenticated, IsOwnerOrOpenProfileOrFollowerPermission]
 
     def get(self, request, story_id, *args, **kwargs):
-        story = get_object_or_404(Story.visible_stories(), id=story_id)
-       
-        if story.user.profile_status == CustomUser.PRIVATE_PROFILE or story.user.id == request.user.id:
-                serializer = StorySerializer(story, context={'request': request})
-                return Response(serializer.data,  status=status.HTTP_200_OK)
+        payload = get_cached_detail('story', Story.visible_stories(), story_id, StorySerializer, request)
+        if payload is None or is_expired(payload):
+            raise Http404
+        owner_id = payload['owner_id']
+        if owner_id == request.user.id or (
+                payload['owner_status'] == CustomUser.PRIVATE_PROFILE and get_follow_graph(request).is_following(owner_id)):
+                record_view_by_id(Story, story_id, request.user)
+                # is_liked is per viewer, so it is never part of the shared cached payload.
+                data = dict(payload['data'])
+                if 'is_liked' in data:
+                    data['is_liked'] = has_liked(request.user, 'story', story_id)
+                return Response(data,  status=status.HTTP_200_OK)
         return Response({'message': 'This story is private'}, status=status.HTTP_403_FORBIDDEN)
     
     def delete(self, request, story_id):
@@ -113,9 +146,9 @@ class CreateSingleStoryAPIView(APIView):
     authentication_classes = [JWTAuthentication]
 
     def post(self, request, *args, **kwargs):
-        serializer = StorySerializer(data=request.data, many=False)
+        serializer = StorySerializer(data=request.data, many=False, context={'request': request})
         if serializer.is_valid():
-            serializer.save()
+            serializer.save(user=request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -125,8 +158,12 @@ class CreateMultipleStoriesAPIView(APIView):
     authentication_classes = [JWTAuthentication]
 
     def post(self, request, *args, **kwargs):
-        serializer = StorySerializer(data=request.data, many=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        serializer = StorySerializer(data=request.data, many=True, context={'request': request})
+        stories, errors = serializer.bulk_create(user=request.user)
+        if not stories:
+            return Response({'created': [], 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        optimize_instances(stories, StorySerializer)
+        created = StorySerializer(stories, many=True, context={'request': request}).data
+        response_status = status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED
+        return Response({'created': created, 'errors': errors}, status=response_status)
\ No newline at end of file
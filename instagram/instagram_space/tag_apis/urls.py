@@ -0,0 +1,9 @@
+from django.urls import path
+from instagram_space.tag_apis.views import *
+
+app_name = 'tag_apis'
+
+urlpatterns = [
+    path('tags/trending/', TrendingTagsAPIView.as_view(), name='trending'),
+    path('tags/<str:name>/posts/', TagFeedAPIView.as_view(), name='feed'),
+]
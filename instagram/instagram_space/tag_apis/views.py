@@ -0,0 +1,52 @@
+from django.shortcuts import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.views import APIView, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from instagram_apps.posts.models import Post
+from instagram_apps.posts.serializers import PostSerializer
+from instagram_apps.interactions.likes import liked_ids
+from instagram_apps.followers.graph import get_follow_graph
+from instagram_apps.tags.models import Hashtag, PostHashtag
+from instagram_apps.tags.parsing import normalize_hashtag
+from instagram_apps.tags.trends import trending_hashtags
+from instagram_space.utils.custom_pagination import KeysetPagination
+from instagram_space.utils.query_optimization import optimize_queryset
+
+
+class TagFeedAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, name):
+        hashtag = get_object_or_404(Hashtag, name=normalize_hashtag(name.lstrip('#')))
+
+        # The page is cut from the (hashtag, created_at, id) index; posts are loaded afterwards by id.
+        pagination = KeysetPagination(ordering=('-created_at', '-id'))
+        links = PostHashtag.objects.filter(get_follow_graph(request).visible_owner_filter('post__user__'),
+                                           hashtag=hashtag).only('id', 'created_at', 'post_id')
+        page = pagination.paginate_queryset(links, request)
+        posts = optimize_queryset(Post.objects.filter(pk__in=[link.post_id for link in page]), PostSerializer)
+        posts = {post.pk: post for post in posts}
+        posts = [posts[link.post_id] for link in page if link.post_id in posts]
+        context = {'request': request, 'liked_ids': liked_ids(request.user, 'post', posts)}
+        serializer = PostSerializer(posts, many=True, context=context)
+        return pagination.get_paginated_response(serializer.data)
+
+
+class TrendingTagsAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # ?hours= narrows or widens the window, up to the retained buckets.
+        window = None
+        if 'hours' in request.query_params:
+            try:
+                window = int(request.query_params['hours']) * 60 * 60
+            except ValueError:
+                window = 0
+            if window <= 0:
+                return Response({'message': 'hours must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': trending_hashtags(window=window)}, status=status.HTTP_200_OK)
@@ -0,0 +1,11 @@
+from django.urls import path
+from instagram_space.upload_apis.views import *
+
+app_name = 'upload_apis'
+
+urlpatterns = [
+    path('uploads/', StartUploadAPIView.as_view(), name='start-upload'),
+    path('uploads/<uuid:upload_id>/', UploadSessionAPIView.as_view(), name='upload-session'),
+    path('uploads/<uuid:upload_id>/chunk', UploadChunkAPIView.as_view(), name='upload-chunk'),
+    path('uploads/<uuid:upload_id>/finish', FinishUploadAPIView.as_view(), name='finish-upload'),
+]
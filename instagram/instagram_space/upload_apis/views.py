@@ -0,0 +1,84 @@
+from django.shortcuts import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.views import APIView, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from instagram_apps.uploads.models import UploadSession
+from instagram_apps.uploads.serializers import UploadSessionSerializer
+from instagram_apps.uploads.chunked import UploadError, start_upload, write_chunk, finish_upload, abort_upload
+from instagram_apps.posts.models import Post
+from instagram_apps.posts.serializers import PostSerializer
+from instagram_apps.stories.serializers import StorySerializer
+
+
+def upload_error_response(error):
+    return Response({'message': error.message, **error.extra}, status=error.status_code)
+
+
+class StartUploadAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = UploadSessionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            session = start_upload(request.user, **serializer.validated_data)
+        except UploadError as error:
+            return upload_error_response(error)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        # Clients resume from the returned offset after a dropped connection.
+        session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_200_OK)
+
+    def delete(self, request, upload_id):
+        session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+        try:
+            abort_upload(session)
+        except UploadError as error:
+            return upload_error_response(error)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadChunkAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    # The body is read straight from the request stream, so no parser may consume it first.
+    parser_classes = []
+
+    def put(self, request, upload_id):
+        session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length', ''))
+        except ValueError:
+            return Response({'message': 'Upload-Offset and Content-Length headers are required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            write_chunk(session, request.stream, offset, length, request.headers.get('Upload-Checksum'))
+        except UploadError as error:
+            return upload_error_response(error)
+        return Response({'offset': session.offset, 'total_size': session.total_size}, status=status.HTTP_200_OK)
+
+
+class FinishUploadAPIView(APIView):
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        session = get_object_or_404(UploadSession, id=upload_id, user=request.user)
+        try:
+            instance = finish_upload(session)
+        except UploadError as error:
+            return upload_error_response(error)
+        serializer_class = PostSerializer if isinstance(instance, Post) else StorySerializer
+        return Response(serializer_class(instance, context={'request': request}).data, status=status.HTTP_201_CREATED)
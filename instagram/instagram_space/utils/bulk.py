@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.dispatch import Signal
+from rest_framework import serializers
+from rest_framework.fields import get_error_detail
+
+
+# Sent with the model as sender and the saved `instances` once a multi-create has
+# inserted them; bulk_create sends no post_save, so apps subscribe here instead.
+bulk_created = Signal()
+
+
+# ListSerializer for multi-create endpoints: items are validated in one pass,
+# invalid items are reported by index, and valid ones are inserted with bulk_create.
+class BulkCreateListSerializer(serializers.ListSerializer):
+
+    def get_batch_size(self):
+        return getattr(settings, 'BULK_CREATE_BATCH_SIZE', 100)
+
+    def build_instance(self, item, extra):
+        model = self.child.Meta.model
+        validated = self.child.run_validation(item)
+        instance = model(**validated, **extra)
+        # Foreign keys passed by the view are trusted; checking them would cost a query per item.
+        instance.clean_fields(exclude=list(extra))
+        instance.clean()
+        return instance
+
+    def bulk_create(self, batch_size=None, **extra):
+        if not isinstance(self.initial_data, list):
+            raise serializers.ValidationError({'non_field_errors': ['Expected a list of items']})
+
+        instances, errors = [], []
+        for index, item in enumerate(self.initial_data):
+            try:
+                instances.append(self.build_instance(item, extra))
+            except serializers.ValidationError as exc:
+                errors.append({'index': index, 'errors': exc.detail})
+            except DjangoValidationError as exc:
+                errors.append({'index': index, 'errors': get_error_detail(exc)})
+
+        model = self.child.Meta.model
+        batch_size = batch_size or self.get_batch_size()
+        with transaction.atomic():
+            for start in range(0, len(instances), batch_size):
+                model.objects.bulk_create(instances[start:start + batch_size])
+            if instances:
+                bulk_created.send(sender=model, instances=instances)
+
+        return instances, errors
@@ -1,7 +1,128 @@
-from rest_framework.pagination import PageNumberPagination 
+import base64
+import json
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
 
 class CustomPagination(PageNumberPagination):
-    page_size = 10 
-    page_size_query_param = 'page_size'  
-    max_page_size = 100  
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+# Forward-only cursor pagination over a unique ordering such as (created_at, id).
+# No COUNT query is issued and rows inserted while paging are never skipped or repeated.
+class KeysetPagination(BasePagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        queryset = queryset.order_by(*self.ordering)
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            queryset = queryset.filter(self.build_filter(self.decode_cursor(encoded)))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def build_filter(self, values):
+        # (a, b) after (x, y) in descending order is a < x OR (a = x AND b < y).
+        conditions = []
+        for position, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {f.lstrip('-'): values[i] for i, f in enumerate(self.ordering[:position])}
+            conditions.append(models.Q(**equal, **{f'{name}__{lookup}': values[position]}))
+        return reduce(lambda left, right: left | right, conditions)
+
+    def get_field(self, name):
+        try:
+            return self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+
+    def encode_cursor(self, instance):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            value = getattr(instance, name)
+            model_field = self.get_field(name)
+            values.append(model_field.value_to_string(instance) if model_field else value)
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, encoded):
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            decoded = []
+            for field, value in zip(self.ordering, values):
+                model_field = self.get_field(field.lstrip('-'))
+                decoded.append(model_field.to_python(value) if model_field else value)
+            return decoded
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+# List views opt into keyset pagination with ?pagination=cursor or by passing a cursor.
+class PaginationModeMixin:
+    pagination_class = CustomPagination
+    cursor_pagination_class = KeysetPagination
 
+    def get_paginator(self, request):
+        if request.query_params.get('pagination') == 'cursor' or KeysetPagination.cursor_query_param in request.query_params:
+            return self.cursor_pagination_class()
+        return self.pagination_class()
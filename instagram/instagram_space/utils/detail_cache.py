@@ -0,0 +1,107 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from instagram_apps.uploads.renditions import requested_width, snap_width
+from instagram_space.utils.query_optimization import optimize_queryset
+from instagram_space.utils.fieldsets import fieldset_key
+
+
+# Read-through cache of serialized detail payloads. Entries are keyed by object id and
+# a per-object time_ns() version that every write replaces (an evicted version comes
+# back as a new one, never as a value an old entry was stored under), and they embed the owner's version so
+# changes to the embedded user (profile status, picture, ...) retire them as well.
+# Payloads carry the owner's id and status so views apply visibility checks per request.
+
+
+def get_detail_timeout():
+    return getattr(settings, 'DETAIL_CACHE_TIMEOUT', 60)
+
+
+def get_lock_timeout():
+    return getattr(settings, 'DETAIL_CACHE_LOCK_TIMEOUT', 5)
+
+
+def get_lock_wait():
+    return getattr(settings, 'DETAIL_CACHE_LOCK_WAIT', 0.5)
+
+
+def _version(key):
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump(key):
+    cache.set(key, time.time_ns(), timeout=None)
+
+
+def _object_version_key(name, pk):
+    return f'detail-cache:{name}:{pk}:version'
+
+
+def _owner_version_key(user_id):
+    return f'detail-cache:owner:{user_id}:version'
+
+
+def invalidate_detail(name, pk):
+    _bump(_object_version_key(name, pk))
+
+
+def invalidate_owner(user_id):
+    _bump(_owner_version_key(user_id))
+
+
+def _is_current(payload):
+    return payload is not None and payload['owner_version'] == _version(_owner_version_key(payload['owner_id']))
+
+
+def build_payload(queryset, pk, serializer_class, request, image_width=None):
+    instance = optimize_queryset(queryset, serializer_class).filter(pk=pk).first()
+    if instance is None:
+        return None
+    owner_version = _version(_owner_version_key(instance.user_id))
+    context = {'request': request}
+    if image_width is not None:
+        context['image_width'] = image_width
+    return {
+        'data': dict(serializer_class(instance, context=context).data),
+        'owner_id': instance.user_id,
+        'owner_status': instance.user.profile_status,
+        'owner_version': owner_version,
+        'created_at': instance.created_at,
+    }
+
+
+def get_cached_detail(name, queryset, pk, serializer_class, request):
+    # The object version is read before the database so a write racing with this
+    # rebuild leaves the entry under a version nobody asks for again.
+    version = _version(_object_version_key(name, pk))
+    width = snap_width(requested_width({'request': request}))
+    key = f'detail-cache:{name}:{pk}:{version}:{width}:{fieldset_key(request)}'
+    payload = cache.get(key)
+    if _is_current(payload):
+        return payload
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, timeout=get_lock_timeout()):
+        try:
+            payload = build_payload(queryset, pk, serializer_class, request, width)
+            if payload is not None:
+                cache.set(key, payload, timeout=get_detail_timeout())
+        finally:
+            cache.delete(lock_key)
+        return payload
+
+    # Another request is rebuilding this hot entry; wait for it rather than piling onto the database.
+    deadline = time.monotonic() + get_lock_wait()
+    while time.monotonic() < deadline:
+        time.sleep(0.02)
+        payload = cache.get(key)
+        if _is_current(payload):
+            return payload
+    return build_payload(queryset, pk, serializer_class, request, width)
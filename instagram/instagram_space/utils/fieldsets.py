@@ -0,0 +1,61 @@
+import copy
+from functools import lru_cache
+
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+# Sparse fieldsets for read endpoints:
+#   ?fields=id,caption,user   only render these top-level fields
+#   ?expand=user              swap a compact nested serializer for the one in Meta.expandable_fields
+# Fields are compiled once per (serializer, fields, expand) and deep-copied for each
+# serializer instance, so a request never re-introspects the model to build them.
+
+
+def parse_list(value):
+    return frozenset(name.strip() for name in (value or '').split(',') if name.strip())
+
+
+def get_fieldset_params(request):
+    if request is None or request.method not in SAFE_METHODS:
+        return frozenset(), frozenset()
+    params = getattr(request, 'query_params', request.GET)
+    return parse_list(params.get('fields')), parse_list(params.get('expand'))
+
+
+def fieldset_key(request):
+    # Cache keys for payloads rendered with the request's fieldset.
+    fields, expand = get_fieldset_params(request)
+    return f'{",".join(sorted(fields))};{",".join(sorted(expand))}'
+
+
+@lru_cache(maxsize=512)
+def compile_fields(serializer_class, selected, expand):
+    fields = serializers.ModelSerializer.get_fields(serializer_class())
+    for name, expanded_class in getattr(serializer_class.Meta, 'expandable_fields', {}).items():
+        if name in expand and name in fields:
+            compact = fields[name]
+            kwargs = {'read_only': True}
+            if compact.source is not None:
+                kwargs['source'] = compact.source
+            fields[name] = expanded_class(**kwargs)
+    if selected:
+        fields = {name: field for name, field in fields.items() if name in selected}
+    return fields
+
+
+class SparseFieldsetMixin:
+
+    def is_root_representation(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def get_fields(self):
+        selected, expand = frozenset(), frozenset()
+        if self.is_root_representation():
+            selected, expand = get_fieldset_params(self.context.get('request'))
+        # Unknown names are dropped before the lookup so arbitrary query strings cannot grow the plan cache.
+        if selected:
+            selected = selected & compile_fields(type(self), frozenset(), frozenset()).keys()
+        expand = expand & getattr(self.Meta, 'expandable_fields', {}).keys()
+        return copy.deepcopy(compile_fields(type(self), frozenset(selected), frozenset(expand)))
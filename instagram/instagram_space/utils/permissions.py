@@ -1,6 +1,5 @@
 from rest_framework.permissions import BasePermission
-from instagram_apps.users.models import CustomUser
-from instagram_apps.followers.models import Follow
+from instagram_apps.followers.graph import get_follow_graph
 
 
 class IsOwnerPermission(BasePermission):
@@ -10,18 +9,10 @@ class IsOwnerPermission(BasePermission):
 
 class IsOwnerOrOpenProfileOrFollowerPermission(BasePermission):
     def has_object_permission(self, request, view, obj):
-        user = request.user
-        owner = obj.user
-
-        if owner == user:
+        if obj.user_id == request.user.pk:
             return True
 
         if request.method in ('GET', 'HEAD', 'OPTIONS'):
-            if owner.profile_status == CustomUser.OPEN_PROFILE:
-                return True
-
-            is_follower = Follow.objects.filter(follower=user, following=owner).exists()
-            if is_follower:
-                return True
+            return get_follow_graph(request).can_view(obj.user)
 
         return False
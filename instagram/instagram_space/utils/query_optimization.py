@@ -0,0 +1,108 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import prefetch_related_objects
+from rest_framework import serializers
+
+
+# Serializers may declare what their list rendering needs on Meta:
+#   select_related / prefetch_related - relations read by method fields
+#   required_fields - model fields read by method fields (kept when only() is applied)
+# Nested serializers, many-related fields and Meta.expandable_fields are discovered automatically.
+
+
+class QueryPlan:
+    def __init__(self):
+        self.select_related = []
+        self.prefetch_related = []
+        self.only = []
+        self.can_defer = True
+
+    def add(self, items, value):
+        if value not in items:
+            items.append(value)
+
+
+def _model_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _collect(serializer, plan, prefix='', prefetching=False):
+    meta = getattr(serializer, 'Meta', None)
+    model = getattr(meta, 'model', None)
+    related = plan.prefetch_related if prefetching else plan.select_related
+
+    for name in getattr(meta, 'select_related', ()):
+        plan.add(related, prefix + name)
+        if not prefetching:
+            plan.add(plan.only, prefix + name)
+    for name in getattr(meta, 'prefetch_related', ()):
+        plan.add(plan.prefetch_related, prefix + name)
+    if not prefetching:
+        for name in getattr(meta, 'required_fields', ()):
+            plan.add(plan.only, prefix + name)
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            if isinstance(field, serializers.SerializerMethodField):
+                continue
+            plan.can_defer = False
+            continue
+
+        path = prefix + field.source.replace('.', '__')
+        if isinstance(field, serializers.ListSerializer):
+            plan.add(plan.prefetch_related, path)
+            if isinstance(field.child, serializers.ModelSerializer):
+                _collect(field.child, plan, path + '__', prefetching=True)
+        elif isinstance(field, serializers.ModelSerializer):
+            plan.add(related, path)
+            if not prefetching:
+                plan.add(plan.only, path)
+            _collect(field, plan, path + '__', prefetching=prefetching)
+        elif isinstance(field, serializers.ManyRelatedField):
+            plan.add(plan.prefetch_related, path)
+        elif not prefetching:
+            model_field = _model_field(model, field.source) if model else None
+            if model_field is None or not model_field.concrete or model_field.many_to_many:
+                if '.' in field.source or model_field is None:
+                    plan.can_defer = False
+                continue
+            plan.add(plan.only, path)
+
+    # ?expand= may swap in a wider nested serializer; its columns are loaded up front
+    # rather than deferred and fetched once per row.
+    for name, expanded_class in getattr(meta, 'expandable_fields', {}).items():
+        field = serializer.fields.get(name)
+        if isinstance(field, serializers.ModelSerializer):
+            _collect(expanded_class(), plan, prefix + field.source.replace('.', '__') + '__', prefetching=prefetching)
+
+
+@lru_cache(maxsize=None)
+def get_query_plan(serializer_class):
+    plan = QueryPlan()
+    _collect(serializer_class(), plan)
+    return plan
+
+
+def optimize_queryset(queryset, serializer_class):
+    plan = get_query_plan(serializer_class)
+    if plan.select_related:
+        queryset = queryset.select_related(*plan.select_related)
+    if plan.prefetch_related:
+        queryset = queryset.prefetch_related(*plan.prefetch_related)
+    if plan.can_defer and plan.only:
+        queryset = queryset.only(*plan.only)
+    return queryset
+
+
+def optimize_instances(instances, serializer_class):
+    # For already loaded objects (e.g. freshly bulk-created ones) only prefetches can still help.
+    plan = get_query_plan(serializer_class)
+    if instances and plan.prefetch_related:
+        prefetch_related_objects(instances, *plan.prefetch_related)
+    return instances
@@ -0,0 +1,53 @@
+import json
+import math
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# JSON renderer that encodes with orjson when it is installed and falls back to the
+# stdlib encoder otherwise (or whenever indented output is requested). Output matches
+# JSONRenderer: datetimes, decimals and lazy strings still go through DRF's encoder,
+# and NaN or infinite floats are rejected in strict mode instead of becoming null.
+class FastJSONRenderer(JSONRenderer):
+
+    def can_use_orjson(self, indent):
+        return orjson is not None and indent is None and self.compact and not self.ensure_ascii
+
+    def encode(self, data, indent=None):
+        if not self.can_use_orjson(indent):
+            separators = (',', ':') if self.compact and indent is None else ((',', ': ') if indent is None else None)
+            ret = json.dumps(data, cls=self.encoder_class, indent=indent, ensure_ascii=self.ensure_ascii,
+                             allow_nan=not self.strict, separators=separators)
+            return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+        if self.strict and has_non_finite_float(data):
+            raise ValueError('Out of range float values are not JSON compliant')
+        ret = orjson.dumps(data, default=self.encoder_class().default,
+                           option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return self.encode(data)
+
+
+def has_non_finite_float(data):
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
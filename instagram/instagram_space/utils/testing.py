@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db import connection
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountAssertionsMixin:
+
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as context:
+            func()
+        return len(context.captured_queries)
+
+    def assertQueryCountIndependentOfPageSize(self, url, page_sizes=(1, 10), params=None):
+        # Fails when a list endpoint issues per-row queries (N+1).
+        counts = {}
+        for page_size in page_sizes:
+            query = dict(params or {}, page_size=page_size)
+            counts[page_size] = self.count_queries(lambda: self.client.get(url, query))
+        if len(set(counts.values())) > 1:
+            self.fail(f'Query count of {url} grows with page size: {counts}')
+        return counts
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # Test databases are not shared with other threads, so counters flush inline.
+        settings.COUNTER_BACKGROUND_FLUSH = False
+
+    # Counter buffers flush at exit, after the test databases are gone and the
+    # real database is configured again; increments recorded against test rows
+    # are dropped before teardown so they never reach it.
+    def teardown_databases(self, old_config, **kwargs):
+        from instagram_apps.interactions.counters import CounterBuffer
+
+        for buffer in CounterBuffer.instances:
+            buffer.discard()
+        super().teardown_databases(old_config, **kwargs)